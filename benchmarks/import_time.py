@@ -0,0 +1,89 @@
+"""
+Import time of the package entry points, measured with ``python -X
+importtime`` in fresh interpreters.
+
+Usage::
+
+    python benchmarks/import_time.py [--runs 5] [--output results.json]
+
+Each module is imported in a new interpreter per run, and the best run is
+compared with its budget. The exit status is 1 if any budget is exceeded.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+# Seconds allowed for the cumulative import of each module, None to only
+# report it. The package itself loads nothing until an export is accessed,
+# and the clients load httpx and tenacity when they are instantiated.
+BUDGETS = {
+    "semanticscholar": 0.01,
+    "semanticscholar.mcp_server": None,
+    "semanticscholar.AsyncSemanticScholar": 0.12,
+    "semanticscholar.SemanticScholar": 0.15,
+}
+
+
+def import_time(module: str) -> float:
+    """
+    Cumulative import time of a module in a fresh interpreter, in seconds.
+
+    :param str module: module name.
+    :rtype: :class:`float`
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        check=True,
+    )
+    # Lines are "import time: self [us] | cumulative | imported package".
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    raise RuntimeError(f"No import time reported for {module}.")
+
+
+def run(runs: int) -> dict:
+    results = {}
+    for module, budget in BUDGETS.items():
+        samples = [import_time(module) for _ in range(runs)]
+        best = min(samples)
+        results[module] = {
+            "runs": runs,
+            "best_s": best,
+            "budget_s": budget,
+            "within_budget": budget is None or best <= budget,
+        }
+    return results
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+    results = run(args.runs)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    for module, result in results.items():
+        budget = result["budget_s"]
+        print(
+            f"{module}: {result['best_s'] * 1000:.1f} ms"
+            + (f" (budget {budget * 1000:.0f} ms)" if budget is not None else "")
+            + ("" if result["within_budget"] else " OVER BUDGET")
+        )
+    if not all(result["within_budget"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
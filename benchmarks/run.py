@@ -0,0 +1,230 @@
+"""
+Benchmarks of the client hot paths against a local stub of the Graph API.
+
+Usage::
+
+    python benchmarks/run.py --output results.json [--latency 0.01] [--quick]
+
+Results are written as JSON, with the median and 95th percentile of the
+repeated runs of each benchmark, so they can be compared across commits.
+"""
+
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from importlib.metadata import PackageNotFoundError, version
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from benchmarks.stub_server import StubApp, load_item, load_paper
+from semanticscholar import AsyncSemanticScholar, SemanticScholar
+from semanticscholar.ApiEmulator import serve
+from semanticscholar.Paper import Paper
+
+try:
+    VERSION = version("semanticscholar")
+except PackageNotFoundError:
+    VERSION = None
+
+
+def summarize(samples: list, items: int = None) -> dict:
+    samples = sorted(samples)
+    median = statistics.median(samples)
+    result = {
+        "runs": len(samples),
+        "median_s": median,
+        "p95_s": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+        "min_s": samples[0],
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+    if items:
+        result["items"] = items
+        result["items_per_s"] = items / median if median else None
+    return result
+
+
+def bench_paper_construction(data: dict, count: int, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            Paper(data)
+        samples.append(time.perf_counter() - start)
+    result = summarize(samples, count)
+    result["us_per_item"] = result["median_s"] / count * 1e6
+    return result
+
+
+def bench_memory_papers(count: int) -> dict:
+    # Each paper is parsed from its own payload, as when read from responses.
+    payload = json.dumps(load_item())
+    gc.collect()
+    tracemalloc.start()
+    papers = [Paper(json.loads(payload)) for _ in range(count)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del papers
+    return {
+        "items": count,
+        "retained_bytes": current,
+        "peak_bytes": peak,
+        "bytes_per_10k_items": current * 10000 // count,
+    }
+
+
+async def bench_get_papers(sch, batch_size: int, repeat: int) -> dict:
+    # The stub returns the same paper for every ID.
+    ids = [load_item()["paperId"]] * batch_size
+    await sch.get_papers(ids)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await sch.get_papers(ids)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, batch_size)
+
+
+async def bench_bulk_search(sch, total: int, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = await sch.search_paper("query", bulk=True)
+        count = 0
+        async for _ in results:
+            count += 1
+        samples.append(time.perf_counter() - start)
+        if count != total:
+            raise RuntimeError(f"Expected {total} results, got {count}.")
+    return summarize(samples, total)
+
+
+async def bench_memory_bulk_search(sch, total: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    results = await sch.search_paper("query", bulk=True)
+    async for _ in results:
+        pass
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return {
+        "items": total,
+        "retained_bytes": current,
+        "peak_bytes": peak,
+        "bytes_per_10k_items": current * 10000 // total,
+    }
+
+
+async def bench_get_paper_async(sch, calls: int, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await sch.get_paper("CorpusId:1")
+        samples.append(time.perf_counter() - start)
+    result = summarize(samples, calls)
+    result["us_per_call"] = result["median_s"] / calls * 1e6
+    return result
+
+
+def bench_get_paper_sync(sch, calls: int, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            sch.get_paper("CorpusId:1")
+        samples.append(time.perf_counter() - start)
+    result = summarize(samples, calls)
+    result["us_per_call"] = result["median_s"] / calls * 1e6
+    return result
+
+
+def run(latency: float, quick: bool) -> dict:
+    repeat = 3 if quick else 10
+    bulk_total = 2000 if quick else 10000
+    calls = 200 if quick else 1000
+    app = StubApp(latency=latency, bulk_total=bulk_total)
+    results = {
+        "paper_construction": bench_paper_construction(
+            load_item(), 1000 if quick else 10000, repeat
+        ),
+        # With its 1000 citations and 14 references.
+        "paper_construction_nested": bench_paper_construction(
+            load_paper(), 5 if quick else 20, repeat
+        ),
+        "memory_papers": bench_memory_papers(10000),
+    }
+    with serve(app) as api_url:
+        # Connections are reused, so that calls measure the library rather
+        # than connection setup.
+        async def run_async():
+            client = httpx.AsyncClient()
+            sch = AsyncSemanticScholar(api_url=api_url, retry=False, http_client=client)
+            results["get_papers_batch"] = await bench_get_papers(sch, 500, repeat)
+            results["bulk_search_iteration"] = await bench_bulk_search(
+                sch, bulk_total, repeat
+            )
+            results["memory_bulk_search"] = await bench_memory_bulk_search(
+                sch, bulk_total
+            )
+            results["get_paper_async"] = await bench_get_paper_async(sch, calls, repeat)
+            await client.aclose()
+
+        asyncio.run(run_async())
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        client = httpx.AsyncClient()
+        sch = SemanticScholar(api_url=api_url, retry=False, http_client=client)
+        results["get_paper_sync"] = bench_get_paper_sync(sch, calls, repeat)
+        loop.run_until_complete(client.aclose())
+
+    # Difference of the medians, with the standard deviation of the
+    # difference. An overhead within it is not measurable.
+    sync, async_ = results["get_paper_sync"], results["get_paper_async"]
+    results["sync_overhead"] = {
+        "us_per_call": sync["us_per_call"] - async_["us_per_call"],
+        "stdev_us_per_call": math.hypot(sync["stdev_s"], async_["stdev_s"])
+        / calls
+        * 1e6,
+    }
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "semanticscholar": VERSION,
+            "latency_s": latency,
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="stub latency in seconds"
+    )
+    parser.add_argument("--quick", action="store_true", help="fewer and smaller runs")
+    args = parser.parse_args(argv)
+    report = run(args.latency, args.quick)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    for name, result in report["results"].items():
+        print(name, json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
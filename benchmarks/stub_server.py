@@ -0,0 +1,103 @@
+"""
+ASGI stub of the Graph API used by the benchmarks. Papers are copies of the
+recorded ``tests/data/Paper.json`` payload without its nested citations,
+references and embedding, encoded once, so the stub spends as little CPU as
+possible next to the client being measured.
+"""
+
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "data")
+
+
+def load_paper() -> dict:
+    """
+    Recorded paper, with 1000 citations and 14 references.
+    """
+    with open(os.path.join(DATA_DIR, "Paper.json"), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def load_item() -> dict:
+    """
+    Recorded paper without the fields not returned by search and batch
+    requests by default.
+    """
+    paper = load_paper()
+    for field in ("citations", "references", "embedding"):
+        del paper[field]
+    return paper
+
+
+class StubApp:
+    """
+    Serves ``GET /graph/v1/paper/{id}``, ``POST /graph/v1/paper/batch`` and
+    ``GET /graph/v1/paper/search/bulk`` with token pagination over
+    ``bulk_total`` papers.
+    """
+
+    def __init__(
+        self, latency: float = 0.0, bulk_total: int = 10000, page_size: int = 1000
+    ) -> None:
+        """
+        :param float latency: seconds waited before each response.
+        :param int bulk_total: papers returned by bulk search.
+        :param int page_size: papers per bulk search page.
+        """
+        self.latency = latency
+        self.bulk_total = bulk_total
+        self.page_size = page_size
+        self.requests = 0
+        self._paper = json.dumps(load_item()).encode()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                else:
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        status, payload = self._route(scope, body)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+    def _route(self, scope, body: bytes) -> tuple:
+        path = scope["path"]
+        if path == "/graph/v1/paper/batch" and scope["method"] == "POST":
+            ids = json.loads(body)["ids"]
+            return 200, b"[" + b",".join([self._paper] * len(ids)) + b"]"
+        if path == "/graph/v1/paper/search/bulk":
+            query = parse_qs(scope["query_string"].decode())
+            offset = int(query.get("token", ["0"])[0])
+            count = max(0, min(self.page_size, self.bulk_total - offset))
+            head = b'{"total": %d, ' % self.bulk_total
+            if offset + count < self.bulk_total:
+                head += b'"token": "%d", ' % (offset + count)
+            data = b",".join([self._paper] * count)
+            return 200, head + b'"data": [' + data + b"]}"
+        if path.startswith("/graph/v1/paper/"):
+            return 200, self._paper
+        return 404, b'{"error": "Not found"}'
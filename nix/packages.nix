@@ -30,7 +30,12 @@
         };
 
         nativeCheckInputs = with python.pkgs; [
+          fakeredis
+          lupa
+          numpy
+          opentelemetry-sdk
           pytestCheckHook
+          uvicorn
           vcrpy
         ];
       };
@@ -9,6 +9,7 @@
       devShells.default = pkgs.mkShell {
         inputsFrom = [ config.packages.default ];
         packages = [
+          pkgs.python3Packages.uvicorn
           pkgs.python3Packages.vcrpy
           pkgs.ruff
           pkgs.uv
@@ -0,0 +1,1068 @@
+import argparse
+import asyncio
+import contextlib
+import gzip
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+from urllib.parse import parse_qs
+
+_WORDS = (
+    "adaptive", "analysis", "attention", "bayesian", "benchmark", "citation",
+    "classification", "clustering", "compression", "contrastive", "corpus",
+    "deep", "detection", "diffusion", "distributed", "efficient", "embedding",
+    "evaluation", "federated", "generation", "graph", "inference", "language",
+    "learning", "linear", "model", "molecular", "multimodal", "network",
+    "neural", "optimization", "protein", "quantum", "reasoning", "recommendation",
+    "reinforcement", "representation", "retrieval", "robust", "scalable",
+    "scholarly", "search", "segmentation", "semantic", "sequence", "sparse",
+    "spectral", "statistical", "survey", "transformer", "translation",
+    "uncertainty", "unsupervised", "vision",
+)  # fmt: skip
+_FIRST_NAMES = (
+    "Ada", "Alan", "Barbara", "Claude", "Donald", "Edsger", "Frances", "Grace",
+    "John", "Katherine", "Leslie", "Margaret", "Niklaus", "Radia", "Tim",
+)  # fmt: skip
+_LAST_NAMES = (
+    "Allen", "Dijkstra", "Hamilton", "Hopper", "Johnson", "Knuth", "Lamport",
+    "Liskov", "Lovelace", "McCarthy", "Perlman", "Shannon", "Turing", "Wirth",
+)  # fmt: skip
+_FIELDS_OF_STUDY = ("Computer Science", "Mathematics", "Biology", "Physics")
+_PUBLICATION_TYPES = ("JournalArticle", "Conference", "Review")
+_EDGE_FIELDS = {"contexts", "intents", "contextsWithIntent", "isInfluential"}
+_DATASETS = {
+    "papers": "Core attributes of the emulated papers.",
+    "abstracts": "Abstracts of the emulated papers.",
+    "authors": "Core attributes of the emulated authors.",
+    "citations": "Citations between the emulated papers.",
+}
+
+_NOT_AVAILABLE = "Requested data for this limit and/or offset is not available"
+_ROUTE_PARAMETER = re.compile(r"{(\w+)}")
+
+
+def _pattern(match: re.Match) -> str:
+    return "(.+)" if match.group(1) == "paper_id" else "([^/]+)"
+
+
+def _json(data: Any) -> bytes:
+    return json.dumps(data).encode()
+
+
+class _Error(Exception):
+    def __init__(self, status: int, body: dict, headers: list = None) -> None:
+        super().__init__(status)
+        self.status = status
+        self.body = body
+        self.headers = headers or []
+
+
+class ApiEmulator:
+    """
+    ASGI application emulating the Graph, Recommendations and Datasets APIs
+    over a synthetic corpus, for load tests and offline integration tests.
+    It follows the paging semantics of the real API (``offset``/``next``
+    with the same limits, ``token`` for bulk search), and can rate limit
+    clients with 429 responses carrying ``Retry-After``, inject 5xx errors
+    and delay responses following a latency distribution.
+
+    Run it with any ASGI server, e.g. ``semanticscholar-emulator --port
+    8000``, or in a background thread with :meth:`serve`, and point a client
+    at it with its ``api_url`` parameter.
+    """
+
+    def __init__(
+        self,
+        papers: int = 1000,
+        authors: int = None,
+        seed: int = 0,
+        latency: Union[float, Callable[[random.Random], float]] = 0.0,
+        rate_limit: float = None,
+        burst: int = 1,
+        error_rate: float = 0.0,
+        error_statuses: Iterable[int] = (500, 504),
+        api_keys: Iterable[str] = None,
+        embedding_dimension: int = 768,
+        releases: List[str] = ("2024-01-02", "2024-01-09"),
+    ) -> None:
+        """
+        :param int papers: (optional) number of synthetic papers.
+        :param int authors: (optional) number of synthetic authors, by
+               default a third of the papers.
+        :param int seed: (optional) seed of the corpus and of the random
+               latencies and errors.
+        :param latency: (optional) seconds waited before each response, or
+               function drawing them from a random generator, see
+               :meth:`lognormal_latency`.
+        :param float rate_limit: (optional) requests per second allowed per
+               API key, or None for no limit.
+        :param int burst: (optional) requests allowed at once before rate
+               limiting.
+        :param float error_rate: (optional) fraction of the requests failing
+               with a server error.
+        :param error_statuses: (optional) statuses of the injected errors.
+        :param api_keys: (optional) accepted values of the ``x-api-key``
+               header, by default any. Requests with another key get a 403.
+        :param int embedding_dimension: (optional) length of the embeddings.
+        :param list releases: (optional) IDs of the dataset releases.
+        """
+        self._random = random.Random(seed)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.api_keys = set(api_keys) if api_keys is not None else None
+        self.embedding_dimension = embedding_dimension
+        self.releases = list(releases)
+        self._seed = seed
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+        self._build_corpus(papers, authors if authors is not None else papers // 3)
+        # Paper IDs may contain slashes (DOIs, URLs), so the routes ending
+        # with a segment after the paper ID are matched first.
+        self._routes = [
+            (
+                method,
+                template,
+                re.compile(_ROUTE_PARAMETER.sub(_pattern, template)),
+                handler,
+            )
+            for method, template, handler in (
+                ("GET", "/graph/v1/paper/search", self._search_papers),
+                ("GET", "/graph/v1/paper/search/bulk", self._search_papers_bulk),
+                ("GET", "/graph/v1/paper/search/match", self._match_paper),
+                ("GET", "/graph/v1/paper/autocomplete", self._autocomplete),
+                ("POST", "/graph/v1/paper/batch", self._get_papers),
+                ("GET", "/graph/v1/paper/{paper_id}/authors", self._paper_authors),
+                ("GET", "/graph/v1/paper/{paper_id}/citations", self._citations),
+                ("GET", "/graph/v1/paper/{paper_id}/references", self._references),
+                ("GET", "/graph/v1/paper/{paper_id}", self._get_paper),
+                ("GET", "/graph/v1/author/search", self._search_authors),
+                ("POST", "/graph/v1/author/batch", self._get_authors),
+                ("GET", "/graph/v1/author/{author_id}/papers", self._author_papers),
+                ("GET", "/graph/v1/author/{author_id}", self._get_author),
+                ("GET", "/graph/v1/snippet/search", self._search_snippets),
+                (
+                    "GET",
+                    "/recommendations/v1/papers/forpaper/{paper_id}",
+                    self._recommend_for_paper,
+                ),
+                ("POST", "/recommendations/v1/papers/", self._recommend_from_lists),
+                ("GET", "/datasets/v1/release/", self._releases),
+                ("GET", "/datasets/v1/release/{release_id}", self._release),
+                (
+                    "GET",
+                    "/datasets/v1/release/{release_id}/dataset/{name}",
+                    self._dataset,
+                ),
+                (
+                    "GET",
+                    "/datasets/v1/diffs/{start}/to/{end}/{name}",
+                    self._diffs,
+                ),
+                ("GET", "/files/{release_id}/{name}/{file}", self._file),
+            )
+        ]
+
+    @staticmethod
+    def lognormal_latency(median: float, sigma: float = 0.5) -> Callable:
+        """
+        Log-normal latency distribution, whose long tail resembles the
+        latency of real services.
+
+        :param float median: median latency in seconds.
+        :param float sigma: (optional) standard deviation of the logarithm.
+        :returns: function drawing latencies from a random generator.
+        """
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+    @staticmethod
+    def uniform_latency(low: float, high: float) -> Callable:
+        """
+        Uniform latency distribution.
+
+        :param float low: minimum latency in seconds.
+        :param float high: maximum latency in seconds.
+        :returns: function drawing latencies from a random generator.
+        """
+        return lambda rng: rng.uniform(low, high)
+
+    @property
+    def paper_ids(self) -> List[str]:
+        """
+        paperIds of the emulated papers, by corpusId.
+
+        :type: :class:`List` of :class:`str`
+        """
+        return [paper["paperId"] for paper in self._papers]
+
+    @property
+    def author_ids(self) -> List[str]:
+        """
+        authorIds of the emulated authors.
+
+        :type: :class:`List` of :class:`str`
+        """
+        return [author["authorId"] for author in self._authors]
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counts of the handled requests: ``requests``, ``statuses`` by HTTP
+        status, ``routes`` by path template, and ``max_in_flight``, the
+        highest number of requests handled at once.
+
+        :type: :class:`dict`
+        """
+        with self._lock:
+            return {
+                "requests": self._stats["requests"],
+                "statuses": dict(self._stats["statuses"]),
+                "routes": dict(self._stats["routes"]),
+                "in_flight": self._stats["in_flight"],
+                "max_in_flight": self._stats["max_in_flight"],
+            }
+
+    def reset_stats(self) -> None:
+        """
+        Reset the counts of :attr:`stats` and the rate limit buckets.
+        """
+        with self._lock:
+            self._stats = {
+                "requests": 0,
+                "statuses": {},
+                "routes": {},
+                "in_flight": 0,
+                "max_in_flight": 0,
+            }
+            self._buckets = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                else:
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["in_flight"] += 1
+            self._stats["max_in_flight"] = max(
+                self._stats["max_in_flight"], self._stats["in_flight"]
+            )
+        try:
+            status, headers, payload = await self._handle(scope, body)
+        finally:
+            with self._lock:
+                self._stats["in_flight"] -= 1
+        with self._lock:
+            statuses = self._stats["statuses"]
+            statuses[status] = statuses.get(status, 0) + 1
+
+        content_type = (
+            b"application/gzip"
+            if scope["path"].startswith("/files/")
+            else b"application/json"
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", content_type),
+                    (b"content-length", str(len(payload)).encode()),
+                ]
+                + [(name.encode(), value.encode()) for name, value in headers],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+    async def _handle(self, scope, body: bytes) -> Tuple[int, list, bytes]:
+        headers = {
+            name.decode().lower(): value.decode() for name, value in scope["headers"]
+        }
+        latency = self.latency(self._random) if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+        try:
+            handler, args = self._route(scope["method"], scope["path"])
+            self._check_access(headers.get("x-api-key"))
+            query = {
+                name: values[-1]
+                for name, values in parse_qs(
+                    scope["query_string"].decode(), keep_blank_values=True
+                ).items()
+            }
+            request = {
+                "query": query,
+                "body": json.loads(body) if body else None,
+                "base_url": f"{scope.get('scheme', 'http')}://"
+                f"{headers.get('host', 'localhost')}",
+            }
+            result = handler(request, *args)
+        except _Error as error:
+            return error.status, error.headers, _json(error.body)
+        if isinstance(result, bytes):
+            return 200, [], result
+        return 200, [], _json(result)
+
+    def _route(self, method: str, path: str) -> tuple:
+        for route_method, template, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if match and route_method == method:
+                with self._lock:
+                    routes = self._stats["routes"]
+                    routes[template] = routes.get(template, 0) + 1
+                return handler, match.groups()
+        raise _Error(404, {"error": f"No route for {method} {path}"})
+
+    def _check_access(self, api_key: str) -> None:
+        if self.api_keys is not None and api_key is not None:
+            if api_key not in self.api_keys:
+                raise _Error(403, {"message": "Forbidden"})
+        if self.rate_limit:
+            now = time.monotonic()
+            with self._lock:
+                tokens, updated = self._buckets.get(api_key, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate_limit)
+                if tokens < 1:
+                    self._buckets[api_key] = (tokens, now)
+                    retry_after = math.ceil((1 - tokens) / self.rate_limit)
+                    raise _Error(
+                        429,
+                        {
+                            "message": "Too Many Requests. Please wait and try "
+                            "again or apply for a key for higher rate limits.",
+                            "code": "429",
+                        },
+                        [("retry-after", str(retry_after))],
+                    )
+                self._buckets[api_key] = (tokens - 1, now)
+        if self.error_rate and self._random.random() < self.error_rate:
+            status = self._random.choice(self.error_statuses)
+            message = (
+                "Endpoint request timed out"
+                if status == 504
+                else "Internal Server Error"
+            )
+            raise _Error(status, {"message": message})
+
+    # Corpus
+
+    def _build_corpus(self, n_papers: int, n_authors: int) -> None:
+        rng = random.Random(self._seed)
+        self._authors = [
+            {
+                "authorId": str(1000 + i),
+                "externalIds": {},
+                "url": f"https://www.semanticscholar.org/author/{1000 + i}",
+                "name": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+                "affiliations": [],
+                "homepage": None,
+                "paperCount": 0,
+                "citationCount": 0,
+                "hIndex": 0,
+                "_papers": [],
+            }
+            for i in range(max(1, n_authors))
+        ]
+        self._papers = []
+        self._paper_index = {}
+        for corpus_id in range(n_papers):
+            paper_id = hashlib.sha1(f"{self._seed}:{corpus_id}".encode()).hexdigest()
+            year = rng.randint(1990, 2024)
+            title = " ".join(rng.sample(_WORDS, rng.randint(3, 7))).capitalize()
+            authors = rng.sample(
+                self._authors, min(len(self._authors), rng.randint(1, 4))
+            )
+            fields = rng.sample(_FIELDS_OF_STUDY, rng.randint(1, 2))
+            references = sorted(
+                set(rng.randrange(corpus_id) for _ in range(rng.randint(0, 20)))
+                if corpus_id
+                else ()
+            )
+            paper = {
+                "paperId": paper_id,
+                "corpusId": corpus_id,
+                "externalIds": {
+                    "CorpusId": corpus_id,
+                    "DOI": f"10.5555/emulator.{corpus_id}",
+                },
+                "url": f"https://www.semanticscholar.org/paper/{paper_id}",
+                "title": title,
+                "abstract": f"We study {title.lower()}. "
+                f"Our {rng.choice(_WORDS)} approach improves "
+                f"{rng.choice(_WORDS)} {rng.choice(_WORDS)}.",
+                "venue": f"Journal of {rng.choice(_WORDS).capitalize()}",
+                "publicationVenue": None,
+                "year": year,
+                "publicationDate": f"{year}-{rng.randint(1, 12):02d}-"
+                f"{rng.randint(1, 28):02d}",
+                "referenceCount": len(references),
+                "citationCount": 0,
+                "influentialCitationCount": 0,
+                "isOpenAccess": rng.random() < 0.3,
+                "openAccessPdf": None,
+                "fieldsOfStudy": fields,
+                "s2FieldsOfStudy": [
+                    {"category": field, "source": "s2-fos-model"} for field in fields
+                ],
+                "publicationTypes": [rng.choice(_PUBLICATION_TYPES)],
+                "journal": {"name": "Emulated Journal", "volume": str(year - 1989)},
+                "authors": [
+                    {"authorId": author["authorId"], "name": author["name"]}
+                    for author in authors
+                ],
+                "_references": references,
+                "_citations": [],
+                "_influential": {ref for ref in references if rng.random() < 0.1},
+            }
+            for author in authors:
+                author["_papers"].append(corpus_id)
+            self._papers.append(paper)
+            self._paper_index[paper_id] = corpus_id
+        for paper in self._papers:
+            for reference in paper["_references"]:
+                cited = self._papers[reference]
+                cited["_citations"].append(paper["corpusId"])
+                cited["citationCount"] += 1
+                if reference in paper["_influential"]:
+                    cited["influentialCitationCount"] += 1
+        for author in self._authors:
+            counts = sorted(
+                (self._papers[c]["citationCount"] for c in author["_papers"]),
+                reverse=True,
+            )
+            author["paperCount"] = len(counts)
+            author["citationCount"] = sum(counts)
+            author["hIndex"] = sum(1 for i, count in enumerate(counts) if count > i)
+        self._author_index = {
+            author["authorId"]: i for i, author in enumerate(self._authors)
+        }
+
+    def _find_paper(self, paper_id: str) -> dict:
+        corpus_id = None
+        if paper_id.startswith("CorpusId:"):
+            corpus_id = paper_id.split(":", 1)[1]
+            corpus_id = int(corpus_id) if corpus_id.isdigit() else None
+        elif paper_id.startswith("DOI:10.5555/emulator."):
+            corpus_id = paper_id.rsplit(".", 1)[1]
+            corpus_id = int(corpus_id) if corpus_id.isdigit() else None
+        else:
+            corpus_id = self._paper_index.get(paper_id)
+        if corpus_id is None or not 0 <= corpus_id < len(self._papers):
+            return None
+        return self._papers[corpus_id]
+
+    def _paper_or_404(self, paper_id: str) -> dict:
+        paper = self._find_paper(paper_id)
+        if paper is None:
+            raise _Error(404, {"error": "Paper not found"})
+        return paper
+
+    def _author_or_404(self, author_id: str) -> dict:
+        index = self._author_index.get(author_id)
+        if index is None:
+            raise _Error(404, {"error": "Author not found"})
+        return self._authors[index]
+
+    def _embedding(self, paper: dict, model: str) -> dict:
+        rng = random.Random(f"{self._seed}:{model}:{paper['corpusId']}")
+        return {
+            "model": model,
+            "vector": [
+                round(rng.gauss(0, 1), 6) for _ in range(self.embedding_dimension)
+            ],
+        }
+
+    # Field selection
+
+    @staticmethod
+    def _fields(query: dict, default: Iterable[str]) -> Tuple[set, dict]:
+        names = query.get("fields")
+        names = names.split(",") if names else list(default)
+        top, nested = set(), {}
+        for name in filter(None, names):
+            head, _, tail = name.partition(".")
+            top.add(head)
+            if tail:
+                nested.setdefault(head, set()).add(tail)
+        return top, nested
+
+    def _select_paper(self, paper: dict, fields: Tuple[set, dict]) -> dict:
+        top, nested = fields
+        data = {"paperId": paper["paperId"]}
+        for name in top:
+            if name in ("citations", "references"):
+                ids = paper["_citations" if name == "citations" else "_references"]
+                subfields = (nested.get(name) or {"title"}, {})
+                data[name] = [
+                    self._select_paper(self._papers[i], subfields) for i in ids
+                ]
+            elif name == "authors":
+                subfields = nested.get("authors")
+                data["authors"] = [
+                    self._select_author(
+                        self._authors[self._author_index[author["authorId"]]],
+                        (subfields, {}),
+                    )
+                    if subfields
+                    else dict(author)
+                    for author in paper["authors"]
+                ]
+            elif name == "embedding":
+                model = next(iter(nested.get("embedding", ())), "specter_v1")
+                data["embedding"] = self._embedding(paper, model)
+            elif name == "tldr":
+                data["tldr"] = {"model": "tldr@v2.0.0", "text": paper["abstract"]}
+            elif name == "citationStyles":
+                data["citationStyles"] = {
+                    "bibtex": f"@Article{{Emulated{paper['corpusId']},\n "
+                    f"title = {{{paper['title']}}},\n year = {{{paper['year']}}}\n}}"
+                }
+            elif name in paper and not name.startswith("_"):
+                data[name] = paper[name]
+        return data
+
+    def _select_author(self, author: dict, fields: Tuple[set, dict]) -> dict:
+        top, nested = fields
+        data = {"authorId": author["authorId"]}
+        for name in top:
+            if name == "papers":
+                subfields = (nested.get("papers") or {"title"}, {})
+                data["papers"] = [
+                    self._select_paper(self._papers[i], subfields)
+                    for i in author["_papers"]
+                ]
+            elif name in author and not name.startswith("_"):
+                data[name] = author[name]
+        return data
+
+    # Paging
+
+    @staticmethod
+    def _page(
+        items: list, query: dict, default_limit: int, max_limit: int, window: int
+    ) -> Tuple[list, dict]:
+        try:
+            offset = int(query.get("offset", 0))
+            limit = int(query.get("limit", default_limit))
+        except ValueError:
+            raise _Error(400, {"error": "Invalid offset or limit"})
+        if offset < 0 or limit < 0 or limit > max_limit:
+            raise _Error(
+                400, {"error": f"The limit parameter must be at most {max_limit}"}
+            )
+        if offset + limit > window:
+            raise _Error(400, {"error": _NOT_AVAILABLE})
+        page = {"offset": offset}
+        if offset + limit < len(items):
+            page["next"] = offset + limit
+        return items[offset : offset + limit], page
+
+    def _matching_papers(self, query: dict) -> List[dict]:
+        terms = re.findall(r"\w+", query.get("query", "").lower())
+        year = query.get("year")
+        low = high = None
+        if year:
+            low, _, high = year.partition("-")
+            low = int(low) if low else None
+            high = int(high) if high else (low if "-" not in year else None)
+        date_low, _, date_high = query.get("publicationDateOrYear", "").partition(":")
+        min_citations = int(query.get("minCitationCount") or 0)
+        fields_of_study = set(filter(None, query.get("fieldsOfStudy", "").split(",")))
+        scored = []
+        for paper in self._papers:
+            text = f"{paper['title']} {paper['abstract']}".lower()
+            score = sum(1 for term in terms if term in text)
+            if terms and not score:
+                continue
+            if low is not None and paper["year"] < low:
+                continue
+            if high is not None and paper["year"] > high:
+                continue
+            # Dates compare as strings, bounds of lower precision covering
+            # whole years or months.
+            if date_low and paper["publicationDate"] < date_low:
+                continue
+            if date_high and paper["publicationDate"][: len(date_high)] > date_high:
+                continue
+            if paper["citationCount"] < min_citations:
+                continue
+            if fields_of_study and not fields_of_study & set(paper["fieldsOfStudy"]):
+                continue
+            if "openAccessPdf" in query and not paper["isOpenAccess"]:
+                continue
+            scored.append((score, paper))
+        return scored
+
+    # Graph API
+
+    def _get_paper(self, request: dict, paper_id: str) -> dict:
+        paper = self._paper_or_404(paper_id)
+        return self._select_paper(paper, self._fields(request["query"], ["title"]))
+
+    def _get_papers(self, request: dict) -> list:
+        ids = (request["body"] or {}).get("ids") or []
+        if len(ids) > 500:
+            raise _Error(400, {"error": "Cannot process more than 500 IDs"})
+        fields = self._fields(request["query"], ["title"])
+        return [
+            self._select_paper(paper, fields) if paper is not None else None
+            for paper in map(self._find_paper, ids)
+        ]
+
+    def _search_papers(self, request: dict) -> dict:
+        query = request["query"]
+        scored = self._matching_papers(query)
+        scored.sort(key=lambda item: (-item[0], -item[1]["citationCount"]))
+        papers = [paper for _, paper in scored]
+        items, page = self._page(papers, query, 100, 100, 1000)
+        fields = self._fields(query, ["title"])
+        page["total"] = len(papers)
+        page["data"] = [self._select_paper(paper, fields) for paper in items]
+        return page
+
+    def _search_papers_bulk(self, request: dict) -> dict:
+        query = request["query"]
+        papers = [paper for _, paper in self._matching_papers(query)]
+        sort = query.get("sort", "paperId:asc")
+        field, _, order = sort.partition(":")
+        if field not in ("paperId", "publicationDate", "citationCount"):
+            raise _Error(400, {"error": f"Unsupported sort field {field}"})
+        papers.sort(key=lambda paper: paper[field], reverse=order == "desc")
+        token = query.get("token")
+        try:
+            start = int(token, 16) if token else 0
+        except ValueError:
+            raise _Error(400, {"error": "Invalid token"})
+        items = papers[start : start + 1000]
+        fields = self._fields(query, ["title"])
+        result = {
+            "total": len(papers),
+            "data": [self._select_paper(paper, fields) for paper in items],
+        }
+        if start + 1000 < len(papers):
+            result["token"] = format(start + 1000, "x")
+        return result
+
+    def _match_paper(self, request: dict) -> dict:
+        terms = set(re.findall(r"\w+", request["query"].get("query", "").lower()))
+        best, best_score = None, 0.0
+        for paper in self._papers:
+            words = set(re.findall(r"\w+", paper["title"].lower()))
+            score = len(terms & words) / len(terms | words) if terms else 0.0
+            if score > best_score:
+                best, best_score = paper, score
+        if best is None or best_score < 0.5:
+            raise _Error(404, {"error": "Title match not found"})
+        data = self._select_paper(best, self._fields(request["query"], ["title"]))
+        data["matchScore"] = round(best_score * 100, 2)
+        return {"data": [data]}
+
+    def _autocomplete(self, request: dict) -> dict:
+        prefix = request["query"].get("query", "").lower()
+        matches = []
+        for paper in self._papers:
+            if prefix and prefix in paper["title"].lower():
+                first_author = paper["authors"][0]["name"].split()[-1]
+                matches.append(
+                    {
+                        "id": paper["paperId"],
+                        "title": paper["title"],
+                        "authorsYear": f"{first_author}, {paper['year']}",
+                    }
+                )
+                if len(matches) == 10:
+                    break
+        return {"matches": matches}
+
+    def _paper_authors(self, request: dict, paper_id: str) -> dict:
+        paper = self._paper_or_404(paper_id)
+        authors = [
+            self._authors[self._author_index[author["authorId"]]]
+            for author in paper["authors"]
+        ]
+        items, page = self._page(authors, request["query"], 100, 1000, 10000)
+        fields = self._fields(request["query"], ["name"])
+        page["data"] = [self._select_author(author, fields) for author in items]
+        return page
+
+    def _edges(self, request: dict, paper_id: str, name: str, key: str) -> dict:
+        paper = self._paper_or_404(paper_id)
+        ids = paper[name]
+        items, page = self._page(ids, request["query"], 100, 1000, 10000)
+        top, nested = self._fields(request["query"], ["title"])
+        paper_fields = (top - _EDGE_FIELDS, nested)
+        data = []
+        for other in items:
+            citing, cited = (
+                (other, paper["corpusId"])
+                if name == "_citations"
+                else (paper["corpusId"], other)
+            )
+            edge = {key: self._select_paper(self._papers[other], paper_fields)}
+            influential = cited in self._papers[citing]["_influential"]
+            if "isInfluential" in top:
+                edge["isInfluential"] = influential
+            if "contexts" in top:
+                edge["contexts"] = []
+            if "intents" in top:
+                edge["intents"] = []
+            if "contextsWithIntent" in top:
+                edge["contextsWithIntent"] = []
+            data.append(edge)
+        page["data"] = data
+        return page
+
+    def _citations(self, request: dict, paper_id: str) -> dict:
+        return self._edges(request, paper_id, "_citations", "citingPaper")
+
+    def _references(self, request: dict, paper_id: str) -> dict:
+        return self._edges(request, paper_id, "_references", "citedPaper")
+
+    def _get_author(self, request: dict, author_id: str) -> dict:
+        author = self._author_or_404(author_id)
+        return self._select_author(author, self._fields(request["query"], ["name"]))
+
+    def _get_authors(self, request: dict) -> list:
+        ids = (request["body"] or {}).get("ids") or []
+        if len(ids) > 1000:
+            raise _Error(400, {"error": "Cannot process more than 1000 IDs"})
+        fields = self._fields(request["query"], ["name"])
+        result = []
+        for author_id in ids:
+            index = self._author_index.get(author_id)
+            result.append(
+                self._select_author(self._authors[index], fields)
+                if index is not None
+                else None
+            )
+        return result
+
+    def _author_papers(self, request: dict, author_id: str) -> dict:
+        author = self._author_or_404(author_id)
+        papers = [self._papers[i] for i in author["_papers"]]
+        items, page = self._page(papers, request["query"], 100, 1000, 10000)
+        fields = self._fields(request["query"], ["title"])
+        page["data"] = [self._select_paper(paper, fields) for paper in items]
+        return page
+
+    def _search_authors(self, request: dict) -> dict:
+        terms = re.findall(r"\w+", request["query"].get("query", "").lower())
+        authors = [
+            author
+            for author in self._authors
+            if terms and all(term in author["name"].lower() for term in terms)
+        ]
+        items, page = self._page(authors, request["query"], 100, 1000, 10000)
+        fields = self._fields(request["query"], ["name"])
+        page["total"] = len(authors)
+        page["data"] = [self._select_author(author, fields) for author in items]
+        return page
+
+    def _search_snippets(self, request: dict) -> dict:
+        query = request["query"]
+        limit = int(query.get("limit", 10))
+        if not 1 <= limit <= 1000:
+            raise _Error(400, {"error": "The limit parameter must be at most 1000"})
+        scored = self._matching_papers(query)
+        scored.sort(key=lambda item: (-item[0], -item[1]["citationCount"]))
+        terms = max(1, len(re.findall(r"\w+", query.get("query", ""))))
+        data = []
+        for score, paper in scored[:limit]:
+            data.append(
+                {
+                    "paper": {
+                        "corpusId": str(paper["corpusId"]),
+                        "title": paper["title"],
+                        "authors": [author["name"] for author in paper["authors"]],
+                    },
+                    "snippet": {
+                        "text": paper["abstract"],
+                        "snippetKind": "abstract",
+                        "section": "Abstract",
+                        "snippetOffset": 0,
+                        "annotations": [],
+                    },
+                    "score": score / terms,
+                }
+            )
+        return {"data": data}
+
+    # Recommendations API
+
+    def _recommend(self, request: dict, positive: List[dict], negative: list) -> dict:
+        limit = int(request["query"].get("limit", 100))
+        if not 1 <= limit <= 500:
+            raise _Error(400, {"error": "The limit parameter must be at most 500"})
+        seeds = {paper["corpusId"] for paper in positive + negative}
+        # Papers sharing references or citations with the positive seeds.
+        scores = {}
+        for paper in positive:
+            for related in paper["_references"] + paper["_citations"]:
+                for neighbor in (
+                    self._papers[related]["_citations"]
+                    + self._papers[related]["_references"]
+                    + [related]
+                ):
+                    if neighbor not in seeds:
+                        scores[neighbor] = scores.get(neighbor, 0) + 1
+        for paper in negative:
+            for related in paper["_references"] + paper["_citations"]:
+                scores.pop(related, None)
+        ranked = sorted(scores, key=lambda corpus_id: (-scores[corpus_id], corpus_id))
+        fields = self._fields(request["query"], ["title"])
+        return {
+            "recommendedPapers": [
+                self._select_paper(self._papers[i], fields) for i in ranked[:limit]
+            ]
+        }
+
+    def _recommend_for_paper(self, request: dict, paper_id: str) -> dict:
+        return self._recommend(request, [self._paper_or_404(paper_id)], [])
+
+    def _recommend_from_lists(self, request: dict) -> dict:
+        body = request["body"] or {}
+        positive = [
+            self._paper_or_404(paper_id)
+            for paper_id in body.get("positivePaperIds") or []
+        ]
+        negative = [
+            self._paper_or_404(paper_id)
+            for paper_id in body.get("negativePaperIds") or []
+        ]
+        return self._recommend(request, positive, negative)
+
+    # Datasets API
+
+    def _release_or_404(self, release_id: str) -> str:
+        if release_id == "latest":
+            return self.releases[-1]
+        if release_id not in self.releases:
+            raise _Error(404, {"error": f"Release {release_id} not found"})
+        return release_id
+
+    def _file_url(self, request: dict, release_id: str, name: str) -> str:
+        return f"{request['base_url']}/files/{release_id}/{name}/{name}-0.jsonl.gz"
+
+    def _releases(self, request: dict) -> list:
+        return list(self.releases)
+
+    def _release(self, request: dict, release_id: str) -> dict:
+        release_id = self._release_or_404(release_id)
+        return {
+            "release_id": release_id,
+            "README": "Emulated Semantic Scholar Academic Graph Datasets",
+            "datasets": [
+                {"name": name, "description": description, "README": description}
+                for name, description in _DATASETS.items()
+            ],
+        }
+
+    def _dataset(self, request: dict, release_id: str, name: str) -> dict:
+        release_id = self._release_or_404(release_id)
+        if name not in _DATASETS:
+            raise _Error(404, {"error": f"Dataset {name} not found"})
+        return {
+            "name": name,
+            "description": _DATASETS[name],
+            "README": _DATASETS[name],
+            "files": [self._file_url(request, release_id, name)],
+        }
+
+    def _diffs(self, request: dict, start: str, end: str, name: str) -> dict:
+        start, end = self._release_or_404(start), self._release_or_404(end)
+        if name not in _DATASETS:
+            raise _Error(404, {"error": f"Dataset {name} not found"})
+        releases = self.releases[
+            self.releases.index(start) : self.releases.index(end) + 1
+        ]
+        return {
+            "dataset": name,
+            "start_release": start,
+            "end_release": end,
+            "diffs": [
+                {
+                    "from_release": from_release,
+                    "to_release": to_release,
+                    "update_files": [self._file_url(request, to_release, name)],
+                    "delete_files": [],
+                }
+                for from_release, to_release in zip(releases, releases[1:])
+            ],
+        }
+
+    def _file(self, request: dict, release_id: str, name: str, file: str) -> bytes:
+        self._release_or_404(release_id)
+        if name == "papers":
+            records = (
+                {
+                    "corpusid": paper["corpusId"],
+                    "externalids": paper["externalIds"],
+                    "url": paper["url"],
+                    "title": paper["title"],
+                    "authors": paper["authors"],
+                    "venue": paper["venue"],
+                    "year": paper["year"],
+                    "referencecount": paper["referenceCount"],
+                    "citationcount": paper["citationCount"],
+                    "influentialcitationcount": paper["influentialCitationCount"],
+                    "isopenaccess": paper["isOpenAccess"],
+                    "publicationdate": paper["publicationDate"],
+                }
+                for paper in self._papers
+            )
+        elif name == "abstracts":
+            records = (
+                {"corpusid": paper["corpusId"], "abstract": paper["abstract"]}
+                for paper in self._papers
+            )
+        elif name == "authors":
+            records = (
+                {
+                    "authorid": author["authorId"],
+                    "name": author["name"],
+                    "papercount": author["paperCount"],
+                    "citationcount": author["citationCount"],
+                    "hindex": author["hIndex"],
+                }
+                for author in self._authors
+            )
+        elif name == "citations":
+            records = (
+                {
+                    "citingcorpusid": paper["corpusId"],
+                    "citedcorpusid": reference,
+                    "isinfluential": reference in paper["_influential"],
+                    "contexts": None,
+                    "intents": None,
+                }
+                for paper in self._papers
+                for reference in paper["_references"]
+            )
+        else:
+            raise _Error(404, {"error": f"Dataset {name} not found"})
+        return gzip.compress(
+            "".join(json.dumps(record) + "\n" for record in records).encode()
+        )
+
+    # Serving
+
+    @contextlib.contextmanager
+    def serve(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Run the emulator with uvicorn in a background thread (requires
+        uvicorn).
+
+        .. code-block:: python
+
+            with ApiEmulator(rate_limit=10).serve() as api_url:
+                sch = AsyncSemanticScholar(api_url=api_url)
+
+        :param str host: (optional) address to listen on.
+        :param int port: (optional) port to listen on, by default any free
+               port.
+        :returns: base URL of the emulator, to use as ``api_url``.
+        """
+        yield from _serve(self, host, port)
+
+
+def _import_uvicorn() -> Any:
+    try:
+        import uvicorn
+    except ImportError as error:
+        raise ImportError(
+            "Serving the emulator requires uvicorn, install it with "
+            "pip install semanticscholar[emulator]."
+        ) from error
+    return uvicorn
+
+
+def _serve(app: Any, host: str, port: int):
+    uvicorn = _import_uvicorn()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Accepted connections inherit TCP_NODELAY: without it, the response body
+    # written after its headers waits for the delayed ACK of the client.
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, port))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(
+        target=server.run, kwargs={"sockets": [sock]}, daemon=True
+    )
+    thread.start()
+    try:
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("The emulator failed to start.")
+            time.sleep(0.01)
+        yield f"http://{host}:{sock.getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        thread.join()
+        sock.close()
+
+
+@contextlib.contextmanager
+def serve(app: Any, host: str = "127.0.0.1", port: int = 0):
+    """
+    Run any ASGI app with uvicorn in a background thread (requires uvicorn).
+
+    :param app: ASGI application.
+    :param str host: (optional) address to listen on.
+    :param int port: (optional) port to listen on, by default any free port.
+    :returns: base URL of the server.
+    """
+    yield from _serve(app, host, port)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Local emulator of the Semantic Scholar APIs."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--papers", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="median latency in seconds"
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, default=None, help="requests per second per key"
+    )
+    parser.add_argument("--burst", type=int, default=1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    emulator = ApiEmulator(
+        papers=args.papers,
+        seed=args.seed,
+        latency=ApiEmulator.lognormal_latency(args.latency) if args.latency else 0.0,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        error_rate=args.error_rate,
+    )
+    _import_uvicorn().run(emulator, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import asyncio
+import time
+from typing import Dict, List, Tuple, Union
+
+from semanticscholar.RateLimiter import RateLimiter
+
+
+class _Key:
+    """
+    Rate, cooldown and usage counters of one key.
+    """
+
+    def __init__(self, key: str, rate: float) -> None:
+        self.key = key
+        self.rate = rate
+        # Expected time of the next token of the key, from its last
+        # reservation. The bucket itself is kept by the rate limiter.
+        self.next_token = 0.0
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.statuses = {}
+        self.cooldowns = 0
+        self.wait_seconds = 0.0
+
+    def ready_at(self, now: float) -> float:
+        return max(now, self.next_token, self.cooldown_until)
+
+
+class ApiKeyPool:
+    """
+    Pool of API keys whose throughput is aggregated. Each key has its own
+    rate bucket, and each request attempt is sent with the key expected to
+    be ready soonest, the one with fewer requests in flight on a tie. A key
+    receiving a 429 or 403 response cools down, for the ``Retry-After``
+    delay if given, and the request is retried at once with another key.
+
+    The buckets are kept in memory, or by the
+    :class:`semanticscholar.RateLimiter.RateLimiter` of the client, if any,
+    so that processes sharing its backend share the rate of each key.
+
+    .. code-block:: python
+
+        pool = ApiKeyPool({"team-a-key": 1.0, "team-b-key": 10.0})
+        sch = AsyncSemanticScholar(api_key_pool=pool)
+        ...
+        print(pool.stats())
+    """
+
+    def __init__(
+        self,
+        keys: Union[List[str], Dict[str, float]],
+        rate: float = 1.0,
+        burst: int = 1,
+        cooldown: float = 60.0,
+    ) -> None:
+        """
+        :param keys: API keys, or API keys mapped to their rate in requests
+               per second.
+        :param float rate: (optional) requests per second of the keys given
+               without rate.
+        :param int burst: (optional) requests a key can send at once after
+               being idle.
+        :param float cooldown: (optional) seconds a key is not used after a
+               429 or 403 response without ``Retry-After``.
+        """
+        if not keys:
+            raise ValueError("The keys parameter must not be empty.")
+        rates = keys if isinstance(keys, dict) else dict.fromkeys(keys, rate)
+        if any(key_rate <= 0 for key_rate in rates.values()):
+            raise ValueError("Key rates must be positive.")
+        self._keys = [_Key(key, key_rate) for key, key_rate in rates.items()]
+        self._burst = burst
+        self._cooldown = cooldown
+        self._rate_limiter = RateLimiter(rate, burst)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def keys(self) -> List[str]:
+        """
+        :type: :class:`List` of :class:`str`
+        """
+        return [state.key for state in self._keys]
+
+    def available(self) -> bool:
+        """
+        Whether any key is not cooling down.
+
+        :rtype: :class:`bool`
+        """
+        now = time.monotonic()
+        return any(state.cooldown_until <= now for state in self._keys)
+
+    async def acquire(self, rate_limiter: RateLimiter = None) -> str:
+        """
+        Wait until a key can send a request, and take it. Every call must be
+        followed by a call to :meth:`release`.
+
+        :param rate_limiter: (optional) limiter keeping the bucket of each
+               key, at the rate and burst of the pool.
+        :type rate_limiter: :class:`semanticscholar.RateLimiter.RateLimiter`
+        :returns: API key.
+        :rtype: :class:`str`
+        """
+        return (await self.reserve(rate_limiter))[0]
+
+    async def reserve(self, rate_limiter: RateLimiter = None) -> Tuple[str, float]:
+        """
+        Same as :meth:`acquire`, also returning the seconds waited for the
+        cooldown and the rate of the key.
+
+        :param rate_limiter: (optional) limiter keeping the bucket of each
+               key, at the rate and burst of the pool.
+        :type rate_limiter: :class:`semanticscholar.RateLimiter.RateLimiter`
+        :returns: API key and seconds waited.
+        :rtype: :class:`Tuple` [:class:`str`, :class:`float`]
+        """
+        limiter = rate_limiter or self._rate_limiter
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            state = min(
+                self._keys, key=lambda state: (state.ready_at(now), state.in_flight)
+            )
+            # Only cooldowns are waited for here, the bucket of the key
+            # queues the request itself.
+            delay = state.cooldown_until - now
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+            waited += delay
+        state.in_flight += 1
+        state.next_token = now + 1 / state.rate
+        try:
+            wait = await limiter.acquire(state.key, state.rate, self._burst)
+        except BaseException:
+            state.in_flight -= 1
+            raise
+        state.next_token = max(state.next_token, now + wait + 1 / state.rate)
+        waited += wait
+        state.requests += 1
+        state.wait_seconds += waited
+        return state.key, waited
+
+    def release(self, key: str, status: int = None, retry_after: float = None) -> None:
+        """
+        Return a key after a request, cooling it down if it was refused.
+
+        :param str key: key returned by :meth:`acquire`.
+        :param int status: (optional) HTTP status, if a response was
+               received.
+        :param float retry_after: (optional) seconds to wait given by the
+               ``Retry-After`` header of the response.
+        """
+        state = next(state for state in self._keys if state.key == key)
+        state.in_flight -= 1
+        if status is None:
+            return
+        state.statuses[status] = state.statuses.get(status, 0) + 1
+        if status in (403, 429):
+            delay = self._cooldown if retry_after is None else retry_after
+            state.cooldown_until = max(state.cooldown_until, time.monotonic() + delay)
+            state.cooldowns += 1
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Usage of each key, identified by its last four characters.
+
+        :rtype: :class:`Dict` [:class:`str`, :class:`dict`]
+        """
+        now = time.monotonic()
+        return {
+            f"...{state.key[-4:]}": {
+                "rate": state.rate,
+                "requests": state.requests,
+                "in_flight": state.in_flight,
+                "statuses": dict(state.statuses),
+                "cooldowns": state.cooldowns,
+                "cooling_down": state.cooldown_until > now,
+                "wait_seconds": state.wait_seconds,
+            }
+            for state in self._keys
+        }
@@ -1,13 +1,23 @@
 import asyncio
-import json
+import contextlib
+import contextvars
 import logging
+import time
 import warnings
-from typing import List, Union
+from typing import Any, List, Union
 
 import httpx
 from tenacity import retry as rerun
 from tenacity import retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from semanticscholar.ApiKeyPool import ApiKeyPool
+from semanticscholar.CircuitBreaker import CircuitBreaker, endpoint_family
+from semanticscholar.ConcurrencyLimiter import ConcurrencyLimiter
+from semanticscholar.HedgePolicy import HedgePolicy
+from semanticscholar.Instrumentation import Instrumentation, endpoint_template
+from semanticscholar.RateLimiter import RateLimiter
+from semanticscholar.RequestLogger import RequestLogger
+from semanticscholar.Tracing import start_span
 from semanticscholar.SemanticScholarException import (
     BadQueryParametersException,
     GatewayTimeoutException,
@@ -17,16 +27,131 @@ from semanticscholar.SemanticScholarException import (
 
 logger = logging.getLogger("semanticscholar")
 
+# Attempt number and start time of the request being made in the current
+# task, set outside of the retried method.
+_attempt = contextvars.ContextVar("attempt", default=1)
+_started = contextvars.ContextVar("started", default=None)
+# Span covering the wait before the next attempt, when tracing.
+_backoff_span = contextvars.ContextVar("backoff_span", default=None)
+
+
+def _end_backoff_span() -> None:
+    span = _backoff_span.get()
+    if span is not None:
+        span.end()
+        _backoff_span.set(None)
+
+
+def _before_attempt(retry_state) -> None:
+    _attempt.set(retry_state.attempt_number)
+    _end_backoff_span()
+
+
+def _before_sleep(retry_state) -> None:
+    requester, url = retry_state.args[0], retry_state.args[1]
+    if requester.tracer is not None:
+        _backoff_span.set(
+            requester.tracer.start_span(
+                "semanticscholar.backoff",
+                attributes={
+                    "semanticscholar.attempt": retry_state.attempt_number,
+                    "semanticscholar.backoff_seconds": retry_state.next_action.sleep,
+                },
+            )
+        )
+    instrumentation = requester.instrumentation
+    if not instrumentation.active:
+        return
+    error = retry_state.outcome.exception()
+    attributes = {
+        "url": url,
+        "attempt": retry_state.attempt_number,
+        "wait": retry_state.next_action.sleep,
+        "error": error,
+    }
+    endpoint = endpoint_template(url)
+    instrumentation.emit("retry", endpoint, **attributes)
+    if isinstance(error, ConnectionRefusedError):
+        instrumentation.emit("rate_limit_wait", endpoint, **attributes)
+
+
+def _retry_after(r: httpx.Response) -> float:
+    try:
+        return float(r.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _usable(task: asyncio.Future) -> bool:
+    # A hedged request ending with an error or a 429 or 5xx response leaves
+    # the other request running.
+    if task.exception() is not None:
+        return False
+    status = task.result().status_code
+    return status != 429 and status < 500
+
 
 class ApiRequester:
-    def __init__(self, timeout, retry: bool = True) -> None:
+    def __init__(
+        self,
+        timeout,
+        retry: bool = True,
+        instrumentation: Instrumentation = None,
+        tracer: Any = None,
+        request_logger: RequestLogger = None,
+        client: httpx.AsyncClient = None,
+        concurrency_limiter: ConcurrencyLimiter = None,
+        api_key_pool: ApiKeyPool = None,
+        rate_limiter: RateLimiter = None,
+        circuit_breaker: CircuitBreaker = None,
+        hedge_policy: HedgePolicy = None,
+    ) -> None:
         """
         :param float timeout: an exception is raised
                if the server has not issued a response for timeout seconds.
         :param bool retry: enable retry mode.
+        :param instrumentation: (optional) hooks called on request events.
+        :type instrumentation: :class:`semanticscholar.Instrumentation.\
+            Instrumentation`
+        :param tracer: (optional) OpenTelemetry tracer of the request spans.
+        :type tracer: :class:`opentelemetry.trace.Tracer`
+        :param request_logger: (optional) logger of the requests.
+        :type request_logger: :class:`semanticscholar.RequestLogger.\
+            RequestLogger`
+        :param client: (optional) HTTP client shared by the requests, reusing
+               its pooled connections. By default, each request opens its
+               own client.
+        :type client: :class:`httpx.AsyncClient`
+        :param concurrency_limiter: (optional) adaptive limit of the
+               requests in flight. By default, requests are not limited.
+        :type concurrency_limiter: :class:`semanticscholar.\
+            ConcurrencyLimiter.ConcurrencyLimiter`
+        :param api_key_pool: (optional) API keys rotated between requests,
+               overriding the ``x-api-key`` header.
+        :type api_key_pool: :class:`semanticscholar.ApiKeyPool.ApiKeyPool`
+        :param rate_limiter: (optional) limit of the requests sent per
+               second with each key, possibly shared between processes. It
+               also keeps the buckets of the keys of api_key_pool, at their
+               own rates.
+        :type rate_limiter: :class:`semanticscholar.RateLimiter.RateLimiter`
+        :param circuit_breaker: (optional) circuit breaker per endpoint
+               family, failing fast while a family is failing.
+        :type circuit_breaker: :class:`semanticscholar.CircuitBreaker.\
+            CircuitBreaker`
+        :param hedge_policy: (optional) hedging of slow GET requests.
+        :type hedge_policy: :class:`semanticscholar.HedgePolicy.HedgePolicy`
         """
         self.timeout = timeout
         self.retry = retry
+        self._instrumentation = instrumentation or Instrumentation()
+        self._tracer = tracer
+        self._request_logger = request_logger or RequestLogger()
+        self._client = client
+        self._concurrency_limiter = concurrency_limiter
+        self._api_key_pool = api_key_pool
+        self._rate_limiter = rate_limiter
+        self._circuit_breaker = circuit_breaker
+        self._hedge_policy = hedge_policy
 
     @property
     def timeout(self) -> int:
@@ -56,22 +181,131 @@ class ApiRequester:
         """
         self._retry = retry
 
-    def _curl_cmd(
-        self,
-        url: str,
-        parameters: str,
-        method: str,
-        headers: dict,
-        payload: dict = None,
-    ) -> str:
-        curl_cmd = f"curl -X {method}"
-        if headers:
-            for key, value in headers.items():
-                curl_cmd += f" -H '{key}: {value}'"
-        curl_cmd += f" -d '{json.dumps(payload)}'" if payload else ""
-        curl_cmd += f" {url}"
-        curl_cmd += f"?{parameters}" if parameters else ""
-        return curl_cmd
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """
+        :type: :class:`semanticscholar.Instrumentation.Instrumentation`
+        """
+        return self._instrumentation
+
+    @property
+    def tracer(self) -> Any:
+        """
+        OpenTelemetry tracer, or None to disable tracing.
+
+        :type: :class:`opentelemetry.trace.Tracer`
+        """
+        return self._tracer
+
+    @tracer.setter
+    def tracer(self, tracer: Any) -> None:
+        """
+        :param tracer:
+        """
+        self._tracer = tracer
+
+    @property
+    def request_logger(self) -> RequestLogger:
+        """
+        :type: :class:`semanticscholar.RequestLogger.RequestLogger`
+        """
+        return self._request_logger
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        HTTP client shared by the requests, or None to open one per request.
+
+        :type: :class:`httpx.AsyncClient`
+        """
+        return self._client
+
+    @client.setter
+    def client(self, client: httpx.AsyncClient) -> None:
+        """
+        :param client:
+        """
+        self._client = client
+
+    @property
+    def concurrency_limiter(self) -> ConcurrencyLimiter:
+        """
+        Adaptive limit of the requests in flight, or None not to limit them.
+
+        :type: :class:`semanticscholar.ConcurrencyLimiter.ConcurrencyLimiter`
+        """
+        return self._concurrency_limiter
+
+    @concurrency_limiter.setter
+    def concurrency_limiter(self, concurrency_limiter: ConcurrencyLimiter) -> None:
+        """
+        :param concurrency_limiter:
+        """
+        self._concurrency_limiter = concurrency_limiter
+
+    @property
+    def api_key_pool(self) -> ApiKeyPool:
+        """
+        API keys rotated between requests, or None to send the given headers.
+
+        :type: :class:`semanticscholar.ApiKeyPool.ApiKeyPool`
+        """
+        return self._api_key_pool
+
+    @api_key_pool.setter
+    def api_key_pool(self, api_key_pool: ApiKeyPool) -> None:
+        """
+        :param api_key_pool:
+        """
+        self._api_key_pool = api_key_pool
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """
+        Limit of the requests sent per second, or None not to limit them.
+
+        :type: :class:`semanticscholar.RateLimiter.RateLimiter`
+        """
+        return self._rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, rate_limiter: RateLimiter) -> None:
+        """
+        :param rate_limiter:
+        """
+        self._rate_limiter = rate_limiter
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """
+        Circuit breaker per endpoint family, or None to always send requests.
+
+        :type: :class:`semanticscholar.CircuitBreaker.CircuitBreaker`
+        """
+        return self._circuit_breaker
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, circuit_breaker: CircuitBreaker) -> None:
+        """
+        :param circuit_breaker:
+        """
+        self._circuit_breaker = circuit_breaker
+
+    @property
+    def hedge_policy(self) -> HedgePolicy:
+        """
+        Hedging of slow GET requests, or None to never hedge.
+
+        :type: :class:`semanticscholar.HedgePolicy.HedgePolicy`
+        """
+        return self._hedge_policy
+
+    @hedge_policy.setter
+    def hedge_policy(self, hedge_policy: HedgePolicy) -> None:
+        """
+        :param hedge_policy:
+        """
+        self._hedge_policy = hedge_policy
 
     async def get_data_async(
         self, url: str, parameters: str, headers: dict, payload: dict = None
@@ -86,16 +320,24 @@ class ApiRequester:
         :returns: data or empty :class:`dict` if not found.
         :rtype: :class:`dict` or :class:`List` of :class:`dict`
         """
-        if self.retry:
-            return await self._get_data_async(url, parameters, headers, payload)
-        return await self._get_data_async.retry_with(stop=stop_after_attempt(1))(
-            self, url, parameters, headers, payload
-        )
+        if self._instrumentation.active:
+            _started.set(time.monotonic())
+        try:
+            if self.retry:
+                return await self._get_data_async(url, parameters, headers, payload)
+            return await self._get_data_async.retry_with(stop=stop_after_attempt(1))(
+                self, url, parameters, headers, payload
+            )
+        finally:
+            if self._tracer is not None:
+                _end_backoff_span()
 
     @rerun(
         wait=wait_exponential(multiplier=1, min=1, max=60),
         retry=retry_if_exception_type(ConnectionRefusedError),
         stop=stop_after_attempt(10),
+        before=_before_attempt,
+        before_sleep=_before_sleep,
     )
     async def _get_data_async(
         self, url: str, parameters: str, headers: dict, payload: dict = None
@@ -104,24 +346,246 @@ class ApiRequester:
         parameters = parameters.lstrip("&")
         method = "POST" if payload else "GET"
 
-        full_url = f"{url}?{parameters}" if parameters else url
-        logger.debug(f"HTTP Request: {method} {full_url}")
-        logger.debug(f"Headers: {headers}")
-        logger.debug(f"Payload: {payload}")
-        logger.debug(
-            f"cURL command: {self._curl_cmd(url, parameters, method, headers, payload)}"
+        self._request_logger.log_request(method, url, parameters, headers, payload)
+
+        if self._tracer is None:
+            r = await self._send(method, url, parameters, headers, payload)
+            return self._parse_response(r)
+
+        attributes = {
+            "http.request.method": method,
+            "url.full": url,
+            "semanticscholar.endpoint": endpoint_template(url),
+            "semanticscholar.attempt": _attempt.get(),
+        }
+        if _attempt.get() > 1:
+            attributes["http.request.resend_count"] = _attempt.get() - 1
+        with start_span(
+            self._tracer, "semanticscholar.request", attributes, client=True
+        ) as span:
+            r = await self._send(method, url, parameters, headers, payload)
+            span.set_attribute("http.response.status_code", r.status_code)
+            return self._parse_response(r)
+
+    async def _send(
+        self, method: str, url: str, parameters: str, headers: dict, payload: dict
+    ) -> httpx.Response:
+        breaker = self._circuit_breaker
+        if breaker is None:
+            return await self._send_hedged(method, url, parameters, headers, payload)
+
+        family = endpoint_family(url)
+        state = breaker.state(family)
+        try:
+            probe = breaker.allow(family)
+            failed = None
+            try:
+                r = await self._send_hedged(method, url, parameters, headers, payload)
+            except (httpx.TransportError, TimeoutError):
+                failed = True
+                raise
+            except Exception:
+                failed = False
+                raise
+            else:
+                failed = r.status_code >= 500
+            finally:
+                breaker.record(family, failed, probe)
+        finally:
+            if breaker.state(family) != state:
+                self._instrumentation.emit(
+                    "circuit_state",
+                    endpoint_template(url),
+                    url=url,
+                    family=family,
+                    state=breaker.state(family),
+                )
+        return r
+
+    async def _send_hedged(
+        self, method: str, url: str, parameters: str, headers: dict, payload: dict
+    ) -> httpx.Response:
+        policy = self._hedge_policy
+        endpoint = endpoint_template(url)
+        if policy is None or method != "GET" or not policy.applies(endpoint):
+            return await self._send_keyed(method, url, parameters, headers, payload)
+
+        delay = policy.start(endpoint)
+        sent = time.monotonic()
+        if delay is None:
+            try:
+                return await self._send_keyed(method, url, parameters, headers, payload)
+            finally:
+                policy.observe(endpoint, time.monotonic() - sent)
+
+        tasks = [
+            asyncio.ensure_future(
+                self._send_keyed(method, url, parameters, headers, payload)
+            )
+        ]
+        # The latency of the first request is observed whatever its outcome,
+        # up to its cancellation if the hedge wins, so that slow and failed
+        # requests weigh on the percentile.
+        tasks[0].add_done_callback(
+            lambda _: policy.observe(endpoint, time.monotonic() - sent)
         )
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and policy.hedge():
+                self._instrumentation.emit(
+                    "hedge", endpoint, method=method, url=url, wait=delay
+                )
+                tasks.append(
+                    asyncio.ensure_future(
+                        self._send_keyed(method, url, parameters, headers, payload)
+                    )
+                )
+            # The first usable response wins, else the outcome of the first
+            # request is returned or raised.
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in tasks:
+                    if task in done and _usable(task):
+                        return task.result()
+            return tasks[0].result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _send_keyed(
+        self, method: str, url: str, parameters: str, headers: dict, payload: dict
+    ) -> httpx.Response:
+        pool = self._api_key_pool
+        if pool is None:
+            if self._rate_limiter is not None:
+                wait = await self._rate_limiter.acquire(headers.get("x-api-key"))
+                self._emit_rate_limit_wait(url, wait)
+            return await self._send_limited(method, url, parameters, headers, payload)
+
+        # A key refusing the request cools down, and the request is sent
+        # again at once with another key, if any is not cooling down. The
+        # rate limiter keeps the bucket of each key, at the rate of the pool.
+        for _ in range(len(pool)):
+            key, wait = await pool.reserve(self._rate_limiter)
+            self._emit_rate_limit_wait(url, wait)
+            try:
+                r = await self._send_limited(
+                    method, url, parameters, {**headers, "x-api-key": key}, payload
+                )
+            except BaseException:
+                pool.release(key)
+                raise
+            pool.release(key, r.status_code, _retry_after(r))
+            if r.status_code not in (403, 429) or not pool.available():
+                break
+        return r
+
+    def _emit_rate_limit_wait(self, url: str, wait: float) -> None:
+        if wait > 0:
+            self._instrumentation.emit(
+                "rate_limit_wait", endpoint_template(url), url=url, wait=wait
+            )
+
+    async def _send_limited(
+        self, method: str, url: str, parameters: str, headers: dict, payload: dict
+    ) -> httpx.Response:
+        limiter = self._concurrency_limiter
+        if limiter is None:
+            return await self._send_request(method, url, parameters, headers, payload)
 
-        async with httpx.AsyncClient() as client:
-            r = await client.request(
-                method,
-                url,
-                params=parameters,
-                timeout=self._timeout,
-                headers=headers,
-                json=payload,
+        # Time waiting for a slot counts as queued.
+        await limiter.acquire()
+        endpoint = endpoint_template(url)
+        limit = limiter.limit
+        sent = time.monotonic()
+        try:
+            r = await self._send_request(method, url, parameters, headers, payload)
+        except BaseException as error:
+            limiter.release(endpoint, time.monotonic() - sent, error=error)
+            raise
+        else:
+            limiter.release(endpoint, time.monotonic() - sent, r.status_code)
+        finally:
+            if limiter.limit != limit:
+                self._instrumentation.emit(
+                    "concurrency_limit", endpoint, limit=limiter.limit
+                )
+        return r
+
+    async def _send_request(
+        self, method: str, url: str, parameters: str, headers: dict, payload: dict
+    ) -> httpx.Response:
+        observed = self._instrumentation.active
+        timed = observed or self._request_logger.slow_threshold is not None
+        if timed:
+            attempt = _attempt.get()
+            sent = time.monotonic()
+        if observed:
+            endpoint = endpoint_template(url)
+            started = _started.get()
+            queued = sent - started if started is not None else 0.0
+            self._instrumentation.emit(
+                "request_start",
+                endpoint,
+                method=method,
+                url=url,
+                attempt=attempt,
+                queued=queued,
+            )
+
+        try:
+            async with (
+                httpx.AsyncClient()
+                if self._client is None
+                else contextlib.nullcontext(self._client)
+            ) as client:
+                r = await client.request(
+                    method,
+                    url,
+                    params=parameters,
+                    timeout=self._timeout,
+                    headers=headers,
+                    json=payload,
+                )
+        except Exception as error:
+            if observed:
+                self._instrumentation.emit(
+                    "request_end",
+                    endpoint,
+                    method=method,
+                    url=url,
+                    latency=time.monotonic() - sent,
+                    attempt=attempt,
+                    queued=queued,
+                    error=error,
+                )
+            raise
+
+        if timed:
+            latency = time.monotonic() - sent
+            self._request_logger.log_response(
+                method, url, r.status_code, latency, attempt
+            )
+        if observed:
+            self._instrumentation.emit(
+                "request_end",
+                endpoint,
+                method=method,
+                url=url,
+                status=r.status_code,
+                latency=latency,
+                bytes=len(r.content),
+                attempt=attempt,
+                queued=queued,
             )
 
+        return r
+
+    def _parse_response(self, r: httpx.Response) -> Union[dict, List[dict]]:
         data = {}
         if r.status_code == 200:
             data = r.json()
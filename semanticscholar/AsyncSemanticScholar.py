@@ -1,20 +1,36 @@
+import asyncio
 import logging
 import re
 import warnings
-from typing import List, Literal, Tuple, Union
+from datetime import date
+from typing import TYPE_CHECKING, Any, AsyncIterator, List, Literal, Tuple, Union
 
-from semanticscholar.ApiRequester import ApiRequester
 from semanticscholar.Author import Author
+from semanticscholar.Backend import Backend, BackendRequester
 from semanticscholar.BaseReference import BaseReference
 from semanticscholar.Citation import Citation
 from semanticscholar.Dataset import Dataset
 from semanticscholar.DatasetDiff import DatasetDiff
+from semanticscholar.Instrumentation import Instrumentation, endpoint_template
 from semanticscholar.PaginatedResults import PaginatedResults
 from semanticscholar.Paper import Paper
+from semanticscholar.PaperEmbeddings import PaperEmbeddings, import_numpy
 from semanticscholar.Reference import Reference
 from semanticscholar.Release import Release
 from semanticscholar.Autocomplete import Autocomplete
 from semanticscholar.SnippetSearchResult import Snippet, SnippetSearchResult
+from semanticscholar.Tracing import traced
+
+if TYPE_CHECKING:
+    import httpx
+
+    from semanticscholar.ApiKeyPool import ApiKeyPool
+    from semanticscholar.CircuitBreaker import CircuitBreaker
+    from semanticscholar.ConcurrencyLimiter import ConcurrencyLimiter
+    from semanticscholar.EmbeddingStore import EmbeddingStore
+    from semanticscholar.HedgePolicy import HedgePolicy
+    from semanticscholar.RateLimiter import RateLimiter
+    from semanticscholar.RequestLogger import RequestLogger
 
 logger = logging.getLogger("semanticscholar")
 
@@ -30,7 +46,8 @@ class AsyncSemanticScholar:
     BASE_PATH_RECOMMENDATIONS = "/recommendations/v1"
     BASE_PATH_DATASETS = "/datasets/v1"
 
-    auth_header = {}
+    # Papers per page of bulk search results.
+    _BULK_PAGE_SIZE = 1000
 
     def __init__(
         self,
@@ -39,6 +56,14 @@ class AsyncSemanticScholar:
         api_url: str = None,
         debug: bool = False,
         retry: bool = True,
+        backend: Backend = None,
+        tracer: Any = None,
+        http_client: "httpx.AsyncClient" = None,
+        concurrency_limiter: "ConcurrencyLimiter" = None,
+        api_key_pool: "ApiKeyPool" = None,
+        rate_limiter: "RateLimiter" = None,
+        circuit_breaker: "CircuitBreaker" = None,
+        hedge_policy: "HedgePolicy" = None,
     ) -> None:
         """
         :param float timeout: (optional) an exception is raised
@@ -47,6 +72,37 @@ class AsyncSemanticScholar:
         :param str api_url: (optional) custom API url.
         :param bool debug: (optional) enable debug mode.
         :param bool retry: enable retry mode.
+        :param backend: (optional) data source tried before the API, such as
+               a :class:`semanticscholar.LocalMirror.LocalMirror`.
+        :type backend: :class:`semanticscholar.Backend.Backend`
+        :param tracer: (optional) OpenTelemetry tracer, see
+               :func:`semanticscholar.Tracing.get_tracer`. Calls, pages,
+               request attempts and retry waits are traced as nested spans.
+        :type tracer: :class:`opentelemetry.trace.Tracer`
+        :param http_client: (optional) HTTP client shared by all requests,
+               keeping connections open between them. It is not closed by
+               this object. By default, each request opens a new connection.
+        :type http_client: :class:`httpx.AsyncClient`
+        :param concurrency_limiter: (optional) adaptive limit of the
+               requests in flight, applied to every request of this object,
+               e.g. batch fan-out and concurrent page fetches.
+        :type concurrency_limiter: :class:`semanticscholar.\
+            ConcurrencyLimiter.ConcurrencyLimiter`
+        :param api_key_pool: (optional) several API keys whose throughput
+               is aggregated, used instead of api_key.
+        :type api_key_pool: :class:`semanticscholar.ApiKeyPool.ApiKeyPool`
+        :param rate_limiter: (optional) limit of the requests sent per
+               second with each key, shared between processes with a file
+               or Redis backend. The keys of api_key_pool are limited to
+               their rate in the pool.
+        :type rate_limiter: :class:`semanticscholar.RateLimiter.RateLimiter`
+        :param circuit_breaker: (optional) circuit breaker per endpoint
+               family, failing fast while a family is failing.
+        :type circuit_breaker: :class:`semanticscholar.CircuitBreaker.\
+            CircuitBreaker`
+        :param hedge_policy: (optional) hedging of slow paper lookups and
+               autocomplete requests.
+        :type hedge_policy: :class:`semanticscholar.HedgePolicy.HedgePolicy`
         """
 
         if debug:
@@ -61,12 +117,29 @@ class AsyncSemanticScholar:
         else:
             self.api_url = self.DEFAULT_API_URL
 
-        if api_key:
-            self.auth_header = {"x-api-key": api_key}
+        if api_key and api_key_pool is not None:
+            raise ValueError("The api_key and api_key_pool parameters are exclusive.")
+
+        # Headers of this instance, with the key of the pool set per request.
+        self.auth_header = {"x-api-key": api_key} if api_key else {}
 
         self._timeout = timeout
         self._retry = retry
-        self._requester = ApiRequester(self._timeout, self._retry)
+        # Deferred, so that importing this module does not load httpx.
+        from semanticscholar.ApiRequester import ApiRequester
+
+        self._requester = ApiRequester(
+            self._timeout,
+            self._retry,
+            tracer=tracer,
+            client=http_client,
+            concurrency_limiter=concurrency_limiter,
+            api_key_pool=api_key_pool,
+            rate_limiter=rate_limiter,
+            circuit_breaker=circuit_breaker,
+            hedge_policy=hedge_policy,
+        )
+        self._backend = backend if backend is not None else Backend()
         self.debug = debug
 
     @property
@@ -126,6 +199,158 @@ class AsyncSemanticScholar:
         self._retry = retry
         self._requester.retry = retry
 
+    @property
+    def backend(self) -> Backend:
+        """
+        Data source tried before the API.
+
+        :type: :class:`semanticscholar.Backend.Backend`
+        """
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend: Backend) -> None:
+        """
+        :param backend:
+        """
+        self._backend = backend if backend is not None else Backend()
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """
+        Hooks called on request events, e.g. a
+        :class:`semanticscholar.Metrics.Metrics` aggregator.
+
+        :type: :class:`semanticscholar.Instrumentation.Instrumentation`
+        """
+        return self._requester.instrumentation
+
+    @property
+    def request_logger(self) -> "RequestLogger":
+        """
+        Logger of the requests, with sampling, header redaction and the
+        slow request threshold.
+
+        :type: :class:`semanticscholar.RequestLogger.RequestLogger`
+        """
+        return self._requester.request_logger
+
+    @property
+    def tracer(self) -> Any:
+        """
+        OpenTelemetry tracer, or None to disable tracing.
+
+        :type: :class:`opentelemetry.trace.Tracer`
+        """
+        return self._requester.tracer
+
+    @tracer.setter
+    def tracer(self, tracer: Any) -> None:
+        """
+        :param tracer:
+        """
+        self._requester.tracer = tracer
+
+    @property
+    def http_client(self) -> "httpx.AsyncClient":
+        """
+        HTTP client shared by all requests, or None to open a connection per
+        request.
+
+        :type: :class:`httpx.AsyncClient`
+        """
+        return self._requester.client
+
+    @http_client.setter
+    def http_client(self, http_client: "httpx.AsyncClient") -> None:
+        """
+        :param http_client:
+        """
+        self._requester.client = http_client
+
+    @property
+    def concurrency_limiter(self) -> "ConcurrencyLimiter":
+        """
+        Adaptive limit of the requests in flight, or None not to limit them.
+
+        :type: :class:`semanticscholar.ConcurrencyLimiter.ConcurrencyLimiter`
+        """
+        return self._requester.concurrency_limiter
+
+    @concurrency_limiter.setter
+    def concurrency_limiter(self, concurrency_limiter: "ConcurrencyLimiter") -> None:
+        """
+        :param concurrency_limiter:
+        """
+        self._requester.concurrency_limiter = concurrency_limiter
+
+    @property
+    def api_key_pool(self) -> "ApiKeyPool":
+        """
+        API keys rotated between requests, or None to use api_key.
+
+        :type: :class:`semanticscholar.ApiKeyPool.ApiKeyPool`
+        """
+        return self._requester.api_key_pool
+
+    @property
+    def rate_limiter(self) -> "RateLimiter":
+        """
+        Limit of the requests sent per second, or None not to limit them.
+
+        :type: :class:`semanticscholar.RateLimiter.RateLimiter`
+        """
+        return self._requester.rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, rate_limiter: "RateLimiter") -> None:
+        """
+        :param rate_limiter:
+        """
+        self._requester.rate_limiter = rate_limiter
+
+    @property
+    def circuit_breaker(self) -> "CircuitBreaker":
+        """
+        Circuit breaker per endpoint family, or None to always send requests.
+
+        :type: :class:`semanticscholar.CircuitBreaker.CircuitBreaker`
+        """
+        return self._requester.circuit_breaker
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, circuit_breaker: "CircuitBreaker") -> None:
+        """
+        :param circuit_breaker:
+        """
+        self._requester.circuit_breaker = circuit_breaker
+
+    @property
+    def hedge_policy(self) -> "HedgePolicy":
+        """
+        Hedging of slow GET requests, or None to never hedge.
+
+        :type: :class:`semanticscholar.HedgePolicy.HedgePolicy`
+        """
+        return self._requester.hedge_policy
+
+    @hedge_policy.setter
+    def hedge_policy(self, hedge_policy: "HedgePolicy") -> None:
+        """
+        :param hedge_policy:
+        """
+        self._requester.hedge_policy = hedge_policy
+
+    def _emit_backend_lookup(self, url: str, hits: int, misses: int) -> None:
+        instrumentation = self._requester.instrumentation
+        if type(self._backend) is Backend or not instrumentation.active:
+            return
+        endpoint = endpoint_template(url)
+        for kind, count in (("cache_hit", hits), ("cache_miss", misses)):
+            for _ in range(count):
+                instrumentation.emit(kind, endpoint, url=url)
+
+    @traced
     async def get_paper(self, paper_id: str, fields: list = None) -> Paper:
         """
         Paper lookup
@@ -155,6 +380,11 @@ class AsyncSemanticScholar:
         base_url = self.api_url + self.BASE_PATH_GRAPH
         url = f"{base_url}/paper/{paper_id}"
 
+        data = await self._backend.get_paper(paper_id, fields)
+        self._emit_backend_lookup(url, data is not None, data is None)
+        if data is not None:
+            return Paper(data)
+
         fields = ",".join(fields)
         parameters = f"&fields={fields}"
 
@@ -163,6 +393,7 @@ class AsyncSemanticScholar:
 
         return paper
 
+    @traced
     async def get_papers(
         self, paper_ids: List[str], fields: list = None, return_not_found: bool = False
     ) -> Union[List[Paper], Tuple[List[Paper], List[str]]]:
@@ -202,17 +433,28 @@ class AsyncSemanticScholar:
         base_url = self.api_url + self.BASE_PATH_GRAPH
         url = f"{base_url}/paper/batch"
 
-        fields = ",".join(fields)
-        parameters = f"&fields={fields}"
+        data = await self._backend.get_papers(paper_ids, fields)
+        missing_ids = [id for id, item in zip(paper_ids, data) if item is None]
+        self._emit_backend_lookup(
+            url, len(paper_ids) - len(missing_ids), len(missing_ids)
+        )
+        remote_data = []
 
-        payload = {"ids": paper_ids}
+        if missing_ids:
+            parameters = f"&fields={','.join(fields)}"
 
-        data = await self._requester.get_data_async(
-            url, parameters, self.auth_header, payload
-        )
+            payload = {"ids": missing_ids}
+
+            remote_data = await self._requester.get_data_async(
+                url, parameters, self.auth_header, payload
+            )
+
+        remote = iter(remote_data)
+        data = [item if item is not None else next(remote) for item in data]
         papers = [Paper(item) for item in data if item is not None]
 
-        not_found_ids = self._get_not_found_ids(paper_ids, papers)
+        remote_papers = [Paper(item) for item in remote_data if item is not None]
+        not_found_ids = self._get_not_found_ids(missing_ids, remote_papers)
 
         if not_found_ids:
             logger.warning(f"IDs not found: {not_found_ids}")
@@ -246,6 +488,86 @@ class AsyncSemanticScholar:
 
         return not_found_ids
 
+    @traced
+    async def get_paper_embeddings(
+        self,
+        paper_ids: List[str],
+        model: str = "specter_v2",
+        store: "EmbeddingStore" = None,
+    ) -> PaperEmbeddings:
+        """
+        Get the embeddings of multiple papers as a float32 matrix (requires
+        NumPy). Papers are requested in batches of 500, and their vectors
+        are written straight into a matrix allocated once for all of them.
+
+        :calls: `POST /graph/v1/paper/batch \
+            <https://api.semanticscholar.org/api-docs/graph#tag/Paper-Data\
+            /operation/post_graph_get_papers>`_
+
+        :param list paper_ids: list of IDs - S2PaperId, CorpusId, DOI,
+               ArXivId, MAG, ACL, PMID, PMCID, or URL.
+        :param str model: (optional) embedding model, 'specter_v1' or
+               'specter_v2'.
+        :param store: (optional) store of embeddings already fetched. Only
+               the papers missing from it are requested, and they are added
+               to it.
+        :type store: :class:`semanticscholar.EmbeddingStore.EmbeddingStore`
+        :returns: embeddings of the papers found, indexed by paperId and by
+                  the requested IDs, or only by the requested IDs when a
+                  store is given.
+        :rtype: :class:`semanticscholar.PaperEmbeddings.PaperEmbeddings`
+        """
+
+        if store is not None:
+            missing_ids = store.missing(paper_ids)
+            if missing_ids:
+                store.add_embeddings(
+                    await self.get_paper_embeddings(missing_ids, model)
+                )
+            return store.get_embeddings(paper_ids)
+
+        numpy = import_numpy()
+
+        base_url = self.api_url + self.BASE_PATH_GRAPH
+        url = f"{base_url}/paper/batch"
+        parameters = f"&fields=paperId,embedding.{model}"
+
+        matrix = None
+        found_ids = []
+        aliases = {}
+        missing_ids = []
+        for start in range(0, len(paper_ids), 500):
+            chunk = paper_ids[start : start + 500]
+            data = await self._requester.get_data_async(
+                url, parameters, self.auth_header, {"ids": chunk}
+            )
+            for paper_id, item in zip(chunk, data):
+                embedding = (item or {}).get("embedding") or {}
+                vector = embedding.get("vector")
+                if not vector:
+                    missing_ids.append(paper_id)
+                    continue
+                if item["paperId"] in aliases:
+                    aliases[paper_id] = aliases[item["paperId"]]
+                    continue
+                if matrix is None:
+                    matrix = numpy.empty((len(paper_ids), len(vector)), numpy.float32)
+                row = len(found_ids)
+                matrix[row] = vector
+                found_ids.append(item["paperId"])
+                aliases[item["paperId"]] = aliases[paper_id] = row
+
+        if missing_ids:
+            logger.warning(f"IDs without embedding: {missing_ids}")
+
+        if matrix is None:
+            matrix = numpy.empty((0, 0), numpy.float32)
+
+        return PaperEmbeddings(
+            found_ids, matrix[: len(found_ids)], model, missing_ids, aliases
+        )
+
+    @traced
     async def get_paper_authors(
         self, paper_id: str, fields: list = None, limit: int = 100
     ) -> PaginatedResults:
@@ -293,8 +615,14 @@ class AsyncSemanticScholar:
 
         return results
 
+    @traced
     async def get_paper_citations(
-        self, paper_id: str, fields: list = None, limit: int = 100
+        self,
+        paper_id: str,
+        fields: list = None,
+        limit: int = 100,
+        max_results: int = None,
+        offset: int = 0,
     ) -> PaginatedResults:
         """
         Get details about a paper's citations
@@ -315,6 +643,9 @@ class AsyncSemanticScholar:
         :param list fields: (optional) list of the fields to be returned.
         :param int limit: (optional) maximum number of results to return 
                (must be <= 1000).
+        :param int max_results: (optional) maximum number of results to
+               fetch across all pages, no page being requested past it.
+        :param int offset: (optional) position of the first result to fetch.
         """
 
         if limit < 1 or limit > 1000:
@@ -322,24 +653,50 @@ class AsyncSemanticScholar:
                 "The limit parameter must be between 1 and 1000 inclusive."
             )
 
+        if max_results is not None:
+            if max_results < 1:
+                raise ValueError("The max_results parameter must be positive.")
+            limit = min(limit, max_results)
+
+        if offset < 0:
+            raise ValueError("The offset parameter must not be negative.")
+
         if not fields:
             fields = BaseReference.FIELDS + Paper.SEARCH_FIELDS
 
         base_url = self.api_url + self.BASE_PATH_GRAPH
         url = f"{base_url}/paper/{paper_id}/citations"
 
+        requester = self._requester
+        get_page = self._backend.get_paper_citations
+        first_page = await get_page(paper_id, fields, offset, limit)
+        if first_page is not None:
+            requester = BackendRequester(
+                lambda offset, limit: get_page(paper_id, fields, offset, limit),
+                first_page,
+                offset,
+            )
+
         results = await PaginatedResults.create(
-            requester=self._requester,
+            requester=requester,
             data_type=Citation,
             url=url,
             fields=fields,
             limit=limit,
+            max_items=max_results,
+            offset=offset,
         )
 
         return results
 
+    @traced
     async def get_paper_references(
-        self, paper_id: str, fields: list = None, limit: int = 100
+        self,
+        paper_id: str,
+        fields: list = None,
+        limit: int = 100,
+        max_results: int = None,
+        offset: int = 0,
     ) -> PaginatedResults:
         """
         Get details about a paper's references
@@ -360,6 +717,9 @@ class AsyncSemanticScholar:
         :param list fields: (optional) list of the fields to be returned.
         :param int limit: (optional) maximum number of results to return 
                (must be <= 1000).
+        :param int max_results: (optional) maximum number of results to
+               fetch across all pages, no page being requested past it.
+        :param int offset: (optional) position of the first result to fetch.
         """
 
         if limit < 1 or limit > 1000:
@@ -367,22 +727,43 @@ class AsyncSemanticScholar:
                 "The limit parameter must be between 1 and 1000 inclusive."
             )
 
+        if max_results is not None:
+            if max_results < 1:
+                raise ValueError("The max_results parameter must be positive.")
+            limit = min(limit, max_results)
+
+        if offset < 0:
+            raise ValueError("The offset parameter must not be negative.")
+
         if not fields:
             fields = BaseReference.FIELDS + Paper.SEARCH_FIELDS
 
         base_url = self.api_url + self.BASE_PATH_GRAPH
         url = f"{base_url}/paper/{paper_id}/references"
 
+        requester = self._requester
+        get_page = self._backend.get_paper_references
+        first_page = await get_page(paper_id, fields, offset, limit)
+        if first_page is not None:
+            requester = BackendRequester(
+                lambda offset, limit: get_page(paper_id, fields, offset, limit),
+                first_page,
+                offset,
+            )
+
         results = await PaginatedResults.create(
-            requester=self._requester,
+            requester=requester,
             data_type=Reference,
             url=url,
             fields=fields,
             limit=limit,
+            max_items=max_results,
+            offset=offset,
         )
 
         return results
 
+    @traced
     async def search_paper(
         self,
         query: str,
@@ -398,6 +779,8 @@ class AsyncSemanticScholar:
         bulk: bool = False,
         sort: str = None,
         match_title: bool = False,
+        offset: int = 0,
+        token: str = None,
     ) -> Union[PaginatedResults, Paper]:
         """
         Search for papers by keyword. Performs a search query based on the 
@@ -442,6 +825,10 @@ class AsyncSemanticScholar:
                (ascending) or desc (descending).
         :param bool match_title: (optional) retrieve a single paper whose 
                title best matches the given query.
+        :param int offset: (optional) position of the first result to fetch
+               (only if bulk=False).
+        :param str token: (optional) continuation token of the page to start
+               from (only if bulk=True).
         :returns: query results.
         :rtype: :class:`semanticscholar.PaginatedResults.PaginatedResults` or 
             :class:`semanticscholar.Paper.Paper`
@@ -463,6 +850,13 @@ class AsyncSemanticScholar:
         elif sort:
             warnings.warn("The sort parameter is only used when bulk=True.")
 
+        if bulk and offset:
+            raise ValueError("The offset parameter is not allowed when bulk=True.")
+        if not bulk and token:
+            raise ValueError("The token parameter is only allowed when bulk=True.")
+        if offset < 0:
+            raise ValueError("The offset parameter must not be negative.")
+
         if match_title:
             url += "/match"
             if bulk:
@@ -513,10 +907,218 @@ class AsyncSemanticScholar:
             self.auth_header,
             max_results=max_results,
             token_pagination=bulk,
+            offset=offset,
+            token=token,
         )
 
         return results if not match_title else results[0]
 
+    @traced
+    async def plan_bulk_search(
+        self,
+        query: str,
+        partitions: int = 8,
+        min_year: int = 1900,
+        max_year: int = None,
+        publication_types: list = None,
+        open_access_pdf: bool = None,
+        venue: list = None,
+        fields_of_study: list = None,
+        min_citation_count: int = None,
+    ) -> List[str]:
+        """
+        Split a bulk paper search into disjoint publication year ranges of
+        about the same number of results, to be retrieved in parallel.
+
+        Ranges are halved until none holds more than its share of the
+        total, or spans a single year. Years are not split, as date ranges
+        do not match papers with a year but no publication date. Each
+        split costs one request for the total of the first half.
+
+        :param str query: plain-text search query string.
+        :param int partitions: (optional) number of ranges to aim for.
+        :param int min_year: (optional) first publication year covered.
+        :param int max_year: (optional) last publication year covered,
+               the current year by default.
+        :param list publication_types: (optional) restrict results to the
+               given publication type list.
+        :param bool open_access_pdf: (optional) restrict results to papers
+               with public PDFs.
+        :param list venue: (optional) restrict results to the given venue list.
+        :param list fields_of_study: (optional) restrict results to given
+               field-of-study list, using the s2FieldsOfStudy paper field.
+        :param int min_citation_count: (optional) restrict results to papers
+               with at least the given number of citations.
+        :returns: publication_date_or_year ranges of years, in chronological
+                  order.
+        :rtype: :class:`List` of :class:`str`
+        """
+
+        ranges = await self._plan_bulk_search(
+            query,
+            partitions,
+            min_year,
+            max_year,
+            publication_types=publication_types,
+            open_access_pdf=open_access_pdf,
+            venue=venue,
+            fields_of_study=fields_of_study,
+            fields=["paperId"],
+            min_citation_count=min_citation_count,
+        )
+        return [year_range for year_range, _ in ranges]
+
+    async def _plan_bulk_search(
+        self, query: str, partitions: int, min_year: int, max_year: int, **kwargs
+    ) -> List[tuple]:
+        # Ranges planned for plan_bulk_search, each with the first page of
+        # its results when it was counted on its own, or None.
+        if partitions < 1:
+            raise ValueError("The partitions parameter must be positive.")
+
+        if max_year is None:
+            max_year = date.today().year
+
+        async def count(start: int, end: int) -> PaginatedResults:
+            return await self.search_paper(
+                query, publication_date_or_year=f"{start}:{end}", bulk=True, **kwargs
+            )
+
+        results = await count(min_year, max_year)
+        total = results.total
+        target = max(1, -(-total // partitions))
+
+        # Ranges of (start, end, total, results), split level by level.
+        ranges, pending = [], [(min_year, max_year, total, results)]
+        while pending:
+            splits = []
+            for start, end, total, results in pending:
+                if total > target and start < end:
+                    splits.append((start, (start + end) // 2, end, total))
+                elif total:
+                    ranges.append((start, end, total, results))
+            counts = await asyncio.gather(
+                *(count(start, middle) for start, middle, _, _ in splits)
+            )
+            pending = []
+            for (start, middle, end, total), first in zip(splits, counts):
+                pending.append((start, middle, first.total, first))
+                pending.append((middle + 1, end, total - first.total, None))
+        ranges.sort(key=lambda item: item[0])
+
+        # Merge neighbouring ranges while they fit in one share.
+        merged = []
+        for start, end, total, results in ranges:
+            if merged and merged[-1][2] + total <= target:
+                merged[-1] = (merged[-1][0], end, merged[-1][2] + total, None)
+            else:
+                merged.append((start, end, total, results))
+
+        logger.debug(f"Bulk search partitions: {[item[:3] for item in merged]}")
+        return [(f"{start}:{end}", results) for start, end, _, results in merged]
+
+    async def harvest_bulk_search(
+        self,
+        query: str,
+        partitions: int = 8,
+        min_year: int = 1900,
+        max_year: int = None,
+        publication_types: list = None,
+        open_access_pdf: bool = None,
+        venue: list = None,
+        fields_of_study: list = None,
+        fields: list = None,
+        min_citation_count: int = None,
+        sort: str = None,
+    ) -> AsyncIterator[Paper]:
+        """
+        Retrieve the results of a bulk paper search concurrently, from
+        publication year ranges planned by :meth:`plan_bulk_search`. The
+        token pagination of each range is sequential, but ranges are read
+        in parallel and their papers merged into one stream, in no
+        particular order. Ranges are disjoint, so each paper is retrieved
+        once.
+
+        Papers without publication date or year are not matched by any
+        range.
+
+        :param str query: plain-text search query string.
+        :param int partitions: (optional) number of ranges read in parallel.
+        :param int min_year: (optional) first publication year covered.
+        :param int max_year: (optional) last publication year covered,
+               the current year by default.
+        :param list publication_types: (optional) restrict results to the
+               given publication type list.
+        :param bool open_access_pdf: (optional) restrict results to papers
+               with public PDFs.
+        :param list venue: (optional) restrict results to the given venue list.
+        :param list fields_of_study: (optional) restrict results to given
+               field-of-study list, using the s2FieldsOfStudy paper field.
+        :param list fields: (optional) list of the fields to be returned.
+        :param int min_citation_count: (optional) restrict results to papers
+               with at least the given number of citations.
+        :param str sort: (optional) sorts the results of each range, using
+               <field>:<order> format.
+        :returns: papers, as they are retrieved.
+        :rtype: :class:`AsyncIterator` of :class:`semanticscholar.Paper.Paper`
+        """
+
+        search = dict(
+            publication_types=publication_types,
+            open_access_pdf=open_access_pdf,
+            venue=venue,
+            fields_of_study=fields_of_study,
+            fields=fields,
+            min_citation_count=min_citation_count,
+            sort=sort,
+        )
+        # The ranges are counted with the same search, so the first page of
+        # a range counted on its own is not requested again.
+        ranges = await self._plan_bulk_search(
+            query, partitions, min_year, max_year, **search
+        )
+
+        # Papers are handed over by pages, through a bounded queue, so that
+        # ranges are not read far ahead of the consumer.
+        queue = asyncio.Queue(maxsize=len(ranges) or 1)
+
+        async def harvest(year_range: str, results: PaginatedResults) -> None:
+            try:
+                if results is None:
+                    results = await self.search_paper(
+                        query, publication_date_or_year=year_range, bulk=True, **search
+                    )
+                page = []
+                async for paper in results:
+                    page.append(paper)
+                    if len(page) == self._BULK_PAGE_SIZE:
+                        await queue.put(page)
+                        page = []
+                if page:
+                    await queue.put(page)
+            except Exception as error:
+                await queue.put(error)
+            else:
+                await queue.put(None)
+
+        tasks = [asyncio.ensure_future(harvest(*item)) for item in ranges]
+        try:
+            running = len(tasks)
+            while running:
+                page = await queue.get()
+                if page is None:
+                    running -= 1
+                    continue
+                if isinstance(page, Exception):
+                    raise page
+                for paper in page:
+                    yield paper
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @traced
     async def get_author(self, author_id: str, fields: list = None) -> Author:
         """
         Author lookup
@@ -537,6 +1139,11 @@ class AsyncSemanticScholar:
         base_url = self.api_url + self.BASE_PATH_GRAPH
         url = f"{base_url}/author/{author_id}"
 
+        data = await self._backend.get_author(author_id, fields)
+        self._emit_backend_lookup(url, data is not None, data is None)
+        if data is not None:
+            return Author(data)
+
         fields = ",".join(fields)
         parameters = f"&fields={fields}"
 
@@ -545,6 +1152,7 @@ class AsyncSemanticScholar:
 
         return author
 
+    @traced
     async def get_authors(
         self, author_ids: List[str], fields: list = None, return_not_found: bool = False
     ) -> Union[List[Author], Tuple[List[Author], List[str]]]:
@@ -593,8 +1201,14 @@ class AsyncSemanticScholar:
 
         return authors if not return_not_found else (authors, not_found_ids)
 
+    @traced
     async def get_author_papers(
-        self, author_id: str, fields: list = None, limit: int = 100
+        self,
+        author_id: str,
+        fields: list = None,
+        limit: int = 100,
+        max_results: int = None,
+        offset: int = 0,
     ) -> PaginatedResults:
         """
         Get details about a author's papers
@@ -615,6 +1229,9 @@ class AsyncSemanticScholar:
         :param list fields: (optional) list of the fields to be returned.
         :param int limit: (optional) maximum number of results to return 
                (must be <= 1000).
+        :param int max_results: (optional) maximum number of results to
+               fetch across all pages, no page being requested past it.
+        :param int offset: (optional) position of the first result to fetch.
         """
 
         if limit < 1 or limit > 1000:
@@ -622,6 +1239,14 @@ class AsyncSemanticScholar:
                 "The limit parameter must be between 1 and 1000 inclusive."
             )
 
+        if max_results is not None:
+            if max_results < 1:
+                raise ValueError("The max_results parameter must be positive.")
+            limit = min(limit, max_results)
+
+        if offset < 0:
+            raise ValueError("The offset parameter must not be negative.")
+
         if not fields:
             fields = Paper.SEARCH_FIELDS
 
@@ -634,12 +1259,20 @@ class AsyncSemanticScholar:
             url=url,
             fields=fields,
             limit=limit,
+            max_items=max_results,
+            offset=offset,
         )
 
         return results
 
+    @traced
     async def search_author(
-        self, query: str, fields: list = None, limit: int = 100
+        self,
+        query: str,
+        fields: list = None,
+        limit: int = 100,
+        max_results: int = None,
+        offset: int = 0,
     ) -> PaginatedResults:
         """
         Search for authors by name
@@ -652,6 +1285,9 @@ class AsyncSemanticScholar:
         :param list fields: (optional) list of the fields to be returned.
         :param int limit: (optional) maximum number of results to return 
                (must be <= 1000).
+        :param int max_results: (optional) maximum number of results to
+               fetch across all pages, no page being requested past it.
+        :param int offset: (optional) position of the first result to fetch.
         :returns: query results.
         :rtype: :class:`semanticscholar.PaginatedResults.PaginatedResults`
         """
@@ -661,6 +1297,14 @@ class AsyncSemanticScholar:
                 "The limit parameter must be between 1 and 1000 inclusive."
             )
 
+        if max_results is not None:
+            if max_results < 1:
+                raise ValueError("The max_results parameter must be positive.")
+            limit = min(limit, max_results)
+
+        if offset < 0:
+            raise ValueError("The offset parameter must not be negative.")
+
         if not fields:
             fields = Author.SEARCH_FIELDS
 
@@ -676,10 +1320,13 @@ class AsyncSemanticScholar:
             limit,
             self.auth_header,
             max_results=1000,
+            max_items=max_results,
+            offset=offset,
         )
 
         return results
 
+    @traced
     async def get_recommended_papers(
         self,
         paper_id: str,
@@ -734,6 +1381,7 @@ class AsyncSemanticScholar:
 
         return papers
 
+    @traced
     async def get_recommended_papers_from_lists(
         self,
         positive_paper_ids: List[str],
@@ -783,6 +1431,7 @@ class AsyncSemanticScholar:
 
         return papers
 
+    @traced
     async def search_snippet(
         self,
         query: str,
@@ -895,6 +1544,7 @@ class AsyncSemanticScholar:
 
         return [SnippetSearchResult(item) for item in items]
 
+    @traced
     async def get_autocomplete(self, query: str) -> List[Autocomplete]:
         """
         Get autocomplete suggestions for a paper query.
@@ -921,6 +1571,7 @@ class AsyncSemanticScholar:
 
         return [Autocomplete(suggestion) for suggestion in data["matches"]]
 
+    @traced
     async def get_available_releases(self) -> List[Release]:
         """
         Gets all available dataset releases.
@@ -940,6 +1591,7 @@ class AsyncSemanticScholar:
 
         return release_ids
 
+    @traced
     async def get_release(self, release_id: str) -> Release:
         """
         Get a specific release.
@@ -960,6 +1612,7 @@ class AsyncSemanticScholar:
 
         return Release(data)
 
+    @traced
     async def get_dataset_download_links(
         self, release_id: str, dataset_name: str
     ) -> Dataset:
@@ -983,6 +1636,7 @@ class AsyncSemanticScholar:
 
         return Dataset(data)
 
+    @traced
     async def get_dataset_diffs(
         self, dataset_name: str, start_release_id: str, end_release_id: str
     ) -> DatasetDiff:
@@ -0,0 +1,106 @@
+from typing import List
+
+
+class Backend:
+    """
+    Base class for alternative data sources of
+    :class:`semanticscholar.AsyncSemanticScholar.AsyncSemanticScholar`.
+
+    Every method returns data in the format of the corresponding API
+    response, or None when the backend cannot serve the request, in which
+    case the client falls back to the API. This base class serves nothing.
+    """
+
+    async def get_paper(self, paper_id: str, fields: list) -> dict:
+        """
+        :param str paper_id: paper identifier, as accepted by the API.
+        :param list fields: fields to be returned.
+        :returns: paper data, or None to fall back to the API.
+        :rtype: :class:`dict`
+        """
+        return None
+
+    async def get_papers(self, paper_ids: List[str], fields: list) -> List[dict]:
+        """
+        :param list paper_ids: paper identifiers, as accepted by the API.
+        :param list fields: fields to be returned.
+        :returns: paper data aligned with paper_ids, with None for each
+                  paper to be fetched from the API instead.
+        :rtype: :class:`List` of :class:`dict`
+        """
+        return [None] * len(paper_ids)
+
+    async def get_author(self, author_id: str, fields: list) -> dict:
+        """
+        :param str author_id: S2AuthorId.
+        :param list fields: fields to be returned.
+        :returns: author data, or None to fall back to the API.
+        :rtype: :class:`dict`
+        """
+        return None
+
+    async def get_paper_citations(
+        self, paper_id: str, fields: list, offset: int, limit: int
+    ) -> dict:
+        """
+        :param str paper_id: paper identifier, as accepted by the API.
+        :param list fields: fields to be returned.
+        :param int offset: position of the first citation of the page.
+        :param int limit: maximum number of citations in the page.
+        :returns: page of citations with ``offset``, ``next`` (when more
+                  pages follow) and ``data`` keys, or None to fall back to
+                  the API.
+        :rtype: :class:`dict`
+        """
+        return None
+
+    async def get_paper_references(
+        self, paper_id: str, fields: list, offset: int, limit: int
+    ) -> dict:
+        """
+        :param str paper_id: paper identifier, as accepted by the API.
+        :param list fields: fields to be returned.
+        :param int offset: position of the first reference of the page.
+        :param int limit: maximum number of references in the page.
+        :returns: page of references with ``offset``, ``next`` (when more
+                  pages follow) and ``data`` keys, or None to fall back to
+                  the API.
+        :rtype: :class:`dict`
+        """
+        return None
+
+
+class BackendRequester:
+    """
+    Serves the pages of a :class:`semanticscholar.PaginatedResults.\
+    PaginatedResults` from a backend method instead of the API.
+    """
+
+    # Pages read locally are not traced.
+    tracer = None
+
+    def __init__(
+        self, fetch_page, first_page: dict = None, first_offset: int = 0
+    ) -> None:
+        """
+        :param fetch_page: coroutine function taking offset and limit.
+        :param dict first_page: (optional) page at first_offset, already
+               fetched.
+        :param int first_offset: (optional) offset of the first page.
+        """
+        self._fetch_page = fetch_page
+        self._first_page = first_page
+        self._first_offset = first_offset
+
+    async def get_data_async(
+        self, url: str, parameters: str, headers: dict, payload: dict = None
+    ) -> dict:
+        params = dict(
+            item.split("=", 1) for item in parameters.split("&") if "=" in item
+        )
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        if offset == self._first_offset and self._first_page is not None:
+            page, self._first_page = self._first_page, None
+            return page
+        return await self._fetch_page(offset, limit)
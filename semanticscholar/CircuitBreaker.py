@@ -0,0 +1,158 @@
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+from semanticscholar.SemanticScholarException import CircuitOpenException
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def endpoint_family(url: str) -> str:
+    """
+    Family of the endpoint of a request URL, one of ``paper``, ``author``,
+    ``search``, ``recommendations``, ``datasets`` or ``other``. Endpoints of
+    a family are served together and degrade together.
+
+    :param str url: request URL.
+    :rtype: :class:`str`
+    """
+    segments = urlparse(url).path.strip("/").split("/")
+    if segments[0] in ("recommendations", "datasets"):
+        return segments[0]
+    if "search" in segments or "autocomplete" in segments:
+        return "search"
+    if segments[0] == "graph" and len(segments) > 2:
+        if segments[2] in ("paper", "author"):
+            return segments[2]
+    return "other"
+
+
+class _Circuit:
+    def __init__(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0.0
+        self.probes = 0
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker per endpoint family, see :func:`endpoint_family`. A
+    circuit opens after failure_threshold consecutive failures (5xx
+    responses, timeouts and connection errors), and requests to its family
+    then fail at once with
+    :class:`semanticscholar.SemanticScholarException.CircuitOpenException`.
+    After reset_timeout seconds it is half-open: up to half_open_probes
+    requests are sent as probes, and the first one to succeed closes the
+    circuit while a failure opens it again.
+
+    .. code-block:: python
+
+        sch = AsyncSemanticScholar(circuit_breaker=CircuitBreaker())
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_probes: int = 1,
+    ) -> None:
+        """
+        :param int failure_threshold: (optional) consecutive failures
+               opening a circuit.
+        :param float reset_timeout: (optional) seconds a circuit stays open
+               before probe requests are sent.
+        :param int half_open_probes: (optional) probe requests allowed in
+               flight while half-open.
+        """
+        if failure_threshold < 1 or half_open_probes < 1:
+            raise ValueError(
+                "The failure_threshold and half_open_probes parameters must "
+                "be positive."
+            )
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._half_open_probes = half_open_probes
+        self._circuits = {}
+
+    def _circuit(self, family: str) -> _Circuit:
+        circuit = self._circuits.get(family)
+        if circuit is None:
+            circuit = self._circuits[family] = _Circuit()
+        return circuit
+
+    def state(self, family: str) -> str:
+        """
+        State of the circuit of a family, ``closed``, ``open`` or
+        ``half_open``.
+
+        :param str family: endpoint family.
+        :rtype: :class:`str`
+        """
+        circuit = self._circuits.get(family)
+        if circuit is None:
+            return CLOSED
+        if (
+            circuit.state == OPEN
+            and time.monotonic() - circuit.opened >= self._reset_timeout
+        ):
+            circuit.state = HALF_OPEN
+        return circuit.state
+
+    def states(self) -> Dict[str, str]:
+        """
+        State of the circuit of every family that sent requests.
+
+        :rtype: :class:`Dict` [:class:`str`, :class:`str`]
+        """
+        return {family: self.state(family) for family in sorted(self._circuits)}
+
+    def allow(self, family: str) -> bool:
+        """
+        Let a request through, as a probe if the circuit is half-open. Every
+        request let through must be followed by a call to :meth:`record`.
+
+        :param str family: endpoint family.
+        :returns: whether the request is a probe.
+        :rtype: :class:`bool`
+        :raises: CircuitOpenException: if the circuit is open, or half-open
+                 with every probe in flight.
+        """
+        state = self.state(family)
+        if state == CLOSED:
+            return False
+        circuit = self._circuits[family]
+        if state == HALF_OPEN and circuit.probes < self._half_open_probes:
+            circuit.probes += 1
+            return True
+        retry_in = max(0.0, circuit.opened + self._reset_timeout - time.monotonic())
+        raise CircuitOpenException(
+            f"Circuit of the {family} endpoints is open, retry in {retry_in:.0f}s."
+        )
+
+    def record(self, family: str, failed: bool = None, probe: bool = False) -> None:
+        """
+        Record the outcome of a request let through.
+
+        :param str family: endpoint family.
+        :param bool failed: (optional) whether the request failed, None if
+               it was cancelled before its outcome was known.
+        :param bool probe: (optional) whether :meth:`allow` let the request
+               through as a probe.
+        """
+        circuit = self._circuit(family)
+        if probe:
+            circuit.probes -= 1
+        if failed is None:
+            return
+        if circuit.state == HALF_OPEN:
+            if failed:
+                circuit.state, circuit.opened = OPEN, time.monotonic()
+            else:
+                circuit.state, circuit.failures = CLOSED, 0
+        elif circuit.state == CLOSED:
+            circuit.failures = circuit.failures + 1 if failed else 0
+            if circuit.failures >= self._failure_threshold:
+                circuit.state, circuit.opened = OPEN, time.monotonic()
@@ -0,0 +1,258 @@
+import heapq
+import json
+import mmap
+import os
+import struct
+from typing import Iterator, List, Tuple
+
+from semanticscholar.ShardReader import ShardReader
+
+# source corpusid, target corpusid, citationid and isInfluential flag.
+_EDGE = struct.Struct("<qqqB")
+
+
+class CitationGraph:
+    """
+    Local citation adjacency built from the shards of the citations
+    dataset. Edges are kept in two memory-mapped files, one sorted by citing
+    paper and one by cited paper, so that the references or citations of a
+    paper are a contiguous range found by binary search, and any page of
+    them is read without scanning the others.
+    """
+
+    META_NAME = "graph.json"
+    CITING_NAME = "citing.bin"
+    CITED_NAME = "cited.bin"
+
+    def __init__(self, directory: str, run_size: int = 1000000) -> None:
+        """
+        :param str directory: directory holding the graph files.
+        :param int run_size: (optional) edges kept in memory before they are
+               sorted and spilled to disk while building.
+        """
+        self._directory = directory
+        self._run_size = run_size
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, self.META_NAME)
+        self._meta = {"release": None}
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as file:
+                self._meta = json.load(file)
+        self._maps = {}
+        self._open()
+
+    @property
+    def directory(self) -> str:
+        """
+        Directory holding the graph files.
+
+        :type: :class:`str`
+        """
+        return self._directory
+
+    @property
+    def release(self) -> str:
+        """
+        Release the graph was built from, or None if it was not built.
+
+        :type: :class:`str`
+        """
+        return self._meta["release"]
+
+    def __len__(self) -> int:
+        if self.CITING_NAME not in self._maps:
+            return 0
+        return len(self._maps[self.CITING_NAME][0]) // _EDGE.size
+
+    def __enter__(self) -> "CitationGraph":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the memory maps.
+        """
+        for edges, file in self._maps.values():
+            edges.close()
+            file.close()
+        self._maps = {}
+
+    def build(
+        self, paths: List[str], release_id: str, reader: ShardReader = None
+    ) -> int:
+        """
+        Build the graph from the shards of the citations dataset, replacing
+        any previous graph.
+
+        :param list paths: gzip or plain JSONL shards of the citations
+               dataset.
+        :param str release_id: release the shards belong to.
+        :param reader: (optional) reader with 'dict' output parsing the
+               shards in worker processes, by default they are parsed in the
+               calling process.
+        :type reader: :class:`semanticscholar.ShardReader.ShardReader`
+        :returns: number of edges.
+        :rtype: :class:`int`
+        """
+        if reader is None:
+            reader = ShardReader(max_workers=0)
+        self.close()
+        runs = {self.CITING_NAME: [], self.CITED_NAME: []}
+        buffer = []
+        for records in reader.iter_batches(paths):
+            for record in records:
+                citing = record.get("citingcorpusid")
+                cited = record.get("citedcorpusid")
+                if citing is None or cited is None:
+                    continue
+                buffer.append(
+                    (
+                        int(citing),
+                        int(cited),
+                        int(record.get("citationid") or 0),
+                        1 if record.get("isinfluential") else 0,
+                    )
+                )
+                if len(buffer) >= self._run_size:
+                    self._spill(buffer, runs)
+                    buffer = []
+        self._spill(buffer, runs)
+
+        for name, run_paths in runs.items():
+            path = os.path.join(self._directory, name)
+            with open(path + ".tmp", "wb") as file:
+                chunk = bytearray()
+                for edge in heapq.merge(*[self._iter_edges(p) for p in run_paths]):
+                    chunk += _EDGE.pack(*edge)
+                    if len(chunk) >= 1 << 20:
+                        file.write(chunk)
+                        chunk.clear()
+                file.write(chunk)
+            os.replace(path + ".tmp", path)
+            for run_path in run_paths:
+                os.remove(run_path)
+
+        self._meta = {"release": release_id}
+        with open(os.path.join(self._directory, self.META_NAME), "w") as file:
+            json.dump(self._meta, file)
+        self._open()
+        return len(self)
+
+    def count_references(self, corpus_id: int) -> int:
+        """
+        Number of papers cited by a paper.
+
+        :param int corpus_id: CorpusId of the citing paper.
+        :rtype: :class:`int`
+        """
+        start, end = self._range(self.CITING_NAME, int(corpus_id))
+        return end - start
+
+    def count_citations(self, corpus_id: int) -> int:
+        """
+        Number of papers citing a paper.
+
+        :param int corpus_id: CorpusId of the cited paper.
+        :rtype: :class:`int`
+        """
+        start, end = self._range(self.CITED_NAME, int(corpus_id))
+        return end - start
+
+    def references(
+        self, corpus_id: int, offset: int = 0, limit: int = None
+    ) -> List[Tuple[int, int, bool]]:
+        """
+        Papers cited by a paper.
+
+        :param int corpus_id: CorpusId of the citing paper.
+        :param int offset: (optional) position of the first edge returned.
+        :param int limit: (optional) maximum number of edges returned.
+        :returns: cited CorpusId, citationid and isInfluential of each edge.
+        :rtype: :class:`List` of :class:`Tuple`
+        """
+        return self._neighbours(self.CITING_NAME, int(corpus_id), offset, limit)
+
+    def citations(
+        self, corpus_id: int, offset: int = 0, limit: int = None
+    ) -> List[Tuple[int, int, bool]]:
+        """
+        Papers citing a paper.
+
+        :param int corpus_id: CorpusId of the cited paper.
+        :param int offset: (optional) position of the first edge returned.
+        :param int limit: (optional) maximum number of edges returned.
+        :returns: citing CorpusId, citationid and isInfluential of each edge.
+        :rtype: :class:`List` of :class:`Tuple`
+        """
+        return self._neighbours(self.CITED_NAME, int(corpus_id), offset, limit)
+
+    def _neighbours(
+        self, name: str, corpus_id: int, offset: int, limit: int
+    ) -> List[Tuple[int, int, bool]]:
+        start, end = self._range(name, corpus_id)
+        start += offset
+        if limit is not None:
+            end = min(end, start + limit)
+        edges = self._maps[name][0] if name in self._maps else None
+        result = []
+        for position in range(start, end):
+            _, target, citation_id, influential = _EDGE.unpack_from(
+                edges, position * _EDGE.size
+            )
+            result.append((target, citation_id, bool(influential)))
+        return result
+
+    def _range(self, name: str, corpus_id: int) -> Tuple[int, int]:
+        if name not in self._maps:
+            return 0, 0
+        edges = self._maps[name][0]
+        return (
+            self._bisect(edges, corpus_id),
+            self._bisect(edges, corpus_id + 1),
+        )
+
+    @staticmethod
+    def _bisect(edges: mmap.mmap, corpus_id: int) -> int:
+        low, high = 0, len(edges) // _EDGE.size
+        while low < high:
+            middle = (low + high) // 2
+            if _EDGE.unpack_from(edges, middle * _EDGE.size)[0] < corpus_id:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _spill(self, buffer: list, runs: dict) -> None:
+        if not buffer:
+            return
+        number = len(runs[self.CITING_NAME])
+        buffer.sort()
+        runs[self.CITING_NAME].append(self._write_run(buffer, f"citing-{number}"))
+        cited = [(edge[1], edge[0], edge[2], edge[3]) for edge in buffer]
+        cited.sort()
+        runs[self.CITED_NAME].append(self._write_run(cited, f"cited-{number}"))
+
+    def _write_run(self, edges: list, name: str) -> str:
+        path = os.path.join(self._directory, f"{name}.run")
+        with open(path, "wb") as file:
+            file.write(b"".join(_EDGE.pack(*edge) for edge in edges))
+        return path
+
+    @staticmethod
+    def _iter_edges(path: str) -> Iterator[tuple]:
+        with open(path, "rb") as file:
+            while True:
+                chunk = file.read(_EDGE.size * 65536)
+                if not chunk:
+                    return
+                yield from _EDGE.iter_unpack(chunk)
+
+    def _open(self) -> None:
+        for name in (self.CITING_NAME, self.CITED_NAME):
+            path = os.path.join(self._directory, name)
+            if os.path.exists(path) and os.path.getsize(path):
+                file = open(path, "rb")
+                edges = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[name] = (edges, file)
@@ -0,0 +1,174 @@
+import asyncio
+import collections
+import math
+import time
+
+import httpx
+
+
+class ConcurrencyLimiter:
+    """
+    Adaptive limit of the requests in flight, adjusted by additive increase
+    and multiplicative decrease (AIMD). The limit grows by one for each
+    limit's worth of healthy responses, and is cut by the decrease factor on
+    429 and 504 responses, timeouts, or when the smoothed latency of an
+    endpoint rises above latency_tolerance times its baseline. It is cut at
+    most once per round trip, so that a burst of errors from requests sent
+    together counts once.
+
+    Requests over the limit wait for a slot, in arrival order. Pass an
+    instance to a client to limit every request it sends, including batch
+    fan-out, page fetches and crawls:
+
+    .. code-block:: python
+
+        sch = AsyncSemanticScholar(concurrency_limiter=ConcurrencyLimiter())
+    """
+
+    # Weight of the last response in the smoothed latency, and rate at which
+    # the baseline follows it up.
+    _SMOOTHING = 0.2
+    _BASELINE_DRIFT = 0.01
+    # Responses of an endpoint needed before its latency is judged.
+    _MIN_SAMPLES = 5
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        """
+        :param int initial: (optional) initial limit.
+        :param int min_limit: (optional) lowest limit.
+        :param int max_limit: (optional) highest limit.
+        :param float decrease: (optional) factor applied to the limit on
+               congestion.
+        :param float latency_tolerance: (optional) ratio of the smoothed
+               latency of an endpoint to its baseline above which the limit
+               is decreased, or None to ignore latency.
+        """
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError(
+                "The limits must satisfy 1 <= min_limit <= initial <= max_limit."
+            )
+        if not 0 < decrease < 1:
+            raise ValueError("The decrease parameter must be between 0 and 1.")
+        self._limit = float(initial)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._decrease = decrease
+        self._latency_tolerance = latency_tolerance
+        self._in_flight = 0
+        self._waiters = collections.deque()
+        # Baseline and smoothed latency, and sample count, per endpoint.
+        self._latencies = {}
+        self._last_decrease = -math.inf
+
+    @property
+    def limit(self) -> int:
+        """
+        Current number of requests allowed in flight.
+
+        :type: :class:`int`
+        """
+        return max(self._min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Number of requests holding a slot.
+
+        :type: :class:`int`
+        """
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        """
+        Number of requests waiting for a slot.
+
+        :type: :class:`int`
+        """
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot. Every call must be followed by a call to
+        :meth:`release`.
+        """
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over before the cancellation.
+                self._in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(
+        self,
+        endpoint: str,
+        latency: float = None,
+        status: int = None,
+        error: Exception = None,
+    ) -> None:
+        """
+        Free a slot and adjust the limit to the outcome of the request.
+
+        :param str endpoint: endpoint template of the request.
+        :param float latency: (optional) seconds from sending the request to
+               receiving the response.
+        :param int status: (optional) HTTP status, if a response was
+               received.
+        :param Exception error: (optional) exception raised by the request.
+        """
+        self._in_flight -= 1
+        congested = status in (429, 504) or isinstance(
+            error, (TimeoutError, httpx.TimeoutException)
+        )
+        if status is not None and status < 500 and not congested:
+            if latency is not None and self._latency_rising(endpoint, latency):
+                congested = True
+            else:
+                self._limit = min(self._max_limit, self._limit + 1 / self.limit)
+        if congested:
+            now = time.monotonic()
+            if now - self._last_decrease >= (latency or 0):
+                self._last_decrease = now
+                self._limit = max(self._min_limit, self._limit * self._decrease)
+        self._wake()
+
+    def _latency_rising(self, endpoint: str, latency: float) -> bool:
+        if self._latency_tolerance is None:
+            return False
+        state = self._latencies.get(endpoint)
+        if state is None:
+            self._latencies[endpoint] = [latency, latency, 1]
+            return False
+        baseline, smoothed, samples = state
+        smoothed += (latency - smoothed) * self._SMOOTHING
+        baseline = min(
+            smoothed, baseline + (smoothed - baseline) * self._BASELINE_DRIFT
+        )
+        state[:] = [baseline, smoothed, samples + 1]
+        return (
+            samples + 1 >= self._MIN_SAMPLES
+            and smoothed > baseline * self._latency_tolerance
+        )
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
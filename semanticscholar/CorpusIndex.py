@@ -0,0 +1,457 @@
+import heapq
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+from typing import Any, Iterable, Iterator, List
+
+from semanticscholar.DatasetStore import KEY_FIELDS
+from semanticscholar.ShardReader import ShardReader
+
+# key, shard number, byte offset and byte length of a record.
+_ENTRY = struct.Struct("<qIQI")
+
+
+class CorpusIndex:
+    """
+    Sorted, memory-mapped offset index over the JSONL shards of a dataset,
+    mapping the integer key of every record (corpusid, authorid) to the
+    shard, byte offset and length of its line, so that a record can be read
+    without scanning the shards.
+
+    gzip streams cannot be read at arbitrary offsets, so gzip shards are
+    decompressed once into the data directory of the index. The index
+    implements the same ``upsert``/``delete``/``commit`` interface as
+    :class:`semanticscholar.DatasetStore.DatasetStore`, so it can be kept
+    up to date by :class:`semanticscholar.DatasetUpdater.DatasetUpdater`.
+    """
+
+    INDEX_NAME = "index.bin"
+    META_NAME = "meta.json"
+
+    def __init__(
+        self,
+        directory: str,
+        dataset_name: str,
+        key_field: str = None,
+        run_size: int = 1000000,
+    ) -> None:
+        """
+        :param str directory: directory holding the index files.
+        :param str dataset_name: name of the indexed dataset.
+        :param str key_field: (optional) integer field used as key of the
+               records, defaults to the documented key of the dataset.
+        :param int run_size: (optional) entries kept in memory before they
+               are sorted and spilled to disk while indexing.
+        """
+        if not key_field:
+            if dataset_name not in KEY_FIELDS:
+                raise ValueError(
+                    f"Unknown key field for dataset {dataset_name}, "
+                    "use the key_field parameter."
+                )
+            key_field = KEY_FIELDS[dataset_name]
+        self._directory = directory
+        self._dataset_name = dataset_name
+        self._key_field = key_field
+        self._run_size = run_size
+        self._key_pattern = re.compile(
+            rb'"' + re.escape(key_field.encode()) + rb'"\s*:\s*"?(-?\d+)'
+        )
+
+        os.makedirs(os.path.join(directory, "data"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "runs"), exist_ok=True)
+
+        meta_path = os.path.join(directory, self.META_NAME)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as file:
+                meta = json.load(file)
+            if meta["dataset"] != dataset_name:
+                raise ValueError(
+                    f"The index at {directory} holds the {meta['dataset']} dataset."
+                )
+        else:
+            meta = {"dataset": dataset_name, "release": None, "shards": []}
+        self._meta = meta
+
+        self._index = None
+        self._index_file = None
+        self._data = {}
+        self._reset_pending()
+        self._open_index()
+
+    @property
+    def directory(self) -> str:
+        """
+        Directory holding the index files.
+
+        :type: :class:`str`
+        """
+        return self._directory
+
+    @property
+    def dataset_name(self) -> str:
+        """
+        Name of the indexed dataset.
+
+        :type: :class:`str`
+        """
+        return self._dataset_name
+
+    @property
+    def key_field(self) -> str:
+        """
+        Field used as key of the records.
+
+        :type: :class:`str`
+        """
+        return self._key_field
+
+    @property
+    def release(self) -> str:
+        """
+        Release currently indexed, or None if nothing was indexed.
+
+        :type: :class:`str`
+        """
+        return self._meta["release"]
+
+    @property
+    def shards(self) -> List[str]:
+        """
+        Data files referenced by the index.
+
+        :type: :class:`List` of :class:`str`
+        """
+        return list(self._meta["shards"])
+
+    def __len__(self) -> int:
+        return len(self._index) // _ENTRY.size if self._index else 0
+
+    def __contains__(self, key: Any) -> bool:
+        return self._find(int(key)) is not None
+
+    def __enter__(self) -> "CorpusIndex":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the memory maps and discard pending changes.
+        """
+        self.rollback()
+        self._close_maps()
+
+    def get(self, key: Any) -> dict:
+        """
+        Get a record by its key.
+
+        :param key: value of the key field.
+        :returns: the record, or None if not found.
+        :rtype: :class:`dict`
+        """
+        line = self.get_raw(key)
+        return json.loads(line) if line is not None else None
+
+    def get_raw(self, key: Any) -> bytes:
+        """
+        Get the JSON line of a record by its key, without parsing it.
+
+        :param key: value of the key field.
+        :returns: the line, or None if not found.
+        :rtype: :class:`bytes`
+        """
+        entry = self._find(int(key))
+        if entry is None:
+            return None
+        _, shard, offset, length = entry
+        data = self._data_map(shard)
+        return data[offset : offset + length]
+
+    def get_many(self, keys: List[Any]) -> List[dict]:
+        """
+        Get several records by their keys.
+
+        :param list keys: values of the key field.
+        :returns: records found, in the order of the given keys.
+        :rtype: :class:`List` of :class:`dict`
+        """
+        records = [self.get(key) for key in keys]
+        return [record for record in records if record is not None]
+
+    def build(self, paths: List[str], release_id: str) -> int:
+        """
+        Replace the index with one over the given shards of a full release,
+        e.g. the files fetched by
+        :class:`semanticscholar.DatasetDownloader.DatasetDownloader`.
+
+        :param list paths: gzip or plain JSONL shard files.
+        :param str release_id: release the shards belong to.
+        :returns: number of records indexed.
+        :rtype: :class:`int`
+        """
+        self.rollback()
+        self._close_maps()
+        shutil.rmtree(os.path.join(self._directory, "data"))
+        os.makedirs(os.path.join(self._directory, "data"))
+        index_path = os.path.join(self._directory, self.INDEX_NAME)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        self._meta["shards"] = []
+
+        for path in paths:
+            self.add_shard(path)
+        self.commit(release_id)
+        return len(self)
+
+    def add_shard(self, path: str) -> None:
+        """
+        Index every record of a shard. Records replace those with the same
+        key already indexed once :meth:`commit` is called.
+
+        :param str path: gzip or plain JSONL shard file.
+        """
+        with open(path, "rb") as file:
+            compressed = file.read(2) == b"\x1f\x8b"
+        if compressed:
+            name = os.path.basename(path)
+            name = name[:-3] if name.endswith(".gz") else name
+            data_path = self._new_data_path(name)
+            self._decompress(path, data_path)
+        else:
+            data_path = os.path.abspath(path)
+        shard = self._register_shard(data_path)
+
+        offset = 0
+        with open(data_path, "rb") as file:
+            for line in file:
+                length = len(line.rstrip(b"\r\n"))
+                if length:
+                    self._add_entry(self._parse_key(line), shard, offset, length)
+                offset += len(line)
+
+    def upsert(self, records: Iterable[dict], batch_size: int = None) -> int:
+        """
+        Insert or replace records. They are appended to a new data file and
+        become visible after :meth:`commit`.
+
+        :param records: records to insert or replace.
+        :param int batch_size: (optional) unused, accepted for compatibility
+               with :meth:`semanticscholar.DatasetStore.DatasetStore.upsert`.
+        :returns: number of records written.
+        :rtype: :class:`int`
+        """
+        if self._pending_file is None:
+            data_path = self._new_data_path("update.jsonl")
+            self._pending_file = open(data_path, "wb")
+            self._pending_shard = self._register_shard(data_path)
+        count = 0
+        for record in records:
+            line = json.dumps(record).encode()
+            offset = self._pending_file.tell()
+            self._pending_file.write(line + b"\n")
+            self._add_entry(
+                int(record[self._key_field]), self._pending_shard, offset, len(line)
+            )
+            count += 1
+        return count
+
+    def delete(self, records: Iterable[Any], batch_size: int = None) -> int:
+        """
+        Delete records. Items may be records or bare keys. Deletions become
+        visible after :meth:`commit`.
+
+        :param records: records or keys to delete.
+        :param int batch_size: (optional) unused, accepted for compatibility
+               with :meth:`semanticscholar.DatasetStore.DatasetStore.delete`.
+        :returns: number of delete operations recorded.
+        :rtype: :class:`int`
+        """
+        # Deletes apply to everything indexed before them, so pending entries
+        # are spilled first to keep track of what came before.
+        self._spill()
+        generation = len(self._runs)
+        count = 0
+        for item in records:
+            key = item[self._key_field] if isinstance(item, dict) else item
+            self._deletes[int(key)] = generation
+            count += 1
+        return count
+
+    def commit(self, release_id: str = None) -> None:
+        """
+        Merge pending changes into the index, optionally recording the
+        release they bring the index to.
+
+        :param str release_id: (optional) release now indexed.
+        """
+        self._spill()
+        if self._pending_file is not None:
+            self._pending_file.close()
+            self._pending_file = None
+
+        index_path = os.path.join(self._directory, self.INDEX_NAME)
+        tmp_path = index_path + ".tmp"
+        sources = [self._iter_entries(index_path)] if self._index else []
+        sources += [self._iter_entries(path) for path in self._runs]
+        with open(tmp_path, "wb") as file:
+            buffer = bytearray()
+            for entry in self._merge(sources):
+                buffer += _ENTRY.pack(*entry)
+                if len(buffer) >= 1 << 20:
+                    file.write(buffer)
+                    buffer.clear()
+            file.write(buffer)
+
+        self._close_maps()
+        os.replace(tmp_path, index_path)
+        for path in self._runs:
+            os.remove(path)
+        if release_id:
+            self._meta["release"] = release_id
+        self._meta["shards"] = self._meta["shards"] + self._new_shards
+        self._save_meta()
+        self._reset_pending()
+        self._open_index()
+
+    def rollback(self) -> None:
+        """
+        Discard pending changes.
+        """
+        if self._pending_file is not None:
+            self._pending_file.close()
+        for path in self._runs:
+            os.remove(path)
+        for path in self._new_shards:
+            if path.startswith(os.path.abspath(self._directory)):
+                os.remove(path)
+        self._reset_pending()
+
+    def _reset_pending(self) -> None:
+        self._buffer = []
+        self._runs = []
+        self._deletes = {}
+        self._new_shards = []
+        self._pending_file = None
+        self._pending_shard = None
+
+    def _register_shard(self, data_path: str) -> int:
+        self._new_shards.append(data_path)
+        return len(self._meta["shards"]) + len(self._new_shards) - 1
+
+    def _new_data_path(self, name: str) -> str:
+        number = len(self._meta["shards"]) + len(self._new_shards)
+        return os.path.abspath(
+            os.path.join(self._directory, "data", f"{number:06d}-{name}")
+        )
+
+    def _parse_key(self, line: bytes) -> int:
+        match = self._key_pattern.search(line)
+        if match:
+            return int(match.group(1))
+        return int(json.loads(line)[self._key_field])
+
+    def _add_entry(self, key: int, shard: int, offset: int, length: int) -> None:
+        self._buffer.append((key, shard, offset, length))
+        if len(self._buffer) >= self._run_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        if not self._buffer:
+            return
+        # Stable sort keeps the latest entry of a key last.
+        self._buffer.sort(key=lambda entry: entry[0])
+        path = os.path.join(self._directory, "runs", f"{len(self._runs):06d}.bin")
+        with open(path, "wb") as file:
+            for entry, following in zip(self._buffer, self._buffer[1:] + [None]):
+                if following is None or following[0] != entry[0]:
+                    file.write(_ENTRY.pack(*entry))
+        self._runs.append(path)
+        self._buffer = []
+
+    def _merge(self, sources: List[Iterator[tuple]]) -> Iterator[tuple]:
+        # Sources are ordered from oldest to newest; the base index is
+        # generation -1 when present.
+        first_generation = -1 if self._index else 0
+        tagged = [
+            self._tag(source, generation)
+            for generation, source in enumerate(sources, start=first_generation)
+        ]
+        previous = None
+        for key, negative_generation, entry in heapq.merge(*tagged):
+            if key == previous:
+                continue
+            previous = key
+            if key in self._deletes and -negative_generation < self._deletes[key]:
+                continue
+            yield entry
+
+    @staticmethod
+    def _tag(source: Iterator[tuple], generation: int) -> Iterator[tuple]:
+        for entry in source:
+            yield entry[0], -generation, entry
+
+    @staticmethod
+    def _iter_entries(path: str) -> Iterator[tuple]:
+        with open(path, "rb") as file:
+            while True:
+                chunk = file.read(_ENTRY.size * 65536)
+                if not chunk:
+                    return
+                yield from _ENTRY.iter_unpack(chunk)
+
+    def _find(self, key: int) -> tuple:
+        if not self._index:
+            return None
+        low, high = 0, len(self._index) // _ENTRY.size
+        while low < high:
+            middle = (low + high) // 2
+            if _ENTRY.unpack_from(self._index, middle * _ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low * _ENTRY.size < len(self._index):
+            entry = _ENTRY.unpack_from(self._index, low * _ENTRY.size)
+            if entry[0] == key:
+                return entry
+        return None
+
+    def _data_map(self, shard: int) -> mmap.mmap:
+        if shard not in self._data:
+            with open(self._meta["shards"][shard], "rb") as file:
+                self._data[shard] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._data[shard]
+
+    def _open_index(self) -> None:
+        index_path = os.path.join(self._directory, self.INDEX_NAME)
+        if os.path.exists(index_path) and os.path.getsize(index_path):
+            self._index_file = open(index_path, "rb")
+            self._index = mmap.mmap(
+                self._index_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+
+    def _close_maps(self) -> None:
+        for data in self._data.values():
+            data.close()
+        self._data = {}
+        if self._index is not None:
+            self._index.close()
+            self._index_file.close()
+        self._index = None
+        self._index_file = None
+
+    def _save_meta(self) -> None:
+        path = os.path.join(self._directory, self.META_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(self._meta, file, indent=2)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _decompress(source: str, destination: str) -> None:
+        with open(destination, "wb") as output:
+            for data in ShardReader.read_data(source):
+                output.write(data)
@@ -0,0 +1,343 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import List
+from urllib.parse import urlparse
+
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception_type
+from tenacity import stop_after_attempt, wait_exponential
+
+from semanticscholar.Dataset import Dataset
+from semanticscholar.SemanticScholarException import (
+    DownloadVerificationException,
+    ServerErrorException,
+)
+
+logger = logging.getLogger("semanticscholar")
+
+
+class _BandwidthLimiter:
+    """
+    Token bucket shared by every transfer of a downloader, so the configured
+    limit applies to the aggregate throughput rather than to each file.
+    """
+
+    def __init__(self, bytes_per_second: int) -> None:
+        self._rate = bytes_per_second
+        self._tokens = bytes_per_second
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, amount: int) -> None:
+        # The wait is reserved under the lock and slept outside of it, so
+        # that transfers wait for their own turn concurrently.
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._rate, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / self._rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class DatasetDownloader:
+    """
+    Downloads the files of a :class:`semanticscholar.Dataset.Dataset`
+    concurrently, resuming partial files with HTTP range requests.
+
+    Files are stored as ``<directory>/<release_id>/<dataset>/<file>`` and the
+    state of every file is kept in ``<directory>/<release_id>/manifest.json``,
+    so shards already complete on disk are skipped on the next run.
+    """
+
+    MANIFEST_NAME = "manifest.json"
+    PARTIAL_SUFFIX = ".part"
+
+    def __init__(
+        self,
+        directory: str,
+        max_concurrency: int = 4,
+        bandwidth_limit: int = None,
+        verify: bool = True,
+        timeout: float = 60,
+        retries: int = 5,
+        chunk_size: int = 1024 * 1024,
+    ) -> None:
+        """
+        :param str directory: root directory for downloaded releases.
+        :param int max_concurrency: (optional) maximum number of files
+               transferred at the same time.
+        :param int bandwidth_limit: (optional) maximum aggregate throughput
+               in bytes per second.
+        :param bool verify: (optional) check the size of every file and,
+               when the server sends an MD5 ETag, its checksum.
+        :param float timeout: (optional) an exception is raised if the
+               server has not sent data for timeout seconds.
+        :param int retries: (optional) attempts per file before giving up.
+        :param int chunk_size: (optional) size of the chunks written to disk.
+        """
+        if max_concurrency < 1:
+            raise ValueError("The max_concurrency parameter must be at least 1.")
+        self._directory = directory
+        self._max_concurrency = max_concurrency
+        self._bandwidth_limit = bandwidth_limit
+        self._verify = verify
+        self._timeout = timeout
+        self._retries = retries
+        self._chunk_size = chunk_size
+
+    @property
+    def directory(self) -> str:
+        """
+        Root directory for downloaded releases.
+
+        :type: :class:`str`
+        """
+        return self._directory
+
+    def release_directory(self, release_id: str) -> str:
+        """
+        Directory holding the datasets and manifest of a release.
+
+        :param str release_id: release identifier (e.g., '2023-12-01').
+        :rtype: :class:`str`
+        """
+        return os.path.join(self._directory, release_id)
+
+    def manifest_path(self, release_id: str) -> str:
+        """
+        Path of the manifest of a release.
+
+        :param str release_id: release identifier (e.g., '2023-12-01').
+        :rtype: :class:`str`
+        """
+        return os.path.join(self.release_directory(release_id), self.MANIFEST_NAME)
+
+    def load_manifest(self, release_id: str) -> dict:
+        """
+        Read the manifest of a release.
+
+        :param str release_id: release identifier (e.g., '2023-12-01').
+        :returns: manifest data, with one entry per dataset file.
+        :rtype: :class:`dict`
+        """
+        path = self.manifest_path(release_id)
+        if not os.path.exists(path):
+            return {"release_id": release_id, "datasets": {}}
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+
+    def _save_manifest(self, release_id: str, manifest: dict) -> None:
+        path = self.manifest_path(release_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def file_name(url: str) -> str:
+        """
+        Local file name of a dataset file, without the signature query string.
+
+        :param str url: dataset file URL.
+        :rtype: :class:`str`
+        """
+        return os.path.basename(urlparse(url).path)
+
+    async def download(self, dataset: Dataset, release_id: str) -> List[str]:
+        """
+        Download all files of a dataset.
+
+        :param dataset: dataset returned by
+               :meth:`semanticscholar.AsyncSemanticScholar.AsyncSemanticScholar.get_dataset_download_links`.
+        :type dataset: :class:`semanticscholar.Dataset.Dataset`
+        :param str release_id: release the dataset belongs to.
+        :returns: local paths of the downloaded files, in the same order as
+                  :attr:`semanticscholar.Dataset.Dataset.files`.
+        :rtype: :class:`List` of :class:`str`
+        :raises: DownloadVerificationException: if a downloaded file does not
+                 match its expected size or checksum after every attempt.
+        """
+        if not dataset.files:
+            raise ValueError(
+                "The dataset has no files, use get_dataset_download_links() "
+                "to retrieve them."
+            )
+
+        dataset_directory = os.path.join(
+            self.release_directory(release_id), dataset.name
+        )
+        os.makedirs(dataset_directory, exist_ok=True)
+
+        manifest = self.load_manifest(release_id)
+        entries = manifest["datasets"].setdefault(dataset.name, {})
+        manifest_lock = asyncio.Lock()
+
+        async def save_manifest() -> None:
+            async with manifest_lock:
+                self._save_manifest(release_id, manifest)
+
+        limiter = None
+        if self._bandwidth_limit:
+            limiter = _BandwidthLimiter(self._bandwidth_limit)
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        limits = httpx.Limits(max_connections=self._max_concurrency)
+
+        async with httpx.AsyncClient(
+            limits=limits, timeout=self._timeout, follow_redirects=True
+        ) as client:
+
+            async def fetch(url: str) -> str:
+                name = self.file_name(url)
+                entry = entries.setdefault(name, {})
+                path = os.path.join(dataset_directory, name)
+                async with semaphore:
+                    if self._is_complete(path, entry):
+                        logger.debug("Skipping complete file %s", path)
+                        return path
+                    entry["complete"] = False
+                    async for attempt in AsyncRetrying(
+                        wait=wait_exponential(multiplier=1, min=1, max=60),
+                        # A file failing verification is discarded, and
+                        # downloaded again from the start.
+                        retry=retry_if_exception_type(
+                            (
+                                httpx.TransportError,
+                                ServerErrorException,
+                                DownloadVerificationException,
+                            )
+                        ),
+                        stop=stop_after_attempt(self._retries),
+                        reraise=True,
+                    ):
+                        with attempt:
+                            await self._fetch_file(
+                                client, url, path, entry, save_manifest, limiter
+                            )
+                    await save_manifest()
+                return path
+
+            # When a file fails, the other transfers are cancelled before the
+            # client is closed, so that none keeps writing in the background.
+            tasks = [asyncio.ensure_future(fetch(url)) for url in dataset.files]
+            try:
+                paths = await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        return list(paths)
+
+    def _is_complete(self, path: str, entry: dict) -> bool:
+        return (
+            entry.get("complete", False)
+            and os.path.exists(path)
+            and os.path.getsize(path) == entry.get("size")
+        )
+
+    async def _fetch_file(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        path: str,
+        entry: dict,
+        save_manifest,
+        limiter: _BandwidthLimiter,
+    ) -> None:
+        partial_path = path + self.PARTIAL_SUFFIX
+        offset = 0
+        if await asyncio.to_thread(os.path.exists, partial_path):
+            offset = await asyncio.to_thread(os.path.getsize, partial_path)
+
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if entry.get("etag"):
+                headers["If-Range"] = entry["etag"]
+
+        async with client.stream("GET", url, headers=headers) as r:
+            if r.status_code == 416:
+                # The partial file already holds every byte of the resource.
+                await asyncio.to_thread(self._finish, path, partial_path, entry)
+                return
+            if r.status_code >= 500:
+                raise ServerErrorException(f"HTTP status {r.status_code}.")
+            r.raise_for_status()
+
+            if r.status_code == 206:
+                start, size = self._parse_content_range(r.headers)
+                if start != offset:
+                    await asyncio.to_thread(os.remove, partial_path)
+                    raise DownloadVerificationException(
+                        f"Server resumed {url} at byte {start} instead of {offset}."
+                    )
+                mode = "ab"
+            else:
+                offset = 0
+                size = r.headers.get("content-length")
+                size = int(size) if size is not None else None
+                mode = "wb"
+
+            etag = r.headers.get("etag")
+            if entry.get("etag") != etag or entry.get("size") != size:
+                entry["etag"] = etag
+                entry["size"] = size
+                await save_manifest()
+
+            logger.debug("Downloading %s from byte %d of %s", path, offset, size or "?")
+            # File operations run in a thread, not to block the event loop.
+            file = await asyncio.to_thread(open, partial_path, mode)
+            try:
+                async for chunk in r.aiter_bytes(self._chunk_size):
+                    if limiter:
+                        await limiter.consume(len(chunk))
+                    await asyncio.to_thread(file.write, chunk)
+            finally:
+                await asyncio.to_thread(file.close)
+
+        await asyncio.to_thread(self._finish, path, partial_path, entry)
+
+    def _finish(self, path: str, partial_path: str, entry: dict) -> None:
+        if self._verify:
+            self._verify_file(partial_path, entry)
+        entry["size"] = os.path.getsize(partial_path)
+        entry["complete"] = True
+        os.replace(partial_path, path)
+
+    def _verify_file(self, path: str, entry: dict) -> None:
+        size = os.path.getsize(path)
+        if entry.get("size") is not None and size != entry["size"]:
+            # Keep nothing of a corrupt transfer, the retry restarts it.
+            os.remove(path)
+            raise DownloadVerificationException(
+                f"Size mismatch for {path}: expected {entry['size']}, got {size}."
+            )
+        etag = (entry.get("etag") or "").strip('"')
+        if re.fullmatch(r"[0-9a-f]{32}", etag):
+            md5 = hashlib.md5()
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(self._chunk_size), b""):
+                    md5.update(chunk)
+            if md5.hexdigest() != etag:
+                os.remove(path)
+                raise DownloadVerificationException(
+                    f"Checksum mismatch for {path}: expected {etag}, "
+                    f"got {md5.hexdigest()}."
+                )
+
+    @staticmethod
+    def _parse_content_range(headers: httpx.Headers) -> tuple:
+        match = re.match(r"bytes (\d+)-\d+/(\d+|\*)", headers.get("content-range", ""))
+        if not match:
+            raise DownloadVerificationException("Invalid Content-Range header.")
+        size = match.group(2)
+        return int(match.group(1)), int(size) if size != "*" else None
@@ -0,0 +1,238 @@
+import json
+import sqlite3
+from itertools import islice
+from typing import Any, Iterable, Iterator, List
+
+from semanticscholar.ShardReader import ShardReader
+
+# Primary key of the records of each dataset, as documented in the
+# README of every release.
+KEY_FIELDS = {
+    "abstracts": "corpusid",
+    "authors": "authorid",
+    "citations": "citationid",
+    "embeddings-specter_v1": "corpusid",
+    "embeddings-specter_v2": "corpusid",
+    "paper-ids": "sha",
+    "papers": "corpusid",
+    "publication-venues": "id",
+    "s2orc": "corpusid",
+    "s2orc_v2": "corpusid",
+    "tldrs": "corpusid",
+}
+
+
+class DatasetStore:
+    """
+    Local keyed store for the records of a Semantic Scholar dataset, backed
+    by SQLite. It keeps the release it holds so that incremental updates
+    only need the diffs published after it.
+    """
+
+    def __init__(self, path: str, dataset_name: str, key_field: str = None) -> None:
+        """
+        :param str path: SQLite database file.
+        :param str dataset_name: name of the dataset kept in the store.
+        :param str key_field: (optional) field used as primary key of the
+               records, defaults to the documented key of the dataset.
+        """
+        if not key_field:
+            if dataset_name not in KEY_FIELDS:
+                raise ValueError(
+                    f"Unknown key field for dataset {dataset_name}, "
+                    "use the key_field parameter."
+                )
+            key_field = KEY_FIELDS[dataset_name]
+        self._path = path
+        self._dataset_name = dataset_name
+        self._key_field = key_field
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (key PRIMARY KEY, data TEXT);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+        stored_name = self._get_meta("dataset")
+        if stored_name is None:
+            self._set_meta("dataset", dataset_name)
+            self._connection.commit()
+        elif stored_name != dataset_name:
+            raise ValueError(f"The store at {path} holds the {stored_name} dataset.")
+
+    @property
+    def path(self) -> str:
+        """
+        SQLite database file.
+
+        :type: :class:`str`
+        """
+        return self._path
+
+    @property
+    def dataset_name(self) -> str:
+        """
+        Name of the dataset kept in the store.
+
+        :type: :class:`str`
+        """
+        return self._dataset_name
+
+    @property
+    def key_field(self) -> str:
+        """
+        Field used as primary key of the records.
+
+        :type: :class:`str`
+        """
+        return self._key_field
+
+    @property
+    def release(self) -> str:
+        """
+        Release currently held by the store, or None if nothing was loaded.
+
+        :type: :class:`str`
+        """
+        return self._get_meta("release")
+
+    def close(self) -> None:
+        """
+        Close the underlying database connection.
+        """
+        self._connection.close()
+
+    def __enter__(self) -> "DatasetStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Any) -> dict:
+        """
+        Get a record by its key.
+
+        :param key: value of the key field.
+        :returns: the record, or None if not found.
+        :rtype: :class:`dict`
+        """
+        row = self._connection.execute(
+            "SELECT data FROM records WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys: List[Any]) -> List[dict]:
+        """
+        Get several records by their keys.
+
+        :param list keys: values of the key field.
+        :returns: records found, in the order of the given keys.
+        :rtype: :class:`List` of :class:`dict`
+        """
+        records = [self.get(key) for key in keys]
+        return [record for record in records if record is not None]
+
+    def upsert(self, records: Iterable[dict], batch_size: int = 10000) -> int:
+        """
+        Insert or replace records, reading them in batches so that any
+        iterable (e.g. a streamed shard) is consumed in constant memory.
+        Changes are only visible to other connections after :meth:`commit`.
+
+        :param records: records to insert or replace.
+        :param int batch_size: (optional) rows written per statement.
+        :returns: number of records written.
+        :rtype: :class:`int`
+        """
+        rows = ((record[self._key_field], json.dumps(record)) for record in records)
+        return self._executemany(
+            "INSERT OR REPLACE INTO records (key, data) VALUES (?, ?)",
+            rows,
+            batch_size,
+        )
+
+    def delete(self, records: Iterable[Any], batch_size: int = 10000) -> int:
+        """
+        Delete records. Items may be records or bare keys. Changes are only
+        visible to other connections after :meth:`commit`.
+
+        :param records: records or keys to delete.
+        :param int batch_size: (optional) rows deleted per statement.
+        :returns: number of delete operations issued.
+        :rtype: :class:`int`
+        """
+        rows = (
+            (item[self._key_field] if isinstance(item, dict) else item,)
+            for item in records
+        )
+        return self._executemany("DELETE FROM records WHERE key = ?", rows, batch_size)
+
+    def load_shards(
+        self, paths: List[str], release_id: str, reader: ShardReader = None
+    ) -> int:
+        """
+        Replace the content of the store with the local shards of a full
+        release, e.g. the files fetched by
+        :class:`semanticscholar.DatasetDownloader.DatasetDownloader`.
+
+        :param list paths: gzip or plain JSONL shard files.
+        :param str release_id: release the shards belong to.
+        :param reader: (optional) reader with 'dict' output parsing the
+               shards in worker processes, by default they are parsed in the
+               calling process.
+        :type reader: :class:`semanticscholar.ShardReader.ShardReader`
+        :returns: number of records loaded.
+        :rtype: :class:`int`
+        """
+        if reader is None:
+            reader = ShardReader(max_workers=0)
+        self._connection.execute("DELETE FROM records")
+        count = 0
+        for batch in reader.iter_batches(paths):
+            count += self.upsert(batch)
+        self.commit(release_id)
+        return count
+
+    def commit(self, release_id: str = None) -> None:
+        """
+        Commit pending changes, optionally recording the release they bring
+        the store to in the same transaction.
+
+        :param str release_id: (optional) release now held by the store.
+        """
+        if release_id:
+            self._set_meta("release", release_id)
+        self._connection.commit()
+
+    def rollback(self) -> None:
+        """
+        Discard pending changes.
+        """
+        self._connection.rollback()
+
+    def _executemany(
+        self, statement: str, rows: Iterator[tuple], batch_size: int
+    ) -> int:
+        count = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return count
+            self._connection.executemany(statement, batch)
+            count += len(batch)
+
+    def _get_meta(self, name: str) -> str:
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: str) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value)
+        )
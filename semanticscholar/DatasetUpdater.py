@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from typing import List
+
+from semanticscholar.AsyncSemanticScholar import AsyncSemanticScholar
+from semanticscholar.DatasetDiff import DatasetDiff
+from semanticscholar.DatasetStore import DatasetStore
+from semanticscholar.ShardReader import ShardReader
+
+logger = logging.getLogger("semanticscholar")
+
+
+class DatasetUpdater:
+    """
+    Brings a :class:`semanticscholar.DatasetStore.DatasetStore` up to date by
+    applying the incremental diffs published between the release it holds
+    and a newer one, instead of downloading the full newer release.
+    """
+
+    def __init__(
+        self,
+        client: AsyncSemanticScholar,
+        store: DatasetStore,
+        batch_size: int = 10000,
+        timeout: float = 60,
+        chunk_size: int = 1024 * 1024,
+        reader: ShardReader = None,
+    ) -> None:
+        """
+        :param client: client used to list the diffs (requires an API key).
+        :type client: :class:`semanticscholar.AsyncSemanticScholar.\
+            AsyncSemanticScholar`
+        :param store: store to update.
+        :type store: :class:`semanticscholar.DatasetStore.DatasetStore`
+        :param int batch_size: (optional) records written to the store at
+               once.
+        :param float timeout: (optional) an exception is raised if a diff file
+               server has not sent data for timeout seconds.
+        :param int chunk_size: (optional) size of the compressed chunks read
+               from the diff files.
+        :param reader: (optional) reader with 'dict' output downloading and
+               parsing the files of each diff, in which case its batch size,
+               timeout and chunk size apply. By default files are read one
+               at a time in the calling process.
+        :type reader: :class:`semanticscholar.ShardReader.ShardReader`
+        """
+        self._client = client
+        self._store = store
+        if reader is None:
+            reader = ShardReader(
+                max_workers=0,
+                batch_size=batch_size,
+                timeout=timeout,
+                chunk_size=chunk_size,
+            )
+        self._reader = reader
+
+    @property
+    def store(self) -> DatasetStore:
+        """
+        Store being updated.
+
+        :type: :class:`semanticscholar.DatasetStore.DatasetStore`
+        """
+        return self._store
+
+    async def update(self, end_release_id: str = "latest") -> str:
+        """
+        Apply every diff between the release held by the store and the given
+        release. Each diff is applied in a single transaction together with
+        the release it leads to, so an interrupted run resumes from the last
+        complete diff.
+
+        :param str end_release_id: (optional) release to update to, or
+               'latest' for the most recent release.
+        :returns: release held by the store after the update.
+        :rtype: :class:`str`
+        """
+        start_release_id = self._store.release
+        if start_release_id is None:
+            raise ValueError(
+                "The store holds no release, use load_shards() to load a full "
+                "release first."
+            )
+        if start_release_id == end_release_id:
+            return start_release_id
+
+        dataset_diff = await self._client.get_dataset_diffs(
+            self._store.dataset_name, start_release_id, end_release_id
+        )
+        self._check_chain(dataset_diff, start_release_id)
+
+        for diff in dataset_diff.diffs or []:
+            logger.info(
+                "Applying %s diff %s to %s",
+                self._store.dataset_name,
+                diff.from_release,
+                diff.to_release,
+            )
+            try:
+                await self._apply_files(diff.update_files, self._store.upsert)
+                await self._apply_files(diff.delete_files, self._store.delete)
+            except BaseException:
+                self._store.rollback()
+                raise
+            self._store.commit(diff.to_release)
+
+        return self._store.release
+
+    def _check_chain(self, dataset_diff: DatasetDiff, start_release_id: str) -> None:
+        current = start_release_id
+        for diff in dataset_diff.diffs or []:
+            if diff.from_release != current:
+                raise ValueError(
+                    f"Broken diff chain: expected a diff from {current}, "
+                    f"got {diff.from_release}."
+                )
+            current = diff.to_release
+        if current != dataset_diff.end_release:
+            raise ValueError(
+                f"Incomplete diff chain: ends at {current}, expected "
+                f"{dataset_diff.end_release}."
+            )
+
+    async def _apply_files(self, urls: List[str], apply) -> None:
+        # The reader blocks while it downloads and parses the files, or waits
+        # for its workers, so batches are taken from it in a thread to keep
+        # the event loop responsive.
+        batches = self._reader.iter_batches(urls or [])
+        try:
+            while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+                apply(batch)
+        finally:
+            batches.close()
@@ -0,0 +1,322 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List
+
+from semanticscholar.PaperEmbeddings import PaperEmbeddings, import_numpy
+from semanticscholar.ShardReader import ShardReader
+
+
+class EmbeddingStore:
+    """
+    On-disk store of paper embeddings (requires NumPy). Vectors are appended
+    to a float32 file that is memory-mapped for reading, so opening a store
+    does not load the vectors and reads return views or copies of just the
+    requested rows. A tab-separated index maps paper IDs to rows.
+
+    Papers are keyed by the IDs used to request them, e.g. a paperId or
+    ``CorpusId:<id>``, so the IDs reported by :meth:`missing` can be passed
+    to :meth:`semanticscholar.AsyncSemanticScholar.AsyncSemanticScholar.\
+    get_paper_embeddings` as they are.
+    """
+
+    META_NAME = "meta.json"
+    VECTORS_NAME = "vectors.f32"
+    IDS_NAME = "ids.tsv"
+
+    def __init__(
+        self, directory: str, dimension: int = None, model: str = None
+    ) -> None:
+        """
+        :param str directory: directory holding the store files.
+        :param int dimension: (optional) length of the vectors, by default
+               that of the first vectors appended.
+        :param str model: (optional) model of the embeddings, e.g.
+               'specter_v2'. Appending embeddings of another model raises
+               an error.
+        """
+        self._numpy = import_numpy()
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, self.META_NAME)
+        self._meta = {"dimension": dimension, "model": model, "rows": 0, "ids": 0}
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as file:
+                self._meta = json.load(file)
+            self._check(dimension, model)
+        self._index = {}
+        ids_path = os.path.join(directory, self.IDS_NAME)
+        if os.path.exists(ids_path):
+            with open(ids_path, "rb") as file:
+                # Lines past the recorded size belong to an interrupted
+                # append.
+                data = file.read(self._meta["ids"]).decode()
+            for line in data.splitlines():
+                paper_id, _, row = line.rpartition("\t")
+                self._index[paper_id] = int(row)
+        self._vectors = None
+        self._open()
+
+    @property
+    def directory(self) -> str:
+        """
+        Directory holding the store files.
+
+        :type: :class:`str`
+        """
+        return self._directory
+
+    @property
+    def dimension(self) -> int:
+        """
+        Length of the vectors, or None if the store is empty.
+
+        :type: :class:`int`
+        """
+        return self._meta["dimension"]
+
+    @property
+    def model(self) -> str:
+        """
+        Model of the embeddings, if known.
+
+        :type: :class:`str`
+        """
+        return self._meta["model"]
+
+    @property
+    def index(self) -> Dict[str, int]:
+        """
+        Rows of the stored papers in :attr:`vectors`, by ID.
+
+        :type: :class:`Dict` [:class:`str`, :class:`int`]
+        """
+        return self._index
+
+    @property
+    def vectors(self) -> Any:
+        """
+        Read-only memory map of every stored vector, one per row, including
+        rows superseded by later appends.
+
+        :type: :class:`numpy.memmap`
+        """
+        return self._vectors
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, paper_id: str) -> bool:
+        return str(paper_id) in self._index
+
+    def __getitem__(self, paper_id: str) -> Any:
+        return self._vectors[self._index[str(paper_id)]]
+
+    def __enter__(self) -> "EmbeddingStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the memory map.
+        """
+        self._vectors = None
+
+    def missing(self, paper_ids: Iterable[str]) -> List[str]:
+        """
+        IDs without a stored embedding, in the given order and without
+        duplicates.
+
+        :param paper_ids: paper IDs.
+        :rtype: :class:`List` of :class:`str`
+        """
+        missing = {}
+        for paper_id in map(str, paper_ids):
+            if paper_id not in self._index:
+                missing[paper_id] = None
+        return list(missing)
+
+    def rows(self, paper_ids: Iterable[str]) -> Any:
+        """
+        Rows of papers in :attr:`vectors`.
+
+        :param paper_ids: IDs of stored papers.
+        :rtype: :class:`numpy.ndarray`
+        :raises: KeyError: if a paper is not stored.
+        """
+        rows = [self._index[paper_id] for paper_id in map(str, paper_ids)]
+        return self._numpy.array(rows, dtype=self._numpy.int64)
+
+    def get(self, paper_ids: Iterable[str], out: Any = None) -> Any:
+        """
+        Vectors of several papers, one per row. Rows stored contiguously
+        and in order are returned as a view of the memory map without
+        copying, other rows are gathered into ``out`` when given.
+
+        :param paper_ids: IDs of stored papers.
+        :param out: (optional) float32 array of shape (len(paper_ids),
+               dimension) to gather the vectors into.
+        :type out: :class:`numpy.ndarray`
+        :rtype: :class:`numpy.ndarray`
+        :raises: KeyError: if a paper is not stored.
+        """
+        rows = self.rows(paper_ids)
+        numpy = self._numpy
+        if out is None and len(rows) and self._vectors is not None:
+            start = int(rows[0])
+            if numpy.array_equal(rows, numpy.arange(start, start + len(rows))):
+                return self._vectors[start : start + len(rows)]
+        if self._vectors is None:
+            return numpy.empty((0, self.dimension or 0), numpy.float32)
+        return numpy.take(self._vectors, rows, axis=0, out=out)
+
+    def get_embeddings(self, paper_ids: Iterable[str]) -> PaperEmbeddings:
+        """
+        Vectors of the stored papers among the given ones.
+
+        :param paper_ids: paper IDs.
+        :returns: embeddings of the stored papers, with the others listed
+                  as missing.
+        :rtype: :class:`semanticscholar.PaperEmbeddings.PaperEmbeddings`
+        """
+        paper_ids = list(dict.fromkeys(map(str, paper_ids)))
+        found = [paper_id for paper_id in paper_ids if paper_id in self._index]
+        missing = [paper_id for paper_id in paper_ids if paper_id not in self._index]
+        return PaperEmbeddings(found, self.get(found), self.model, missing)
+
+    def append(self, paper_ids: List[str], vectors: Any) -> int:
+        """
+        Append vectors. A paper already stored is mapped to its new vector.
+
+        :param list paper_ids: ID of each vector.
+        :param vectors: matrix with one vector per row, or list of vectors.
+        :returns: number of vectors appended.
+        :rtype: :class:`int`
+        """
+        numpy = self._numpy
+        vectors = numpy.asarray(vectors, dtype=numpy.float32)
+        paper_ids = [str(paper_id) for paper_id in paper_ids]
+        if vectors.ndim != 2 or len(vectors) != len(paper_ids):
+            raise ValueError("Expected one vector per paper ID.")
+        if not paper_ids:
+            return 0
+        self._check(vectors.shape[1], None)
+        self._meta["dimension"] = vectors.shape[1]
+
+        first = self._meta["rows"]
+        path = os.path.join(self._directory, self.VECTORS_NAME)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as file:
+            # Drop the rows of an interrupted append, if any.
+            file.truncate(first * vectors.shape[1] * 4)
+            file.seek(0, os.SEEK_END)
+            file.write(numpy.ascontiguousarray(vectors).tobytes())
+        self._meta["rows"] = first + len(paper_ids)
+        self._add_ids({paper_id: first + i for i, paper_id in enumerate(paper_ids)})
+        self._open()
+        return len(paper_ids)
+
+    def add_embeddings(self, embeddings: PaperEmbeddings) -> int:
+        """
+        Append the vectors fetched by :meth:`semanticscholar.\
+        AsyncSemanticScholar.AsyncSemanticScholar.get_paper_embeddings`,
+        keyed by paperId and by the IDs they were requested by.
+
+        :param embeddings: fetched embeddings.
+        :type embeddings: :class:`semanticscholar.PaperEmbeddings.\
+            PaperEmbeddings`
+        :returns: number of vectors appended.
+        :rtype: :class:`int`
+        """
+        if embeddings.model:
+            self._check(None, embeddings.model)
+            self._meta["model"] = embeddings.model
+        count = self.append(embeddings.paper_ids, embeddings.vectors)
+        if count:
+            first = self._meta["rows"] - count
+            paper_ids = set(embeddings.paper_ids)
+            self._add_ids(
+                {
+                    paper_id: first + row
+                    for paper_id, row in embeddings.index.items()
+                    if paper_id not in paper_ids
+                }
+            )
+        return count
+
+    def load_dataset(
+        self, paths: List[str], model: str = None, reader: ShardReader = None
+    ) -> int:
+        """
+        Append the vectors of the shards of an embeddings dataset, keyed by
+        ``CorpusId:<corpusid>``.
+
+        :param list paths: gzip or plain JSONL shards of the
+               embeddings-specter_v1 or embeddings-specter_v2 dataset.
+        :param str model: (optional) model of the embeddings.
+        :param reader: (optional) reader with 'dict' output parsing the
+               shards in worker processes, by default they are parsed in the
+               calling process.
+        :type reader: :class:`semanticscholar.ShardReader.ShardReader`
+        :returns: number of vectors appended.
+        :rtype: :class:`int`
+        """
+        if model:
+            self._check(None, model)
+            self._meta["model"] = model
+        if reader is None:
+            reader = ShardReader(max_workers=0)
+        count = 0
+        for records in reader.iter_batches(paths):
+            paper_ids = [f"CorpusId:{record['corpusid']}" for record in records]
+            # The dataset stores vectors as JSON strings.
+            vectors = [
+                json.loads(vector) if isinstance(vector, str) else vector
+                for vector in (record["vector"] for record in records)
+            ]
+            count += self.append(paper_ids, vectors)
+        return count
+
+    def _add_ids(self, rows: dict) -> None:
+        # The index is written before the metadata that commits it, and the
+        # vectors before the index.
+        path = os.path.join(self._directory, self.IDS_NAME)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as file:
+            file.truncate(self._meta["ids"])
+            file.seek(0, os.SEEK_END)
+            file.write(
+                "".join(
+                    f"{paper_id}\t{row}\n" for paper_id, row in rows.items()
+                ).encode()
+            )
+            self._meta["ids"] = file.tell()
+        self._save_meta()
+        self._index.update(rows)
+
+    def _check(self, dimension: int, model: str) -> None:
+        if dimension and self._meta["dimension"] not in (None, dimension):
+            raise ValueError(
+                f"Vectors of length {dimension} do not match the store "
+                f"dimension {self._meta['dimension']}."
+            )
+        if model and self._meta["model"] not in (None, model):
+            raise ValueError(
+                f"Embeddings of model {model} do not match the store model "
+                f"{self._meta['model']}."
+            )
+
+    def _save_meta(self) -> None:
+        path = os.path.join(self._directory, self.META_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(self._meta, file)
+        os.replace(path + ".tmp", path)
+
+    def _open(self) -> None:
+        rows = self._meta["rows"]
+        if rows:
+            self._vectors = self._numpy.memmap(
+                os.path.join(self._directory, self.VECTORS_NAME),
+                dtype=self._numpy.float32,
+                mode="r",
+                shape=(rows, self._meta["dimension"]),
+            )
@@ -0,0 +1,138 @@
+from typing import List
+
+from semanticscholar.Metrics import LatencyHistogram
+
+
+class HedgePolicy:
+    """
+    Hedging of idempotent GET requests to selected endpoints. When no
+    response has arrived after the given percentile of the latency observed
+    for the endpoint, a duplicate request is sent, the first usable
+    response is returned and the other request is cancelled.
+
+    Hedges are budgeted: each request adds budget hedge tokens and each
+    hedge takes one, so that hedges add at most that fraction of extra
+    requests. By default, paper lookups and autocomplete are hedged:
+
+    .. code-block:: python
+
+        sch = AsyncSemanticScholar(hedge_policy=HedgePolicy(percentile=95))
+    """
+
+    DEFAULT_ENDPOINTS = ("/graph/v1/paper/{id}", "/graph/v1/paper/autocomplete")
+
+    # Tokens saved up at most, so that a burst of slow responses after a
+    # quiet period does not double the load.
+    _MAX_TOKENS = 10.0
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        budget: float = 0.05,
+        min_samples: int = 20,
+        endpoints: List[str] = None,
+    ) -> None:
+        """
+        :param float percentile: (optional) percentile of the observed
+               latency after which a request is hedged.
+        :param float budget: (optional) highest ratio of hedges to requests.
+        :param int min_samples: (optional) responses of an endpoint observed
+               before its requests are hedged.
+        :param list endpoints: (optional) endpoint templates to hedge, see
+               :func:`semanticscholar.Instrumentation.endpoint_template`.
+        """
+        if not 0 < percentile < 100:
+            raise ValueError("The percentile parameter must be between 0 and 100.")
+        if not 0 < budget <= 1:
+            raise ValueError("The budget parameter must be between 0 and 1.")
+        self._percentile = percentile
+        self._budget = budget
+        self._min_samples = min_samples
+        self._endpoints = set(
+            self.DEFAULT_ENDPOINTS if endpoints is None else endpoints
+        )
+        self._latencies = {}
+        self._tokens = 0.0
+        self._requests = 0
+        self._hedges = 0
+
+    @property
+    def percentile(self) -> float:
+        """
+        :type: :class:`float`
+        """
+        return self._percentile
+
+    @property
+    def budget(self) -> float:
+        """
+        :type: :class:`float`
+        """
+        return self._budget
+
+    @property
+    def requests(self) -> int:
+        """
+        Number of requests that could be hedged.
+
+        :type: :class:`int`
+        """
+        return self._requests
+
+    @property
+    def hedges(self) -> int:
+        """
+        Number of hedges sent.
+
+        :type: :class:`int`
+        """
+        return self._hedges
+
+    def applies(self, endpoint: str) -> bool:
+        """
+        :param str endpoint: endpoint template of a GET request.
+        :rtype: :class:`bool`
+        """
+        return endpoint in self._endpoints
+
+    def start(self, endpoint: str) -> float:
+        """
+        Count a request, adding to the budget.
+
+        :param str endpoint: endpoint template of the request.
+        :returns: seconds after which the request may be hedged, or None
+                  while too few responses were observed.
+        :rtype: :class:`float`
+        """
+        self._requests += 1
+        self._tokens = min(self._MAX_TOKENS, self._tokens + self._budget)
+        latencies = self._latencies.get(endpoint)
+        if latencies is None or latencies.count < self._min_samples:
+            return None
+        return latencies.percentile(self._percentile)
+
+    def hedge(self) -> bool:
+        """
+        Take a hedge from the budget.
+
+        :returns: whether a hedge may be sent.
+        :rtype: :class:`bool`
+        """
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self._hedges += 1
+        return True
+
+    def observe(self, endpoint: str, latency: float) -> None:
+        """
+        Record the latency of a response.
+
+        :param str endpoint: endpoint template of the request.
+        :param float latency: seconds from sending the request to receiving
+               the response.
+        """
+        latencies = self._latencies.get(endpoint)
+        if latencies is None:
+            latencies = self._latencies[endpoint] = LatencyHistogram()
+        latencies.add(latency)
@@ -0,0 +1,248 @@
+import logging
+import re
+from typing import Callable, Iterable
+from urllib.parse import urlparse
+
+logger = logging.getLogger("semanticscholar")
+
+EVENT_KINDS = (
+    "request_start",
+    "request_end",
+    "retry",
+    "rate_limit_wait",
+    "cache_hit",
+    "cache_miss",
+    "concurrency_limit",
+    "circuit_state",
+    "hedge",
+)
+
+# Path segments that are part of the API routes, anything else is an ID.
+_ROUTE_SEGMENTS = {
+    "author",
+    "authors",
+    "autocomplete",
+    "batch",
+    "bulk",
+    "citations",
+    "dataset",
+    "datasets",
+    "diffs",
+    "forpaper",
+    "graph",
+    "match",
+    "paper",
+    "papers",
+    "recommendations",
+    "references",
+    "release",
+    "search",
+    "snippet",
+    "to",
+}
+
+# Segments followed by a paper or author ID, and routes following the ID.
+_ID_RESOURCES = {"author", "forpaper", "paper"}
+_ID_ROUTES = {"authors", "citations", "papers", "references"}
+
+
+def endpoint_template(url: str) -> str:
+    """
+    Path of a request URL with IDs replaced by ``{id}``, e.g.
+    ``/graph/v1/paper/{id}/citations``, so that requests to the same
+    endpoint are aggregated together.
+
+    :param str url: request URL.
+    :rtype: :class:`str`
+    """
+    segments = urlparse(url).path.split("/")
+    template = []
+    for index, segment in enumerate(segments):
+        rest = segments[index + 1 :]
+        if segment in _ID_RESOURCES and any(
+            part and part not in _ROUTE_SEGMENTS for part in rest
+        ):
+            # Paper and author IDs may contain slashes, as DOIs and URLs do,
+            # so everything up to a trailing route is one ID.
+            template += [segment, "{id}"]
+            if len(rest) > 1 and rest[-1] in _ID_ROUTES:
+                template.append(rest[-1])
+            break
+        template.append(
+            segment
+            if not segment
+            or segment in _ROUTE_SEGMENTS
+            or re.fullmatch(r"v\d+", segment)
+            else "{id}"
+        )
+    return "/".join(template)
+
+
+class RequestEvent:
+    """
+    Event passed to instrumentation hooks.
+
+    :ivar str kind: one of ``request_start``, ``request_end``, ``retry``,
+          ``rate_limit_wait``, ``cache_hit``, ``cache_miss``,
+          ``concurrency_limit``, ``circuit_state`` and ``hedge``.
+    :ivar str endpoint: endpoint template, see :func:`endpoint_template`.
+    :ivar str method: HTTP method.
+    :ivar str url: request URL, without query string.
+    :ivar int status: HTTP status, if a response was received.
+    :ivar float latency: seconds from sending the request to receiving the
+          response.
+    :ivar int bytes: size of the response body.
+    :ivar int attempt: attempt number, starting at 1.
+    :ivar float queued: seconds from the call to sending the request.
+    :ivar float wait: seconds waited before the next attempt, or before a
+          hedge.
+    :ivar Exception error: exception raised by the attempt, if any.
+    :ivar int limit: concurrency limit, after a change of the
+          :class:`semanticscholar.ConcurrencyLimiter.ConcurrencyLimiter`.
+    :ivar str family: endpoint family, see
+          :func:`semanticscholar.CircuitBreaker.endpoint_family`.
+    :ivar str state: circuit state of the family, after a change.
+    """
+
+    __slots__ = (
+        "kind",
+        "endpoint",
+        "method",
+        "url",
+        "status",
+        "latency",
+        "bytes",
+        "attempt",
+        "queued",
+        "wait",
+        "error",
+        "limit",
+        "family",
+        "state",
+    )
+
+    def __init__(
+        self,
+        kind: str,
+        endpoint: str,
+        method: str = None,
+        url: str = None,
+        status: int = None,
+        latency: float = None,
+        bytes: int = None,
+        attempt: int = 1,
+        queued: float = None,
+        wait: float = None,
+        error: Exception = None,
+        limit: int = None,
+        family: str = None,
+        state: str = None,
+    ) -> None:
+        self.kind = kind
+        self.endpoint = endpoint
+        self.method = method
+        self.url = url
+        self.status = status
+        self.latency = latency
+        self.bytes = bytes
+        self.attempt = attempt
+        self.queued = queued
+        self.wait = wait
+        self.error = error
+        self.limit = limit
+        self.family = family
+        self.state = state
+
+    def as_dict(self) -> dict:
+        """
+        :rtype: :class:`dict`
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        attributes = ", ".join(
+            f"{name}={value!r}"
+            for name, value in self.as_dict().items()
+            if value is not None
+        )
+        return f"RequestEvent({attributes})"
+
+
+class Instrumentation:
+    """
+    Registry of the hooks called on request events. Events are only built
+    when a hook is registered for their kind, so instrumentation costs
+    nothing when unused.
+    """
+
+    def __init__(self) -> None:
+        self._hooks = {kind: [] for kind in EVENT_KINDS}
+
+    def add_hook(
+        self, hook: Callable[[RequestEvent], None], kinds: Iterable[str] = None
+    ) -> Callable[[RequestEvent], None]:
+        """
+        Register a hook. Exceptions raised by hooks are logged and ignored.
+
+        :param hook: callable taking a
+               :class:`semanticscholar.Instrumentation.RequestEvent`, e.g. a
+               :class:`semanticscholar.Metrics.Metrics` instance.
+        :param kinds: (optional) event kinds the hook is called for, by
+               default all of them.
+        :returns: the hook, so this method can be used as a decorator.
+        """
+        kinds = EVENT_KINDS if kinds is None else list(kinds)
+        for kind in kinds:
+            if kind not in self._hooks:
+                raise ValueError(f"Unknown event kind: {kind}.")
+        for kind in kinds:
+            if hook not in self._hooks[kind]:
+                self._hooks[kind].append(hook)
+        return hook
+
+    def remove_hook(self, hook: Callable[[RequestEvent], None]) -> None:
+        """
+        Unregister a hook from every event kind.
+
+        :param hook: hook previously registered.
+        """
+        for hooks in self._hooks.values():
+            if hook in hooks:
+                hooks.remove(hook)
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether any hook is registered.
+
+        :type: :class:`bool`
+        """
+        return any(self._hooks.values())
+
+    def enabled(self, kind: str) -> bool:
+        """
+        Whether any hook is registered for an event kind.
+
+        :param str kind: event kind.
+        :rtype: :class:`bool`
+        """
+        return bool(self._hooks[kind])
+
+    def emit(self, kind: str, endpoint: str, **attributes) -> None:
+        """
+        Call the hooks registered for an event kind.
+
+        :param str kind: event kind.
+        :param str endpoint: endpoint template.
+        :param attributes: other attributes of the
+               :class:`semanticscholar.Instrumentation.RequestEvent`.
+        """
+        hooks = self._hooks[kind]
+        if not hooks:
+            return
+        event = RequestEvent(kind, endpoint, **attributes)
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception:
+                logger.warning("Instrumentation hook %r failed", hook, exc_info=True)
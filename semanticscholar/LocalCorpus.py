@@ -0,0 +1,217 @@
+import os
+from typing import Any, List
+
+from semanticscholar.Author import Author
+from semanticscholar.CorpusIndex import CorpusIndex
+from semanticscholar.Paper import Paper
+
+
+class LocalCorpus:
+    """
+    Offline lookup of papers and authors over locally indexed dataset
+    shards. Every dataset is indexed by a
+    :class:`semanticscholar.CorpusIndex.CorpusIndex` kept in a subdirectory
+    named after it, and records of the papers, abstracts and tldrs datasets
+    are joined on corpusid to build :class:`semanticscholar.Paper.Paper`
+    objects.
+    """
+
+    # Dataset records use lowercase field names, the API uses camel case.
+    PAPER_FIELD_NAMES = {
+        "citationcount": "citationCount",
+        "corpusid": "corpusId",
+        "externalids": "externalIds",
+        "influentialcitationcount": "influentialCitationCount",
+        "isopenaccess": "isOpenAccess",
+        "publicationdate": "publicationDate",
+        "publicationtypes": "publicationTypes",
+        "referencecount": "referenceCount",
+        "s2fieldsofstudy": "s2FieldsOfStudy",
+    }
+
+    AUTHOR_FIELD_NAMES = {
+        "authorid": "authorId",
+        "citationcount": "citationCount",
+        "externalids": "externalIds",
+        "hindex": "hIndex",
+        "papercount": "paperCount",
+    }
+
+    def __init__(self, directory: str) -> None:
+        """
+        :param str directory: directory holding one index per dataset.
+        """
+        self._directory = directory
+        self._indexes = {}
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                if os.path.exists(os.path.join(directory, name, CorpusIndex.META_NAME)):
+                    self._indexes[name] = CorpusIndex(
+                        os.path.join(directory, name), name
+                    )
+
+    @property
+    def directory(self) -> str:
+        """
+        Directory holding one index per dataset.
+
+        :type: :class:`str`
+        """
+        return self._directory
+
+    @property
+    def datasets(self) -> List[str]:
+        """
+        Names of the indexed datasets.
+
+        :type: :class:`List` of :class:`str`
+        """
+        return list(self._indexes)
+
+    def index(self, dataset_name: str) -> CorpusIndex:
+        """
+        Get the index of a dataset, creating an empty one if needed. The
+        returned index can be passed to
+        :class:`semanticscholar.DatasetUpdater.DatasetUpdater` to apply
+        dataset diffs incrementally.
+
+        :param str dataset_name: name of the dataset.
+        :rtype: :class:`semanticscholar.CorpusIndex.CorpusIndex`
+        """
+        if dataset_name not in self._indexes:
+            self._indexes[dataset_name] = CorpusIndex(
+                os.path.join(self._directory, dataset_name), dataset_name
+            )
+        return self._indexes[dataset_name]
+
+    def add_dataset(self, dataset_name: str, paths: List[str], release_id: str) -> int:
+        """
+        Index the local shards of a dataset, replacing any previous index.
+
+        :param str dataset_name: name of the dataset.
+        :param list paths: gzip or plain JSONL shard files.
+        :param str release_id: release the shards belong to.
+        :returns: number of records indexed.
+        :rtype: :class:`int`
+        """
+        return self.index(dataset_name).build(paths, release_id)
+
+    def close(self) -> None:
+        """
+        Release the memory maps of every index.
+        """
+        for index in self._indexes.values():
+            index.close()
+
+    def __enter__(self) -> "LocalCorpus":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def get_paper_data(self, corpus_id: Any) -> dict:
+        """
+        Get paper data in the API format, joined from the indexed paper
+        datasets.
+
+        :param corpus_id: CorpusId of the paper.
+        :returns: paper data, or None if the paper is not indexed.
+        :rtype: :class:`dict`
+        """
+        if "papers" not in self._indexes:
+            return None
+        record = self._indexes["papers"].get(corpus_id)
+        if record is None:
+            return None
+        data = self.paper_data(record)
+        if "abstracts" in self._indexes:
+            abstract = self._indexes["abstracts"].get(corpus_id)
+            if abstract is not None:
+                data["abstract"] = abstract.get("abstract")
+                info = abstract.get("openaccessinfo") or {}
+                if info.get("url"):
+                    data["openAccessPdf"] = {
+                        "url": info["url"],
+                        "status": info.get("status"),
+                        "license": info.get("license"),
+                    }
+        if "tldrs" in self._indexes:
+            tldr = self._indexes["tldrs"].get(corpus_id)
+            if tldr is not None:
+                data["tldr"] = {"model": tldr.get("model"), "text": tldr.get("text")}
+        return data
+
+    def get_paper(self, corpus_id: Any) -> Paper:
+        """
+        Paper lookup without network access.
+
+        :param corpus_id: CorpusId of the paper.
+        :returns: paper data, or None if the paper is not indexed.
+        :rtype: :class:`semanticscholar.Paper.Paper`
+        """
+        data = self.get_paper_data(corpus_id)
+        return Paper(data) if data is not None else None
+
+    def get_papers(self, corpus_ids: List[Any]) -> List[Paper]:
+        """
+        Lookup of several papers without network access.
+
+        :param list corpus_ids: CorpusIds of the papers.
+        :returns: papers found, in the order of the given IDs.
+        :rtype: :class:`List` of :class:`semanticscholar.Paper.Paper`
+        """
+        papers = [self.get_paper(corpus_id) for corpus_id in corpus_ids]
+        return [paper for paper in papers if paper is not None]
+
+    def get_author(self, author_id: Any) -> Author:
+        """
+        Author lookup without network access.
+
+        :param author_id: S2AuthorId.
+        :returns: author data, or None if the author is not indexed.
+        :rtype: :class:`semanticscholar.Author.Author`
+        """
+        if "authors" not in self._indexes:
+            return None
+        record = self._indexes["authors"].get(author_id)
+        return Author(self.author_data(record)) if record is not None else None
+
+    def get_authors(self, author_ids: List[Any]) -> List[Author]:
+        """
+        Lookup of several authors without network access.
+
+        :param list author_ids: S2AuthorIds.
+        :returns: authors found, in the order of the given IDs.
+        :rtype: :class:`List` of :class:`semanticscholar.Author.Author`
+        """
+        authors = [self.get_author(author_id) for author_id in author_ids]
+        return [author for author in authors if author is not None]
+
+    @classmethod
+    def paper_data(cls, record: dict) -> dict:
+        """
+        Convert a record of the papers dataset to the API format.
+
+        :param dict record: papers dataset record.
+        :rtype: :class:`dict`
+        """
+        data = {cls.PAPER_FIELD_NAMES.get(k, k): v for k, v in record.items()}
+        venue_id = data.pop("publicationvenueid", None)
+        if venue_id:
+            data["publicationVenue"] = {"id": venue_id}
+        if data.get("url") and "paperId" not in data:
+            data["paperId"] = data["url"].rstrip("/").rsplit("/", 1)[-1]
+        return data
+
+    @classmethod
+    def author_data(cls, record: dict) -> dict:
+        """
+        Convert a record of the authors dataset to the API format.
+
+        :param dict record: authors dataset record.
+        :rtype: :class:`dict`
+        """
+        data = {cls.AUTHOR_FIELD_NAMES.get(k, k): v for k, v in record.items()}
+        if data.get("authorId") is not None:
+            data["authorId"] = str(data["authorId"])
+        return data
@@ -0,0 +1,153 @@
+import re
+from typing import List
+
+from semanticscholar.Backend import Backend
+from semanticscholar.CitationGraph import CitationGraph
+from semanticscholar.CorpusIndex import CorpusIndex
+from semanticscholar.DatasetStore import DatasetStore
+from semanticscholar.LocalCorpus import LocalCorpus
+
+
+class LocalMirror(Backend):
+    """
+    Backend serving papers, authors, citations and references from a local
+    mirror of the Semantic Scholar datasets.
+
+    Papers are resolved by ``CorpusId:<id>`` and, when a store of the
+    paper-ids dataset is given, by S2PaperId. Any other identifier, and any
+    paper or author missing from the mirror, falls back to the API. Fields
+    that are not part of the datasets are omitted from the results.
+    """
+
+    # Citations or references nested in a paper returned by the API at most.
+    NESTED_LIMIT = 1000
+
+    def __init__(
+        self,
+        corpus: LocalCorpus,
+        graph: CitationGraph = None,
+        paper_ids: DatasetStore = None,
+        citations: CorpusIndex = None,
+    ) -> None:
+        """
+        :param corpus: indexed papers, abstracts, tldrs and authors datasets.
+        :type corpus: :class:`semanticscholar.LocalCorpus.LocalCorpus`
+        :param graph: (optional) adjacency built from the citations dataset,
+               required to serve citations and references.
+        :type graph: :class:`semanticscholar.CitationGraph.CitationGraph`
+        :param paper_ids: (optional) store of the paper-ids dataset, used to
+               resolve S2PaperIds to CorpusIds.
+        :type paper_ids: :class:`semanticscholar.DatasetStore.DatasetStore`
+        :param citations: (optional) index of the citations dataset by
+               citationid, used to add contexts and intents to citations
+               and references.
+        :type citations: :class:`semanticscholar.CorpusIndex.CorpusIndex`
+        """
+        self._corpus = corpus
+        self._graph = graph
+        self._paper_ids = paper_ids
+        self._citations = citations
+
+    def resolve(self, paper_id: str) -> int:
+        """
+        Resolve a paper identifier to a CorpusId.
+
+        :param str paper_id: paper identifier, as accepted by the API.
+        :returns: CorpusId, or None if it cannot be resolved locally.
+        :rtype: :class:`int`
+        """
+        paper_id = str(paper_id)
+        match = re.fullmatch(r"(?i)corpusid:(\d+)", paper_id)
+        if match:
+            return int(match.group(1))
+        if self._paper_ids is not None and re.fullmatch(r"[0-9a-f]{40}", paper_id):
+            record = self._paper_ids.get(paper_id)
+            if record is not None:
+                return int(record["corpusid"])
+        return None
+
+    async def get_paper(self, paper_id: str, fields: list) -> dict:
+        corpus_id = self.resolve(paper_id)
+        if corpus_id is None:
+            return None
+        data = self._corpus.get_paper_data(corpus_id)
+        if data is None:
+            return None
+        for name in ("citations", "references"):
+            if self._graph is not None and self._requests(fields, name):
+                subfields = [
+                    f.split(".", 1)[1] for f in fields if f.startswith(name + ".")
+                ]
+                neighbours = getattr(self._graph, name)
+                data[name] = [
+                    self._select(self._corpus.get_paper_data(target), subfields)
+                    or {"corpusId": target}
+                    for target, _, _ in neighbours(corpus_id, 0, self.NESTED_LIMIT)
+                ]
+        return self._select(data, fields)
+
+    async def get_papers(self, paper_ids: List[str], fields: list) -> List[dict]:
+        return [await self.get_paper(paper_id, fields) for paper_id in paper_ids]
+
+    async def get_author(self, author_id: str, fields: list) -> dict:
+        author = self._corpus.get_author(author_id)
+        if author is None:
+            return None
+        return self._select(author.raw_data, fields, "authorId")
+
+    async def get_paper_citations(
+        self, paper_id: str, fields: list, offset: int, limit: int
+    ) -> dict:
+        return self._page(paper_id, fields, offset, limit, "citations", "citingPaper")
+
+    async def get_paper_references(
+        self, paper_id: str, fields: list, offset: int, limit: int
+    ) -> dict:
+        return self._page(paper_id, fields, offset, limit, "references", "citedPaper")
+
+    def _page(
+        self,
+        paper_id: str,
+        fields: list,
+        offset: int,
+        limit: int,
+        name: str,
+        paper_key: str,
+    ) -> dict:
+        if self._graph is None:
+            return None
+        corpus_id = self.resolve(paper_id)
+        if corpus_id is None or self._corpus.get_paper_data(corpus_id) is None:
+            return None
+
+        total = getattr(self._graph, "count_" + name)(corpus_id)
+        neighbours = getattr(self._graph, name)
+        items = []
+        for target, citation_id, influential in neighbours(corpus_id, offset, limit):
+            item = {"isInfluential": influential}
+            if self._citations is not None:
+                record = self._citations.get(citation_id) or {}
+                item["contexts"] = record.get("contexts")
+                item["intents"] = record.get("intents")
+            paper = self._corpus.get_paper_data(target) or {"corpusId": target}
+            item[paper_key] = self._select(paper, fields)
+            items.append(self._select(item, fields, paper_key))
+
+        page = {"offset": offset, "total": total, "data": items}
+        if offset + limit < total:
+            page["next"] = offset + limit
+        return page
+
+    @staticmethod
+    def _requests(fields: list, name: str) -> bool:
+        return any(f == name or f.startswith(name + ".") for f in fields)
+
+    @staticmethod
+    def _select(data: dict, fields: list, id_field: str = "paperId") -> dict:
+        # Like the API, returns the requested fields and the ID field, which
+        # is the nested paper of a citation or reference item.
+        if data is None or not fields:
+            return data
+        names = {f.split(".", 1)[0] for f in fields}
+        names.add(id_field)
+        return {k: v for k, v in data.items() if k in names}
@@ -0,0 +1,267 @@
+import heapq
+from typing import Any, Dict, List, Tuple
+
+from semanticscholar.EmbeddingStore import EmbeddingStore
+from semanticscholar.PaperEmbeddings import PaperEmbeddings, import_numpy
+
+
+class LocalRecommender:
+    """
+    Paper recommendations computed locally from cached embeddings (requires
+    NumPy), as an alternative to
+    :meth:`semanticscholar.AsyncSemanticScholar.AsyncSemanticScholar.\
+    get_recommended_papers_from_lists` without network access or limit on
+    the number of results.
+
+    Papers are ranked by cosine similarity to the mean of the positive seed
+    embeddings minus the mean of the negative ones. Exact queries scan the
+    matrix in blocks, which may be memory-mapped, keeping the best scores
+    in a heap. After :meth:`build_ivf`, queries only scan the papers of the
+    clusters closest to the query, trading some recall for speed.
+    """
+
+    def __init__(
+        self,
+        vectors: Any,
+        paper_ids: List[str],
+        aliases: Dict[str, int] = None,
+        block_size: int = 65536,
+    ) -> None:
+        """
+        :param vectors: float32 matrix with one embedding per row, e.g. the
+               memory map of an :class:`semanticscholar.EmbeddingStore.\
+               EmbeddingStore`.
+        :type vectors: :class:`numpy.ndarray`
+        :param list paper_ids: ID of each row, or None for rows that must
+               never be recommended.
+        :param dict aliases: (optional) other IDs mapped to rows, accepted as
+               seeds.
+        :param int block_size: (optional) rows scored at once.
+        """
+        numpy = import_numpy()
+        if len(paper_ids) != len(vectors):
+            raise ValueError("Expected one paper ID per row.")
+        self._numpy = numpy
+        self._vectors = vectors
+        self._paper_ids = list(paper_ids)
+        self._block_size = block_size
+        self._rows = dict(aliases or {})
+        self._rows.update(
+            (paper_id, row)
+            for row, paper_id in enumerate(self._paper_ids)
+            if paper_id is not None
+        )
+        self._valid = numpy.array([paper_id is not None for paper_id in paper_ids])
+        self._norms = numpy.ones(len(vectors), numpy.float32)
+        for start in range(0, len(vectors), block_size):
+            norms = numpy.linalg.norm(vectors[start : start + block_size], axis=1)
+            self._norms[start : start + block_size] = numpy.where(norms > 0, norms, 1)
+        self._centroids = None
+        self._order = None
+        self._offsets = None
+        self._n_probe = None
+
+    @classmethod
+    def from_store(cls, store: EmbeddingStore, **kwargs) -> "LocalRecommender":
+        """
+        Recommender over the memory-mapped vectors of a store, without
+        loading them in memory.
+
+        :param store: store of embeddings.
+        :type store: :class:`semanticscholar.EmbeddingStore.EmbeddingStore`
+        :rtype: :class:`semanticscholar.LocalRecommender.LocalRecommender`
+        """
+        vectors = store.vectors
+        if vectors is None:
+            numpy = import_numpy()
+            vectors = numpy.empty((0, store.dimension or 0), numpy.float32)
+        # Rows superseded by later appends keep no ID.
+        paper_ids = [None] * len(vectors)
+        for paper_id, row in store.index.items():
+            if paper_ids[row] is None:
+                paper_ids[row] = paper_id
+        return cls(vectors, paper_ids, store.index, **kwargs)
+
+    @classmethod
+    def from_embeddings(
+        cls, embeddings: PaperEmbeddings, **kwargs
+    ) -> "LocalRecommender":
+        """
+        Recommender over embeddings fetched by
+        :meth:`semanticscholar.AsyncSemanticScholar.AsyncSemanticScholar.\
+        get_paper_embeddings`.
+
+        :param embeddings: fetched embeddings.
+        :type embeddings: :class:`semanticscholar.PaperEmbeddings.\
+            PaperEmbeddings`
+        :rtype: :class:`semanticscholar.LocalRecommender.LocalRecommender`
+        """
+        return cls(embeddings.vectors, embeddings.paper_ids, embeddings.index, **kwargs)
+
+    def __len__(self) -> int:
+        return int(self._valid.sum())
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._rows
+
+    def build_ivf(
+        self,
+        n_lists: int = None,
+        n_probe: int = 8,
+        n_iter: int = 10,
+        sample_size: int = None,
+        seed: int = 0,
+    ) -> None:
+        """
+        Cluster the embeddings with spherical k-means and build inverted
+        lists of the papers of each cluster, used by later queries.
+
+        :param int n_lists: (optional) number of clusters, by default the
+               square root of the number of papers.
+        :param int n_probe: (optional) clusters scanned per query by default.
+        :param int n_iter: (optional) k-means iterations.
+        :param int sample_size: (optional) papers the clusters are trained
+               on, by default 64 per cluster.
+        :param int seed: (optional) seed of the random sampling.
+        """
+        numpy = self._numpy
+        valid_rows = numpy.flatnonzero(self._valid)
+        if not len(valid_rows):
+            raise ValueError("No embeddings to index.")
+        if n_lists is None:
+            n_lists = max(1, int(len(valid_rows) ** 0.5))
+        n_lists = min(n_lists, len(valid_rows))
+        if sample_size is None:
+            sample_size = 64 * n_lists
+        rng = numpy.random.default_rng(seed)
+        sample = numpy.sort(
+            rng.choice(valid_rows, min(sample_size, len(valid_rows)), replace=False)
+        )
+        sample = self._normalized(sample)
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(n_iter):
+            assignment = numpy.argmax(sample @ centroids.T, axis=1)
+            order = numpy.argsort(assignment, kind="stable")
+            counts = numpy.bincount(assignment, minlength=n_lists)
+            starts = numpy.concatenate(([0], numpy.cumsum(counts)[:-1]))
+            sums = numpy.zeros_like(centroids)
+            sums[counts > 0] = numpy.add.reduceat(
+                sample[order], starts[counts > 0], axis=0
+            )
+            norms = numpy.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid.
+            centroids = numpy.where(
+                norms > 0, sums / numpy.maximum(norms, 1e-12), centroids
+            )
+
+        assignment = numpy.full(len(self._vectors), n_lists)
+        for start in range(0, len(self._vectors), self._block_size):
+            rows = numpy.arange(
+                start, min(start + self._block_size, len(self._vectors))
+            )
+            scores = self._normalized(rows) @ centroids.T
+            assignment[start : start + len(rows)] = numpy.argmax(scores, axis=1)
+        # Rows without paper ID go to an extra list that is never scanned.
+        assignment[~self._valid] = n_lists
+
+        self._order = numpy.argsort(assignment, kind="stable")
+        self._offsets = numpy.searchsorted(
+            assignment[self._order], numpy.arange(n_lists + 1)
+        )
+        self._centroids = centroids.astype(numpy.float32)
+        self._n_probe = n_probe
+
+    def recommend(
+        self,
+        positive_paper_ids: List[str],
+        negative_paper_ids: List[str] = None,
+        limit: int = 100,
+        n_probe: int = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Papers most similar to the positive seeds and least similar to the
+        negative ones. Seed papers are never recommended.
+
+        :param list positive_paper_ids: IDs of papers to find similar ones
+               to.
+        :param list negative_paper_ids: (optional) IDs of papers to find
+               dissimilar ones to.
+        :param int limit: (optional) maximum number of papers returned.
+        :param int n_probe: (optional) clusters scanned when an IVF index is
+               built, overriding the default of :meth:`build_ivf`.
+        :returns: paper IDs and cosine similarity scores, best first.
+        :rtype: :class:`List` of :class:`Tuple` [:class:`str`,
+                :class:`float`]
+        :raises: KeyError: if a seed paper has no embedding.
+        """
+        if limit < 1:
+            raise ValueError("The limit parameter must be at least 1.")
+        if not positive_paper_ids:
+            raise ValueError("At least one positive paper ID is required.")
+        numpy = self._numpy
+        negative_paper_ids = negative_paper_ids or []
+        positive = self._seed_rows(positive_paper_ids)
+        negative = self._seed_rows(negative_paper_ids)
+        query = self._normalized(positive).mean(axis=0)
+        if len(negative):
+            query = query - self._normalized(negative).mean(axis=0)
+        norm = numpy.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        query = query.astype(numpy.float32)
+        excluded = set(positive.tolist()) | set(negative.tolist())
+
+        heap = []
+        for rows, scores in self._scores(query, n_probe):
+            scores[~self._valid[rows]] = -numpy.inf
+            if len(scores) > limit + len(excluded):
+                best = numpy.argpartition(scores, -(limit + len(excluded)))
+                best = best[-(limit + len(excluded)) :]
+            else:
+                best = numpy.arange(len(scores))
+            for i in best:
+                score, row = float(scores[i]), int(rows[i])
+                if score == -numpy.inf or row in excluded:
+                    continue
+                if len(heap) < limit:
+                    heapq.heappush(heap, (score, -row))
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, (score, -row))
+        return [
+            (self._paper_ids[-negated_row], score)
+            for score, negated_row in sorted(heap, reverse=True)
+        ]
+
+    def _seed_rows(self, paper_ids: List[str]) -> Any:
+        unknown = [paper_id for paper_id in paper_ids if paper_id not in self._rows]
+        if unknown:
+            raise KeyError(f"Papers without embedding: {unknown}")
+        return self._numpy.array(
+            [self._rows[paper_id] for paper_id in paper_ids], dtype=self._numpy.int64
+        )
+
+    def _normalized(self, rows: Any) -> Any:
+        vectors = self._numpy.asarray(self._vectors[rows], dtype=self._numpy.float32)
+        return vectors / self._norms[rows][:, None]
+
+    def _scores(self, query: Any, n_probe: int):
+        numpy = self._numpy
+        if self._centroids is None:
+            for start in range(0, len(self._vectors), self._block_size):
+                end = min(start + self._block_size, len(self._vectors))
+                block = self._vectors[start:end]
+                yield numpy.arange(start, end), block @ query / self._norms[start:end]
+            return
+
+        n_lists = len(self._centroids)
+        n_probe = min(n_probe or self._n_probe, n_lists)
+        probes = numpy.argsort(self._centroids @ query)[-n_probe:]
+        candidates = numpy.sort(
+            numpy.concatenate(
+                [self._order[self._offsets[p] : self._offsets[p + 1]] for p in probes]
+            )
+        )
+        for start in range(0, len(candidates), self._block_size):
+            rows = candidates[start : start + self._block_size]
+            yield rows, self._vectors[rows] @ query / self._norms[rows]
@@ -0,0 +1,363 @@
+import bisect
+import math
+import threading
+from typing import TYPE_CHECKING, Dict, List
+
+from semanticscholar.Instrumentation import RequestEvent
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+class LatencyHistogram:
+    """
+    Latency distribution kept in logarithmic buckets 5% wide, so that
+    percentiles are estimated within 5% in constant memory, and in the
+    cumulative buckets exported to Prometheus.
+    """
+
+    # Bucket upper bounds of the exported histogram, in seconds.
+    EXPORT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    _MIN = 1e-4
+    _GROWTH = 1.05
+
+    def __init__(self) -> None:
+        self._buckets = {}
+        self._export = [0] * (len(self.EXPORT_BUCKETS) + 1)
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def count(self) -> int:
+        """
+        :type: :class:`int`
+        """
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        """
+        Total latency in seconds.
+
+        :type: :class:`float`
+        """
+        return self._sum
+
+    def add(self, seconds: float) -> None:
+        """
+        :param float seconds: latency to record.
+        """
+        index = max(
+            0, math.ceil(math.log(max(seconds, self._MIN) / self._MIN, self._GROWTH))
+        )
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self._export[bisect.bisect_left(self.EXPORT_BUCKETS, seconds)] += 1
+        self._count += 1
+        self._sum += seconds
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimated latency below which the given percentage of the requests
+        completed.
+
+        :param float percent: percentage, e.g. 95.
+        :returns: latency in seconds, or None without data.
+        :rtype: :class:`float`
+        """
+        if not self._count:
+            return None
+        rank = percent / 100 * self._count
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return self._MIN * self._GROWTH**index
+        return self._MIN * self._GROWTH ** max(self._buckets)
+
+    def cumulative_buckets(self) -> List[tuple]:
+        """
+        Cumulative counts of the exported buckets, ending with ``+Inf``.
+
+        :rtype: :class:`List` of :class:`tuple`
+        """
+        bounds = [str(bound) for bound in self.EXPORT_BUCKETS] + ["+Inf"]
+        counts, total = [], 0
+        for count in self._export:
+            total += count
+            counts.append(total)
+        return list(zip(bounds, counts))
+
+
+class EndpointMetrics:
+    """
+    Counters and latency histogram of one endpoint.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.statuses = {}
+        self.retries = 0
+        self.rate_limit_waits = 0
+        self.rate_limit_wait_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.hedges = 0
+        self.bytes = 0
+        self.queued_seconds = 0.0
+        self.latency = LatencyHistogram()
+
+    def as_dict(self) -> dict:
+        """
+        :rtype: :class:`dict`
+        """
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "retries": self.retries,
+            "rate_limit_waits": self.rate_limit_waits,
+            "rate_limit_wait_seconds": self.rate_limit_wait_seconds,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "hedges": self.hedges,
+            "bytes": self.bytes,
+            "queued_seconds": self.queued_seconds,
+            "latency": {
+                "count": self.latency.count,
+                "sum": self.latency.sum,
+                "p50": self.latency.percentile(50),
+                "p95": self.latency.percentile(95),
+                "p99": self.latency.percentile(99),
+            },
+        }
+
+
+class Metrics:
+    """
+    In-process aggregator of request events, with per-endpoint counters and
+    latency percentiles. Register it as a hook of a client:
+
+    .. code-block:: python
+
+        metrics = Metrics()
+        sch.instrumentation.add_hook(metrics)
+        ...
+        print(metrics.snapshot())
+        print(metrics.to_prometheus())
+    """
+
+    def __init__(self) -> None:
+        self._endpoints = {}
+        self._concurrency_limit = None
+        self._circuit_states = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent) -> None:
+        if event.kind == "concurrency_limit":
+            self._concurrency_limit = event.limit
+            return
+        if event.kind == "circuit_state":
+            with self._lock:
+                self._circuit_states[event.family] = event.state
+            return
+        with self._lock:
+            metrics = self._endpoints.get(event.endpoint)
+            if metrics is None:
+                metrics = self._endpoints[event.endpoint] = EndpointMetrics()
+            if event.kind == "request_end":
+                metrics.requests += 1
+                if event.status is not None:
+                    metrics.statuses[event.status] = (
+                        metrics.statuses.get(event.status, 0) + 1
+                    )
+                if event.error is not None or (event.status or 0) >= 400:
+                    metrics.errors += 1
+                if event.latency is not None:
+                    metrics.latency.add(event.latency)
+                metrics.bytes += event.bytes or 0
+                metrics.queued_seconds += event.queued or 0
+            elif event.kind == "retry":
+                metrics.retries += 1
+            elif event.kind == "rate_limit_wait":
+                metrics.rate_limit_waits += 1
+                metrics.rate_limit_wait_seconds += event.wait or 0
+            elif event.kind == "cache_hit":
+                metrics.cache_hits += 1
+            elif event.kind == "cache_miss":
+                metrics.cache_misses += 1
+            elif event.kind == "hedge":
+                metrics.hedges += 1
+
+    @property
+    def endpoints(self) -> List[str]:
+        """
+        Endpoint templates with recorded events.
+
+        :type: :class:`List` of :class:`str`
+        """
+        with self._lock:
+            return sorted(self._endpoints)
+
+    @property
+    def concurrency_limit(self) -> int:
+        """
+        Last limit set by the concurrency limiter of the client, or None if
+        it has not changed.
+
+        :type: :class:`int`
+        """
+        return self._concurrency_limit
+
+    @property
+    def circuit_states(self) -> Dict[str, str]:
+        """
+        Last state of the circuit of each endpoint family that changed.
+
+        :type: :class:`Dict` [:class:`str`, :class:`str`]
+        """
+        with self._lock:
+            return dict(self._circuit_states)
+
+    def percentile(self, endpoint: str, percent: float) -> float:
+        """
+        Estimated latency percentile of an endpoint.
+
+        :param str endpoint: endpoint template.
+        :param float percent: percentage, e.g. 95.
+        :returns: latency in seconds, or None without data.
+        :rtype: :class:`float`
+        """
+        with self._lock:
+            metrics = self._endpoints.get(endpoint)
+            return metrics.latency.percentile(percent) if metrics else None
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Counters and latency summary of every endpoint.
+
+        :rtype: :class:`Dict` [:class:`str`, :class:`dict`]
+        """
+        with self._lock:
+            return {
+                endpoint: metrics.as_dict()
+                for endpoint, metrics in sorted(self._endpoints.items())
+            }
+
+    def reset(self) -> None:
+        """
+        Discard every recorded event.
+        """
+        with self._lock:
+            self._endpoints = {}
+            self._concurrency_limit = None
+            self._circuit_states = {}
+
+    def to_prometheus(self, prefix: str = "semanticscholar") -> str:
+        """
+        Metrics in the Prometheus text exposition format.
+
+        :param str prefix: (optional) prefix of the metric names.
+        :rtype: :class:`str`
+        """
+        counters = {
+            "retries": "Retried requests.",
+            "rate_limit_waits": "Waits caused by rate limiting.",
+            "rate_limit_wait_seconds": "Seconds waited because of rate limiting.",
+            "cache_hits": "Requests served from a cache or local backend.",
+            "cache_misses": "Requests not found in a cache or local backend.",
+            "hedges": "Duplicate requests sent after a slow response.",
+            "bytes": "Bytes received.",
+            "queued_seconds": "Seconds requests waited before being sent.",
+        }
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = [
+                f"# HELP {prefix}_requests_total Completed requests by status.",
+                f"# TYPE {prefix}_requests_total counter",
+            ]
+            for endpoint, metrics in endpoints:
+                for status, count in sorted(
+                    metrics.statuses.items(), key=lambda item: str(item[0])
+                ):
+                    lines.append(
+                        f"{prefix}_requests_total"
+                        f'{{endpoint="{endpoint}",status="{status}"}} {count}'
+                    )
+                failed = metrics.requests - sum(metrics.statuses.values())
+                if failed:
+                    lines.append(
+                        f"{prefix}_requests_total"
+                        f'{{endpoint="{endpoint}",status="error"}} {failed}'
+                    )
+            for name, help_text in counters.items():
+                lines.append(f"# HELP {prefix}_{name}_total {help_text}")
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for endpoint, metrics in endpoints:
+                    lines.append(
+                        f'{prefix}_{name}_total{{endpoint="{endpoint}"}} '
+                        f"{getattr(metrics, name)}"
+                    )
+            name = f"{prefix}_request_duration_seconds"
+            lines.append(f"# HELP {name} Request latency.")
+            lines.append(f"# TYPE {name} histogram")
+            for endpoint, metrics in endpoints:
+                for bound, count in metrics.latency.cumulative_buckets():
+                    lines.append(
+                        f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}'
+                    )
+                lines.append(
+                    f'{name}_sum{{endpoint="{endpoint}"}} {metrics.latency.sum}'
+                )
+                lines.append(
+                    f'{name}_count{{endpoint="{endpoint}"}} {metrics.latency.count}'
+                )
+            if self._concurrency_limit is not None:
+                name = f"{prefix}_concurrency_limit"
+                lines.append(f"# HELP {name} Requests allowed in flight.")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {self._concurrency_limit}")
+            if self._circuit_states:
+                name = f"{prefix}_circuit_state"
+                lines.append(
+                    f"# HELP {name} Circuit state by endpoint family, "
+                    "0 closed, 1 half-open, 2 open."
+                )
+                lines.append(f"# TYPE {name} gauge")
+                values = {"closed": 0, "half_open": 1, "open": 2}
+                for family, state in sorted(self._circuit_states.items()):
+                    lines.append(f'{name}{{family="{family}"}} {values[state]}')
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(
+        self, port: int, address: str = "127.0.0.1"
+    ) -> "ThreadingHTTPServer":
+        """
+        Serve the metrics in the Prometheus format from a background thread.
+
+        :param int port: port to listen on, 0 for any free port.
+        :param str address: (optional) address to listen on.
+        :returns: the running server, stopped with its ``shutdown()``
+                  method.
+        :rtype: :class:`http.server.ThreadingHTTPServer`
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((address, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
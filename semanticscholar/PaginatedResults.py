@@ -1,8 +1,11 @@
-from typing import Any, Union, List
+from typing import TYPE_CHECKING, Any, Union, List
 import asyncio
 
-from semanticscholar.ApiRequester import ApiRequester
 from semanticscholar.SemanticScholarException import NoMorePagesException
+from semanticscholar.Tracing import start_span
+
+if TYPE_CHECKING:
+    from semanticscholar.ApiRequester import ApiRequester
 
 
 class PaginatedResults:
@@ -11,9 +14,12 @@ class PaginatedResults:
     You can just iterate over results regardless of the number of pages.
     """
 
+    # Offset plus limit of a request must not exceed it.
+    _MAX_POSITION = 9999
+
     def __init__(
         self,
-        requester: ApiRequester,
+        requester: "ApiRequester",
         data_type: Any,
         url: str,
         query: str = None,
@@ -22,6 +28,9 @@ class PaginatedResults:
         headers: dict = None,
         max_results: int = 10000,
         token_pagination: bool = False,
+        max_items: int = None,
+        offset: int = 0,
+        token: str = None,
     ) -> None:
 
         self._requester = requester
@@ -33,20 +42,25 @@ class PaginatedResults:
         self._headers = headers
         self._max_results = max_results
         self._token_pagination = token_pagination
+        self._max_items = max_items
+        self._page_size = limit
 
+        # Pages start at the given offset, or continuation token.
         self._data = []
         self._total = 0
-        self._offset = 0 - self._limit
-        self._next = 0
+        self._offset = offset - self._limit
+        self._next = offset
         self._parameters = ""
         self._items = []
-        self._continuation_token = None
+        self._continuation_token = token
+        self._page_offset = 0
 
     @classmethod
     async def create(cls, *args, **kwargs):
 
         obj = cls(*args, **kwargs)
-        await obj._async_get_next_page()
+        if obj._has_next_page():
+            await obj._async_get_next_page()
 
         return obj
 
@@ -81,6 +95,16 @@ class PaginatedResults:
         """
         return self._next
 
+    @property
+    def token(self) -> str:
+        """
+        Continuation token of the next page with token pagination, or None
+        if there are no more pages or if the last page was cut to max_items.
+
+        :type: :class:`str`
+        """
+        return self._continuation_token
+
     @property
     def items(self) -> list:
         """
@@ -101,6 +125,16 @@ class PaginatedResults:
         """
         return self._data
 
+    @property
+    def max_items(self) -> int:
+        """
+        Number of items after which no more pages are fetched, or None to
+        fetch all the available pages.
+
+        :type: :class:`int`
+        """
+        return self._max_items
+
     def __iter__(self) -> Any:
         yield from self._items
         while self._has_next_page():
@@ -120,12 +154,16 @@ class PaginatedResults:
         return self._items[key]
 
     def _has_next_page(self) -> bool:
+        if self._max_items is not None and len(self._items) >= self._max_items:
+            return False
         if self._token_pagination:
             return len(self._data) == 0 or self._continuation_token is not None
         next_page_offset = self._offset + self._limit
         has_token = self._continuation_token is not None
         has_more_results = next_page_offset == self._next or has_token
-        is_under_limit = next_page_offset < (self._max_results - 1)
+        is_under_limit = next_page_offset < min(
+            self._max_results - 1, self._MAX_POSITION
+        )
         return has_more_results and is_under_limit
 
     async def _request_data(self) -> Union[dict, List[dict]]:
@@ -133,30 +171,40 @@ class PaginatedResults:
             self._url, self._parameters, self._headers
         )
 
-    async def _async_get_next_page(self) -> Union[dict, List[dict]]:
+    async def _async_get_next_page(self, wanted: int = None) -> Union[dict, List[dict]]:
 
         if not self._has_next_page():
             raise NoMorePagesException("No more pages to fetch.")
 
-        self._build_params()
-
-        results = await self._request_data()
-
-        return self._update_params(results)
+        self._build_params(wanted)
+
+        tracer = self._requester.tracer
+        if tracer is None:
+            results = await self._request_data()
+            return self._update_params(results)
+
+        attributes = {
+            "semanticscholar.page.offset": self._page_offset,
+            "semanticscholar.page.limit": self._limit,
+            "semanticscholar.page.token": self._continuation_token is not None,
+        }
+        with start_span(tracer, "semanticscholar.page", attributes) as span:
+            results = await self._request_data()
+            items = self._update_params(results)
+            span.set_attributes(
+                {
+                    "semanticscholar.page.item_count": len(items),
+                    "semanticscholar.total": self._total,
+                }
+            )
+            return items
 
     def _get_next_page(self) -> list:
 
-        if not self._has_next_page():
-            raise NoMorePagesException("No more pages to fetch.")
-
-        self._build_params()
-
         loop = asyncio.get_event_loop()
-        results = loop.run_until_complete(self._request_data())
-
-        return self._update_params(results)
+        return loop.run_until_complete(self._async_get_next_page())
 
-    def _build_params(self) -> None:
+    def _build_params(self, wanted: int = None) -> None:
 
         self._parameters = f"query={self._query}" if self._query else ""
 
@@ -166,13 +214,20 @@ class PaginatedResults:
         fields = ",".join(self._fields)
         self._parameters += f"&fields={fields}"
 
+        self._page_offset = 0
         if not self._token_pagination:
             offset = self._offset + self._limit
+            self._page_offset = offset
             self._parameters += f"&offset={offset}"
 
-            total = offset + self._limit
-            if total == 10000:
-                self._limit -= 1
+            # Request no more items than needed to reach the limits.
+            self._limit = self._page_size
+            for cap in (self._max_items, wanted):
+                if cap is not None:
+                    self._limit = max(1, min(self._limit, cap - len(self._items)))
+
+            # The API serves items below this position only.
+            self._limit = min(self._limit, self._MAX_POSITION - offset)
             self._parameters += f"&limit={self._limit}"
 
     def _update_params(self, results: Union[dict, List[dict]]) -> list:
@@ -186,7 +241,19 @@ class PaginatedResults:
             self._next = results["next"] if "next" in results else 0
             self._continuation_token = results["token"] if "token" in results else None
 
-            for item in results["data"]:
+            data = results["data"]
+            if self._max_items is not None:
+                # Token pages have a fixed size, and a backend may return more
+                # than requested.
+                data = data[: max(0, self._max_items - len(self._items))]
+                if len(data) < len(results["data"]):
+                    # The next page would skip the items left out, so it
+                    # starts after the last item kept, and a token, which
+                    # cannot resume within a page, is dropped.
+                    if self._next:
+                        self._next = self._offset + len(data)
+                    self._continuation_token = None
+            for item in data:
                 result_items.append(self._data_type(item))
 
             self._items += result_items
@@ -205,3 +272,30 @@ class PaginatedResults:
         Get next results
         """
         await self._async_get_next_page()
+
+    def take(self, n: int) -> list:
+        """
+        Get the first n items, fetching only the pages needed to reach them,
+        the last one sized to the missing items when possible.
+
+        :param int n: number of items.
+        :returns: up to n items.
+        :rtype: :class:`list`
+        """
+        while len(self._items) < n and self._has_next_page():
+            loop = asyncio.get_event_loop()
+            loop.run_until_complete(self._async_get_next_page(n))
+        return self._items[:n]
+
+    async def async_take(self, n: int) -> list:
+        """
+        Get the first n items, fetching only the pages needed to reach them,
+        the last one sized to the missing items when possible.
+
+        :param int n: number of items.
+        :returns: up to n items.
+        :rtype: :class:`list`
+        """
+        while len(self._items) < n and self._has_next_page():
+            await self._async_get_next_page(n)
+        return self._items[:n]
@@ -1,9 +1,11 @@
 from datetime import datetime
+from typing import Any
 
 import semanticscholar.Author
 import semanticscholar.Journal
 import semanticscholar.Tldr
 import semanticscholar.PublicationVenue
+from semanticscholar.PaperEmbeddings import import_numpy
 from semanticscholar.SemanticScholarObject import SemanticScholarObject
 
 
@@ -192,6 +194,19 @@ class Paper(SemanticScholarObject):
         """
         return self._embedding
 
+    @property
+    def embedding_vector(self) -> Any:
+        """
+        Embedding vector as a float32 array (requires NumPy), or None if the
+        embedding was not requested.
+
+        :type: :class:`numpy.ndarray`
+        """
+        if not self._embedding or not self._embedding.get("vector"):
+            return None
+        numpy = import_numpy()
+        return numpy.asarray(self._embedding["vector"], dtype=numpy.float32)
+
     @property
     def externalIds(self) -> dict:
         """
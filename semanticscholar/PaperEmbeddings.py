@@ -0,0 +1,118 @@
+from typing import Any, Dict, List
+
+
+def import_numpy() -> Any:
+    """
+    Import NumPy, which is only required by the embedding features.
+
+    :raises: ImportError: if NumPy is not installed.
+    """
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(
+            "Embedding arrays require NumPy, install it with "
+            "pip install semanticscholar[numpy]."
+        ) from error
+    return numpy
+
+
+class PaperEmbeddings:
+    """
+    Embedding vectors of several papers, stored as the rows of a single
+    float32 matrix instead of lists of Python floats.
+    """
+
+    def __init__(
+        self,
+        paper_ids: List[str],
+        vectors: Any,
+        model: str = None,
+        missing_ids: List[str] = None,
+        aliases: Dict[str, int] = None,
+    ) -> None:
+        """
+        :param list paper_ids: paperId of each row of the matrix.
+        :param vectors: float32 matrix with one embedding per row.
+        :type vectors: :class:`numpy.ndarray`
+        :param str model: (optional) model of the embeddings.
+        :param list missing_ids: (optional) requested IDs without embedding.
+        :param dict aliases: (optional) other IDs of the papers, such as the
+               requested ones, mapped to their rows.
+        """
+        self._paper_ids = paper_ids
+        self._vectors = vectors
+        self._model = model
+        self._missing_ids = missing_ids or []
+        self._index = dict(aliases or {})
+        self._index.update((paper_id, row) for row, paper_id in enumerate(paper_ids))
+
+    @property
+    def paper_ids(self) -> List[str]:
+        """
+        paperId of each row of :attr:`vectors`.
+
+        :type: :class:`List` of :class:`str`
+        """
+        return self._paper_ids
+
+    @property
+    def vectors(self) -> Any:
+        """
+        float32 matrix with one embedding per row.
+
+        :type: :class:`numpy.ndarray`
+        """
+        return self._vectors
+
+    @property
+    def model(self) -> str:
+        """
+        Model of the embeddings, e.g. 'specter_v2'.
+
+        :type: :class:`str`
+        """
+        return self._model
+
+    @property
+    def missing_ids(self) -> List[str]:
+        """
+        Requested IDs not found or without embedding.
+
+        :type: :class:`List` of :class:`str`
+        """
+        return self._missing_ids
+
+    @property
+    def index(self) -> Dict[str, int]:
+        """
+        Rows of the papers by paperId and by the IDs they were requested by.
+
+        :type: :class:`Dict` [:class:`str`, :class:`int`]
+        """
+        return self._index
+
+    def row(self, paper_id: str) -> int:
+        """
+        Row of a paper in :attr:`vectors`.
+
+        :param str paper_id: paperId, or the ID the paper was requested by.
+        :rtype: :class:`int`
+        :raises: KeyError: if the paper has no embedding.
+        """
+        return self._index[paper_id]
+
+    def __getitem__(self, paper_id: str) -> Any:
+        return self._vectors[self._index[paper_id]]
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._paper_ids)
+
+    def __repr__(self) -> str:
+        return (
+            f"PaperEmbeddings(model={self._model!r}, "
+            f"shape={tuple(self._vectors.shape)})"
+        )
@@ -0,0 +1,213 @@
+import abc
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import time
+
+
+def _reserve(state: dict, name: str, rate: float, burst: int, now: float) -> float:
+    # Token bucket of the given name, allowed to go below zero: a negative
+    # balance is the queue of requests already promised a later slot.
+    tokens, updated = state.get(name, (burst, now))
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate) - 1
+    state[name] = [tokens, now]
+    return max(0.0, -tokens / rate)
+
+
+class RateBackend(abc.ABC):
+    """
+    Storage of the token buckets of a :class:`RateLimiter`. Subclasses
+    implement :meth:`reserve` atomically for every limiter sharing it.
+    """
+
+    @abc.abstractmethod
+    async def reserve(self, name: str, rate: float, burst: int) -> float:
+        """
+        Take a token from a bucket, or reserve the next one.
+
+        :param str name: bucket name.
+        :param float rate: tokens added per second.
+        :param int burst: capacity of the bucket.
+        :returns: seconds to wait before using the token.
+        :rtype: :class:`float`
+        """
+
+
+class MemoryRateBackend(RateBackend):
+    """
+    Buckets kept in memory, shared by the limiters of one process.
+    """
+
+    def __init__(self) -> None:
+        self._state = {}
+
+    async def reserve(self, name: str, rate: float, burst: int) -> float:
+        return _reserve(self._state, name, rate, burst, time.monotonic())
+
+
+class FileRateBackend(RateBackend):
+    """
+    Buckets kept in a file, updated under an exclusive ``flock``, shared by
+    the processes of one machine using the same path. POSIX only.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :param str path: state file, created if missing.
+        """
+        import fcntl
+
+        self._fcntl = fcntl
+        self._path = path
+
+    @property
+    def path(self) -> str:
+        """
+        :type: :class:`str`
+        """
+        return self._path
+
+    async def reserve(self, name: str, rate: float, burst: int) -> float:
+        # The lock may be held by another process, it is waited for in a
+        # thread not to block the event loop.
+        return await asyncio.to_thread(self._reserve, name, rate, burst)
+
+    def _reserve(self, name: str, rate: float, burst: int) -> float:
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._fcntl.flock(fd, self._fcntl.LOCK_EX)
+            data = b""
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                data += chunk
+            state = json.loads(data) if data else {}
+            # Wall clock time, comparable between processes.
+            wait = _reserve(state, name, rate, burst, time.time())
+            data = json.dumps(state).encode()
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        return wait
+
+
+class RedisRateBackend(RateBackend):
+    """
+    Buckets kept in Redis, shared by every host using the same server and
+    prefix. Each reservation is one Lua script, timed by the server clock.
+    Works with synchronous and asyncio clients of ``redis`` and with
+    compatible stand-ins implementing ``eval``.
+    """
+
+    SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 60)
+return tostring(math.max(0, -tokens / rate))
+"""
+
+    def __init__(self, client, prefix: str = "semanticscholar:rate:") -> None:
+        """
+        :param client: Redis client, e.g. ``redis.asyncio.Redis()``.
+        :param str prefix: (optional) prefix of the bucket keys.
+        """
+        self._client = client
+        self._prefix = prefix
+
+    async def reserve(self, name: str, rate: float, burst: int) -> float:
+        result = self._client.eval(self.SCRIPT, 1, self._prefix + name, rate, burst)
+        if inspect.isawaitable(result):
+            result = await result
+        return float(result)
+
+
+class RateLimiter:
+    """
+    Limit of the requests sent per second, as a token bucket per API key
+    stored in a :class:`RateBackend`. With a :class:`FileRateBackend` or a
+    :class:`RedisRateBackend`, every process using the same backend shares
+    the rate of a key:
+
+    .. code-block:: python
+
+        limiter = RateLimiter(1.0, backend=FileRateBackend("/tmp/s2.rate"))
+        sch = AsyncSemanticScholar(api_key="...", rate_limiter=limiter)
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        backend: RateBackend = None,
+        name: str = "semanticscholar",
+    ) -> None:
+        """
+        :param float rate: requests per second of each key.
+        :param int burst: (optional) requests sent at once after being idle.
+        :param backend: (optional) storage of the buckets, in memory by
+               default.
+        :type backend: :class:`semanticscholar.RateLimiter.RateBackend`
+        :param str name: (optional) bucket name, shared by limiters with
+               the same backend and name.
+        """
+        if rate <= 0:
+            raise ValueError("The rate parameter must be positive.")
+        if burst < 1:
+            raise ValueError("The burst parameter must be at least 1.")
+        self._rate = rate
+        self._burst = burst
+        self._backend = backend if backend is not None else MemoryRateBackend()
+        self._name = name
+
+    @property
+    def rate(self) -> float:
+        """
+        :type: :class:`float`
+        """
+        return self._rate
+
+    @property
+    def backend(self) -> RateBackend:
+        """
+        :type: :class:`semanticscholar.RateLimiter.RateBackend`
+        """
+        return self._backend
+
+    async def acquire(
+        self, api_key: str = None, rate: float = None, burst: int = None
+    ) -> float:
+        """
+        Wait for the turn of a request.
+
+        :param str api_key: (optional) key of the request, each key having
+               its own bucket.
+        :param float rate: (optional) requests per second of this key,
+               instead of the rate of the limiter, as for the keys of an
+               :class:`semanticscholar.ApiKeyPool.ApiKeyPool`.
+        :param int burst: (optional) requests this key sends at once after
+               being idle, instead of the burst of the limiter.
+        :returns: seconds waited.
+        :rtype: :class:`float`
+        """
+        name = self._name
+        if api_key:
+            # Keys are not stored in shared state, only their digest.
+            name += ":" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        wait = await self._backend.reserve(
+            name, rate or self._rate, burst or self._burst
+        )
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
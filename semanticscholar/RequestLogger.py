@@ -0,0 +1,208 @@
+import json
+import logging
+import random
+from typing import Iterable
+
+from semanticscholar.Instrumentation import endpoint_template
+
+
+class _Lazy:
+    """
+    Log argument formatted only when a handler emits the record.
+    """
+
+    __slots__ = ("_function", "_args")
+
+    def __init__(self, function, *args) -> None:
+        self._function = function
+        self._args = args
+
+    def __str__(self) -> str:
+        return self._function(*self._args)
+
+
+class RequestLogger:
+    """
+    Logs the requests made to the API. Nothing is formatted unless the
+    logger is enabled for DEBUG, and even then only when a handler emits
+    the record. Records carry ``method``, ``url`` and ``endpoint``
+    attributes for structured handlers, and the values of sensitive headers
+    are redacted.
+
+    Requests slower than :attr:`slow_threshold` are logged as warnings,
+    whatever the logging level and sample rate.
+    """
+
+    REDACTED = "***"
+
+    def __init__(
+        self,
+        logger: logging.Logger = None,
+        sample_rate: float = 1.0,
+        slow_threshold: float = None,
+        redacted_headers: Iterable[str] = ("x-api-key",),
+    ) -> None:
+        """
+        :param logger: (optional) logger of the records, by default the
+               ``semanticscholar`` logger.
+        :param float sample_rate: (optional) fraction of the requests logged
+               at DEBUG level.
+        :param float slow_threshold: (optional) latency in seconds above
+               which a request is logged as slow, None to disable.
+        :param redacted_headers: (optional) names of the headers whose value
+               is never logged.
+        """
+        self._logger = logger or logging.getLogger("semanticscholar")
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.redacted_headers = redacted_headers
+
+    @property
+    def logger(self) -> logging.Logger:
+        """
+        :type: :class:`logging.Logger`
+        """
+        return self._logger
+
+    @property
+    def sample_rate(self) -> float:
+        """
+        Fraction of the requests logged at DEBUG level.
+
+        :type: :class:`float`
+        """
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, sample_rate: float) -> None:
+        """
+        :param float sample_rate:
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("The sample_rate parameter must be between 0 and 1.")
+        self._sample_rate = sample_rate
+
+    @property
+    def slow_threshold(self) -> float:
+        """
+        Latency in seconds above which a request is logged as slow, or None.
+
+        :type: :class:`float`
+        """
+        return self._slow_threshold
+
+    @slow_threshold.setter
+    def slow_threshold(self, slow_threshold: float) -> None:
+        """
+        :param float slow_threshold:
+        """
+        self._slow_threshold = slow_threshold
+
+    @property
+    def redacted_headers(self) -> frozenset:
+        """
+        Lowercase names of the headers whose value is never logged.
+
+        :type: :class:`frozenset`
+        """
+        return self._redacted_headers
+
+    @redacted_headers.setter
+    def redacted_headers(self, redacted_headers: Iterable[str]) -> None:
+        """
+        :param redacted_headers:
+        """
+        self._redacted_headers = frozenset(name.lower() for name in redacted_headers)
+
+    def log_request(
+        self,
+        method: str,
+        url: str,
+        parameters: str,
+        headers: dict,
+        payload: dict = None,
+    ) -> None:
+        """
+        Log a request about to be sent, if DEBUG is enabled and the request
+        is sampled.
+
+        :param str method: HTTP method.
+        :param str url: URL without query string.
+        :param str parameters: query string.
+        :param dict headers: request headers.
+        :param dict payload: (optional) JSON body.
+        """
+        logger = self._logger
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if self._sample_rate < 1 and random.random() >= self._sample_rate:
+            return
+        extra = {"method": method, "url": url, "endpoint": endpoint_template(url)}
+        full_url = f"{url}?{parameters}" if parameters else url
+        logger.debug("HTTP Request: %s %s", method, full_url, extra=extra)
+        logger.debug("Headers: %s", _Lazy(self._redact, headers), extra=extra)
+        logger.debug("Payload: %s", payload, extra=extra)
+        logger.debug(
+            "cURL command: %s",
+            _Lazy(self._curl_cmd, url, parameters, method, headers, payload),
+            extra=extra,
+        )
+
+    def log_response(
+        self, method: str, url: str, status: int, latency: float, attempt: int = 1
+    ) -> None:
+        """
+        Log a response as slow if its latency exceeds the threshold.
+
+        :param str method: HTTP method.
+        :param str url: URL without query string.
+        :param int status: HTTP status.
+        :param float latency: seconds from sending the request to receiving
+               the response.
+        :param int attempt: (optional) attempt number.
+        """
+        if self._slow_threshold is None or latency < self._slow_threshold:
+            return
+        self._logger.warning(
+            "Slow request: %s %s took %.3fs (status %s, attempt %s)",
+            method,
+            url,
+            latency,
+            status,
+            attempt,
+            extra={
+                "method": method,
+                "url": url,
+                "endpoint": endpoint_template(url),
+                "status": status,
+                "latency": latency,
+                "attempt": attempt,
+            },
+        )
+
+    def _redact(self, headers: dict) -> str:
+        return str(
+            {
+                key: self.REDACTED if key.lower() in self._redacted_headers else value
+                for key, value in (headers or {}).items()
+            }
+        )
+
+    def _curl_cmd(
+        self,
+        url: str,
+        parameters: str,
+        method: str,
+        headers: dict,
+        payload: dict = None,
+    ) -> str:
+        curl_cmd = f"curl -X {method}"
+        if headers:
+            for key, value in headers.items():
+                if key.lower() in self._redacted_headers:
+                    value = self.REDACTED
+                curl_cmd += f" -H '{key}: {value}'"
+        curl_cmd += f" -d '{json.dumps(payload)}'" if payload else ""
+        curl_cmd += f" {url}"
+        curl_cmd += f"?{parameters}" if parameters else ""
+        return curl_cmd
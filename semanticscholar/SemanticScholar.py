@@ -1,17 +1,31 @@
-from typing import List, Literal, Tuple, Union
+from typing import TYPE_CHECKING, Any, Iterator, List, Literal, Tuple, Union
 import asyncio
 import nest_asyncio
 
 from semanticscholar.PaginatedResults import PaginatedResults
 from semanticscholar.AsyncSemanticScholar import AsyncSemanticScholar
 from semanticscholar.Author import Author
+from semanticscholar.Backend import Backend
 from semanticscholar.Dataset import Dataset
 from semanticscholar.DatasetDiff import DatasetDiff
 from semanticscholar.Paper import Paper
+from semanticscholar.PaperEmbeddings import PaperEmbeddings
 from semanticscholar.Release import Release
 from semanticscholar.Autocomplete import Autocomplete
 from semanticscholar.SnippetSearchResult import SnippetSearchResult
 
+if TYPE_CHECKING:
+    import httpx
+
+    from semanticscholar.ApiKeyPool import ApiKeyPool
+    from semanticscholar.CircuitBreaker import CircuitBreaker
+    from semanticscholar.ConcurrencyLimiter import ConcurrencyLimiter
+    from semanticscholar.EmbeddingStore import EmbeddingStore
+    from semanticscholar.HedgePolicy import HedgePolicy
+    from semanticscholar.Instrumentation import Instrumentation
+    from semanticscholar.RateLimiter import RateLimiter
+    from semanticscholar.RequestLogger import RequestLogger
+
 
 class SemanticScholar:
     """
@@ -25,6 +39,14 @@ class SemanticScholar:
         api_url: str = None,
         debug: bool = False,
         retry: bool = True,
+        backend: Backend = None,
+        tracer: Any = None,
+        http_client: "httpx.AsyncClient" = None,
+        concurrency_limiter: "ConcurrencyLimiter" = None,
+        api_key_pool: "ApiKeyPool" = None,
+        rate_limiter: "RateLimiter" = None,
+        circuit_breaker: "CircuitBreaker" = None,
+        hedge_policy: "HedgePolicy" = None,
     ) -> None:
         """
         :param float timeout: (optional) an exception is raised
@@ -33,12 +55,53 @@ class SemanticScholar:
         :param str api_url: (optional) custom API url.
         :param bool debug: (optional) enable debug mode.
         :param bool retry: enable retry mode.
+        :param backend: (optional) data source tried before the API, such as
+               a :class:`semanticscholar.LocalMirror.LocalMirror`.
+        :type backend: :class:`semanticscholar.Backend.Backend`
+        :param tracer: (optional) OpenTelemetry tracer, see
+               :func:`semanticscholar.Tracing.get_tracer`.
+        :type tracer: :class:`opentelemetry.trace.Tracer`
+        :param http_client: (optional) HTTP client shared by all requests,
+               keeping connections open between them. It is not closed by
+               this object.
+        :type http_client: :class:`httpx.AsyncClient`
+        :param concurrency_limiter: (optional) adaptive limit of the
+               requests in flight.
+        :type concurrency_limiter: :class:`semanticscholar.\
+            ConcurrencyLimiter.ConcurrencyLimiter`
+        :param api_key_pool: (optional) several API keys whose throughput
+               is aggregated, used instead of api_key.
+        :type api_key_pool: :class:`semanticscholar.ApiKeyPool.ApiKeyPool`
+        :param rate_limiter: (optional) limit of the requests sent per
+               second with each key, shared between processes with a file
+               or Redis backend. The keys of api_key_pool are limited to
+               their rate in the pool.
+        :type rate_limiter: :class:`semanticscholar.RateLimiter.RateLimiter`
+        :param circuit_breaker: (optional) circuit breaker per endpoint
+               family, failing fast while a family is failing.
+        :type circuit_breaker: :class:`semanticscholar.CircuitBreaker.\
+            CircuitBreaker`
+        :param hedge_policy: (optional) hedging of slow paper lookups and
+               autocomplete requests.
+        :type hedge_policy: :class:`semanticscholar.HedgePolicy.HedgePolicy`
         """
         nest_asyncio.apply()
         self._timeout = timeout
         self._retry = retry
         self._AsyncSemanticScholar = AsyncSemanticScholar(
-            timeout=timeout, api_key=api_key, api_url=api_url, debug=debug, retry=retry
+            timeout=timeout,
+            api_key=api_key,
+            api_url=api_url,
+            debug=debug,
+            retry=retry,
+            backend=backend,
+            tracer=tracer,
+            http_client=http_client,
+            concurrency_limiter=concurrency_limiter,
+            api_key_pool=api_key_pool,
+            rate_limiter=rate_limiter,
+            circuit_breaker=circuit_breaker,
+            hedge_policy=hedge_policy,
         )
         self.debug = debug
 
@@ -96,6 +159,148 @@ class SemanticScholar:
         self._retry = retry
         self._AsyncSemanticScholar.retry = retry
 
+    @property
+    def backend(self) -> Backend:
+        """
+        Data source tried before the API.
+
+        :type: :class:`semanticscholar.Backend.Backend`
+        """
+        return self._AsyncSemanticScholar.backend
+
+    @backend.setter
+    def backend(self, backend: Backend) -> None:
+        """
+        :param backend:
+        """
+        self._AsyncSemanticScholar.backend = backend
+
+    @property
+    def instrumentation(self) -> "Instrumentation":
+        """
+        Hooks called on request events, e.g. a
+        :class:`semanticscholar.Metrics.Metrics` aggregator.
+
+        :type: :class:`semanticscholar.Instrumentation.Instrumentation`
+        """
+        return self._AsyncSemanticScholar.instrumentation
+
+    @property
+    def request_logger(self) -> "RequestLogger":
+        """
+        Logger of the requests, with sampling, header redaction and the
+        slow request threshold.
+
+        :type: :class:`semanticscholar.RequestLogger.RequestLogger`
+        """
+        return self._AsyncSemanticScholar.request_logger
+
+    @property
+    def tracer(self) -> Any:
+        """
+        OpenTelemetry tracer, or None to disable tracing.
+
+        :type: :class:`opentelemetry.trace.Tracer`
+        """
+        return self._AsyncSemanticScholar.tracer
+
+    @tracer.setter
+    def tracer(self, tracer: Any) -> None:
+        """
+        :param tracer:
+        """
+        self._AsyncSemanticScholar.tracer = tracer
+
+    @property
+    def http_client(self) -> "httpx.AsyncClient":
+        """
+        HTTP client shared by all requests, or None to open a connection per
+        request.
+
+        :type: :class:`httpx.AsyncClient`
+        """
+        return self._AsyncSemanticScholar.http_client
+
+    @http_client.setter
+    def http_client(self, http_client: "httpx.AsyncClient") -> None:
+        """
+        :param http_client:
+        """
+        self._AsyncSemanticScholar.http_client = http_client
+
+    @property
+    def concurrency_limiter(self) -> "ConcurrencyLimiter":
+        """
+        Adaptive limit of the requests in flight, or None not to limit them.
+
+        :type: :class:`semanticscholar.ConcurrencyLimiter.ConcurrencyLimiter`
+        """
+        return self._AsyncSemanticScholar.concurrency_limiter
+
+    @concurrency_limiter.setter
+    def concurrency_limiter(self, concurrency_limiter: "ConcurrencyLimiter") -> None:
+        """
+        :param concurrency_limiter:
+        """
+        self._AsyncSemanticScholar.concurrency_limiter = concurrency_limiter
+
+    @property
+    def api_key_pool(self) -> "ApiKeyPool":
+        """
+        API keys rotated between requests, or None to use api_key.
+
+        :type: :class:`semanticscholar.ApiKeyPool.ApiKeyPool`
+        """
+        return self._AsyncSemanticScholar.api_key_pool
+
+    @property
+    def rate_limiter(self) -> "RateLimiter":
+        """
+        Limit of the requests sent per second, or None not to limit them.
+
+        :type: :class:`semanticscholar.RateLimiter.RateLimiter`
+        """
+        return self._AsyncSemanticScholar.rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, rate_limiter: "RateLimiter") -> None:
+        """
+        :param rate_limiter:
+        """
+        self._AsyncSemanticScholar.rate_limiter = rate_limiter
+
+    @property
+    def circuit_breaker(self) -> "CircuitBreaker":
+        """
+        Circuit breaker per endpoint family, or None to always send requests.
+
+        :type: :class:`semanticscholar.CircuitBreaker.CircuitBreaker`
+        """
+        return self._AsyncSemanticScholar.circuit_breaker
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, circuit_breaker: "CircuitBreaker") -> None:
+        """
+        :param circuit_breaker:
+        """
+        self._AsyncSemanticScholar.circuit_breaker = circuit_breaker
+
+    @property
+    def hedge_policy(self) -> "HedgePolicy":
+        """
+        Hedging of slow GET requests, or None to never hedge.
+
+        :type: :class:`semanticscholar.HedgePolicy.HedgePolicy`
+        """
+        return self._AsyncSemanticScholar.hedge_policy
+
+    @hedge_policy.setter
+    def hedge_policy(self, hedge_policy: "HedgePolicy") -> None:
+        """
+        :param hedge_policy:
+        """
+        self._AsyncSemanticScholar.hedge_policy = hedge_policy
+
     def get_paper(self, paper_id: str, fields: list = None) -> Paper:
         """
         Paper lookup
@@ -165,6 +370,44 @@ class SemanticScholar:
 
         return papers
 
+    def get_paper_embeddings(
+        self,
+        paper_ids: List[str],
+        model: str = "specter_v2",
+        store: "EmbeddingStore" = None,
+    ) -> PaperEmbeddings:
+        """
+        Get the embeddings of multiple papers as a float32 matrix (requires
+        NumPy). Papers are requested in batches of 500, and their vectors
+        are written straight into a matrix allocated once for all of them.
+
+        :calls: `POST /graph/v1/paper/batch \
+            <https://api.semanticscholar.org/api-docs/graph#tag/Paper-Data\
+            /operation/post_graph_get_papers>`_
+
+        :param list paper_ids: list of IDs - S2PaperId, CorpusId, DOI,
+               ArXivId, MAG, ACL, PMID, PMCID, or URL.
+        :param str model: (optional) embedding model, 'specter_v1' or
+               'specter_v2'.
+        :param store: (optional) store of embeddings already fetched. Only
+               the papers missing from it are requested, and they are added
+               to it.
+        :type store: :class:`semanticscholar.EmbeddingStore.EmbeddingStore`
+        :returns: embeddings of the papers found, indexed by paperId and by
+                  the requested IDs, or only by the requested IDs when a
+                  store is given.
+        :rtype: :class:`semanticscholar.PaperEmbeddings.PaperEmbeddings`
+        """
+
+        loop = asyncio.get_event_loop()
+        embeddings = loop.run_until_complete(
+            self._AsyncSemanticScholar.get_paper_embeddings(
+                paper_ids=paper_ids, model=model, store=store
+            )
+        )
+
+        return embeddings
+
     def get_paper_authors(
         self, paper_id: str, fields: list = None, limit: int = 100
     ) -> PaginatedResults:
@@ -199,7 +442,12 @@ class SemanticScholar:
         return results
 
     def get_paper_citations(
-        self, paper_id: str, fields: list = None, limit: int = 100
+        self,
+        paper_id: str,
+        fields: list = None,
+        limit: int = 100,
+        max_results: int = None,
+        offset: int = 0,
     ) -> PaginatedResults:
         """
         Get details about a paper's citations
@@ -220,19 +468,31 @@ class SemanticScholar:
         :param list fields: (optional) list of the fields to be returned.
         :param int limit: (optional) maximum number of results to return 
                (must be <= 1000).
+        :param int max_results: (optional) maximum number of results to
+               fetch across all pages, no page being requested past it.
+        :param int offset: (optional) position of the first result to fetch.
         """
 
         loop = asyncio.get_event_loop()
         results = loop.run_until_complete(
             self._AsyncSemanticScholar.get_paper_citations(
-                paper_id=paper_id, fields=fields, limit=limit
+                paper_id=paper_id,
+                fields=fields,
+                limit=limit,
+                max_results=max_results,
+                offset=offset,
             )
         )
 
         return results
 
     def get_paper_references(
-        self, paper_id: str, fields: list = None, limit: int = 100
+        self,
+        paper_id: str,
+        fields: list = None,
+        limit: int = 100,
+        max_results: int = None,
+        offset: int = 0,
     ) -> PaginatedResults:
         """
         Get details about a paper's references
@@ -253,12 +513,19 @@ class SemanticScholar:
         :param list fields: (optional) list of the fields to be returned.
         :param int limit: (optional) maximum number of results to return 
                (must be <= 1000).
+        :param int max_results: (optional) maximum number of results to
+               fetch across all pages, no page being requested past it.
+        :param int offset: (optional) position of the first result to fetch.
         """
 
         loop = asyncio.get_event_loop()
         results = loop.run_until_complete(
             self._AsyncSemanticScholar.get_paper_references(
-                paper_id=paper_id, fields=fields, limit=limit
+                paper_id=paper_id,
+                fields=fields,
+                limit=limit,
+                max_results=max_results,
+                offset=offset,
             )
         )
 
@@ -279,6 +546,8 @@ class SemanticScholar:
         bulk: bool = False,
         sort: str = None,
         match_title: bool = False,
+        offset: int = 0,
+        token: str = None,
     ) -> Union[PaginatedResults, Paper]:
         """
         Search for papers by keyword. Performs a search query based on the 
@@ -323,6 +592,10 @@ class SemanticScholar:
                (ascending) or desc (descending).
         :param bool match_title: (optional) retrieve a single paper whose 
                title best matches the given query.
+        :param int offset: (optional) position of the first result to fetch
+               (only if bulk=False).
+        :param str token: (optional) continuation token of the page to start
+               from (only if bulk=True).
         :returns: query results.
         :rtype: :class:`semanticscholar.PaginatedResults.PaginatedResults` or 
             :class:`semanticscholar.Paper.Paper`
@@ -344,11 +617,139 @@ class SemanticScholar:
                 bulk=bulk,
                 sort=sort,
                 match_title=match_title,
+                offset=offset,
+                token=token,
             )
         )
 
         return results
 
+    def plan_bulk_search(
+        self,
+        query: str,
+        partitions: int = 8,
+        min_year: int = 1900,
+        max_year: int = None,
+        publication_types: list = None,
+        open_access_pdf: bool = None,
+        venue: list = None,
+        fields_of_study: list = None,
+        min_citation_count: int = None,
+    ) -> List[str]:
+        """
+        Split a bulk paper search into disjoint publication year ranges of
+        about the same number of results, to be retrieved in parallel.
+
+        Ranges are halved until none holds more than its share of the
+        total, or spans a single year. Years are not split, as date ranges
+        do not match papers with a year but no publication date. Each
+        split costs one request for the total of the first half.
+
+        :param str query: plain-text search query string.
+        :param int partitions: (optional) number of ranges to aim for.
+        :param int min_year: (optional) first publication year covered.
+        :param int max_year: (optional) last publication year covered,
+               the current year by default.
+        :param list publication_types: (optional) restrict results to the
+               given publication type list.
+        :param bool open_access_pdf: (optional) restrict results to papers
+               with public PDFs.
+        :param list venue: (optional) restrict results to the given venue list.
+        :param list fields_of_study: (optional) restrict results to given
+               field-of-study list, using the s2FieldsOfStudy paper field.
+        :param int min_citation_count: (optional) restrict results to papers
+               with at least the given number of citations.
+        :returns: publication_date_or_year ranges of years, in chronological
+                  order.
+        :rtype: :class:`List` of :class:`str`
+        """
+
+        loop = asyncio.get_event_loop()
+        ranges = loop.run_until_complete(
+            self._AsyncSemanticScholar.plan_bulk_search(
+                query=query,
+                partitions=partitions,
+                min_year=min_year,
+                max_year=max_year,
+                publication_types=publication_types,
+                open_access_pdf=open_access_pdf,
+                venue=venue,
+                fields_of_study=fields_of_study,
+                min_citation_count=min_citation_count,
+            )
+        )
+
+        return ranges
+
+    def harvest_bulk_search(
+        self,
+        query: str,
+        partitions: int = 8,
+        min_year: int = 1900,
+        max_year: int = None,
+        publication_types: list = None,
+        open_access_pdf: bool = None,
+        venue: list = None,
+        fields_of_study: list = None,
+        fields: list = None,
+        min_citation_count: int = None,
+        sort: str = None,
+    ) -> Iterator[Paper]:
+        """
+        Retrieve the results of a bulk paper search concurrently, from
+        publication year ranges planned by :meth:`plan_bulk_search`. The
+        token pagination of each range is sequential, but ranges are read
+        in parallel and their papers merged into one stream, in no
+        particular order. Ranges are disjoint, so each paper is retrieved
+        once.
+
+        Papers without publication date or year are not matched by any
+        range.
+
+        :param str query: plain-text search query string.
+        :param int partitions: (optional) number of ranges read in parallel.
+        :param int min_year: (optional) first publication year covered.
+        :param int max_year: (optional) last publication year covered,
+               the current year by default.
+        :param list publication_types: (optional) restrict results to the
+               given publication type list.
+        :param bool open_access_pdf: (optional) restrict results to papers
+               with public PDFs.
+        :param list venue: (optional) restrict results to the given venue list.
+        :param list fields_of_study: (optional) restrict results to given
+               field-of-study list, using the s2FieldsOfStudy paper field.
+        :param list fields: (optional) list of the fields to be returned.
+        :param int min_citation_count: (optional) restrict results to papers
+               with at least the given number of citations.
+        :param str sort: (optional) sorts the results of each range, using
+               <field>:<order> format.
+        :returns: papers, as they are retrieved.
+        :rtype: :class:`Iterator` of :class:`semanticscholar.Paper.Paper`
+        """
+
+        loop = asyncio.get_event_loop()
+        papers = self._AsyncSemanticScholar.harvest_bulk_search(
+            query=query,
+            partitions=partitions,
+            min_year=min_year,
+            max_year=max_year,
+            publication_types=publication_types,
+            open_access_pdf=open_access_pdf,
+            venue=venue,
+            fields_of_study=fields_of_study,
+            fields=fields,
+            min_citation_count=min_citation_count,
+            sort=sort,
+        )
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(papers.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(papers.aclose())
+
     def get_author(self, author_id: str, fields: list = None) -> Author:
         """
         Author lookup
@@ -399,7 +800,12 @@ class SemanticScholar:
         return authors
 
     def get_author_papers(
-        self, author_id: str, fields: list = None, limit: int = 100
+        self,
+        author_id: str,
+        fields: list = None,
+        limit: int = 100,
+        max_results: int = None,
+        offset: int = 0,
     ) -> PaginatedResults:
         """
         Get details about a author's papers
@@ -420,19 +826,31 @@ class SemanticScholar:
         :param list fields: (optional) list of the fields to be returned.
         :param int limit: (optional) maximum number of results to return 
                (must be <= 1000).
+        :param int max_results: (optional) maximum number of results to
+               fetch across all pages, no page being requested past it.
+        :param int offset: (optional) position of the first result to fetch.
         """
 
         loop = asyncio.get_event_loop()
         results = loop.run_until_complete(
             self._AsyncSemanticScholar.get_author_papers(
-                author_id=author_id, fields=fields, limit=limit
+                author_id=author_id,
+                fields=fields,
+                limit=limit,
+                max_results=max_results,
+                offset=offset,
             )
         )
 
         return results
 
     def search_author(
-        self, query: str, fields: list = None, limit: int = 100
+        self,
+        query: str,
+        fields: list = None,
+        limit: int = 100,
+        max_results: int = None,
+        offset: int = 0,
     ) -> PaginatedResults:
         """
         Search for authors by name
@@ -445,6 +863,9 @@ class SemanticScholar:
         :param list fields: (optional) list of the fields to be returned.
         :param int limit: (optional) maximum number of results to return 
                (must be <= 1000).
+        :param int max_results: (optional) maximum number of results to
+               fetch across all pages, no page being requested past it.
+        :param int offset: (optional) position of the first result to fetch.
         :returns: query results.
         :rtype: :class:`semanticscholar.PaginatedResults.PaginatedResults`
         """
@@ -452,7 +873,11 @@ class SemanticScholar:
         loop = asyncio.get_event_loop()
         results = loop.run_until_complete(
             self._AsyncSemanticScholar.search_author(
-                query=query, fields=fields, limit=limit
+                query=query,
+                fields=fields,
+                limit=limit,
+                max_results=max_results,
+                offset=offset,
             )
         )
 
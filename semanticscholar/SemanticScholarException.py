@@ -27,3 +27,12 @@ class InternalServerErrorException(ServerErrorException):
 
 class GatewayTimeoutException(ServerErrorException):
     """HTTP Status Code 504."""
+
+
+class CircuitOpenException(SemanticScholarException):
+    """Requests to a failing endpoint family are not sent while its circuit
+    is open."""
+
+
+class DownloadVerificationException(SemanticScholarException):
+    """Downloaded file does not match its expected size or checksum."""
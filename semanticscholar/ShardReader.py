@@ -0,0 +1,368 @@
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import zlib
+from typing import Any, Iterable, Iterator, List
+
+import httpx
+
+
+class ShardReader:
+    """
+    Reads the JSONL shards of a dataset, decompressing and parsing them in a
+    pool of worker processes, so that ``json.loads`` is not limited to a
+    single core. Each worker sends batches of records through a bounded
+    queue, which keeps memory use flat when the consumer is slower than the
+    workers.
+
+    Sources may be local files or URLs, such as the files of a
+    :class:`semanticscholar.Dataset.Dataset` or of a
+    :class:`semanticscholar.DatasetDiff.Diff`, and may be gzip compressed or
+    plain JSONL.
+    """
+
+    OUTPUTS = ("dict", "paper", "author", "arrow")
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        batch_size: int = 10000,
+        ordered: bool = True,
+        output: str = "dict",
+        queue_size: int = 2,
+        timeout: float = 60,
+        chunk_size: int = 1024 * 1024,
+        mp_context: str = None,
+    ) -> None:
+        """
+        :param int max_workers: (optional) number of worker processes,
+               defaults to the number of CPUs but one, which is left to the
+               consumer. With 0, shards are read in the calling process.
+        :param int batch_size: (optional) maximum number of records per
+               batch.
+        :param bool ordered: (optional) yield batches in the order of the
+               sources, otherwise as soon as they are parsed.
+        :param str output: (optional) type of the yielded records: 'dict',
+               'paper' or 'author' for :class:`semanticscholar.Paper.Paper`
+               and :class:`semanticscholar.Author.Author` objects built from
+               papers and authors dataset records, or 'arrow' for
+               ``pyarrow.RecordBatch`` batches (requires pyarrow).
+        :param int queue_size: (optional) batches each worker may parse ahead
+               of the consumer.
+        :param float timeout: (optional) an exception is raised if a source
+               URL has not sent data for timeout seconds.
+        :param int chunk_size: (optional) size of the compressed chunks read
+               from the sources.
+        :param str mp_context: (optional) multiprocessing start method.
+        """
+        if output not in self.OUTPUTS:
+            raise ValueError(
+                f"The output parameter must be one of {', '.join(self.OUTPUTS)}."
+            )
+        if output == "arrow":
+            _import_pyarrow()
+        if batch_size < 1:
+            raise ValueError("The batch_size parameter must be at least 1.")
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 1) - 1
+        self._max_workers = max_workers
+        self._batch_size = batch_size
+        self._ordered = ordered
+        self._output = output
+        self._queue_size = queue_size
+        self._timeout = timeout
+        self._chunk_size = chunk_size
+        self._context = multiprocessing.get_context(mp_context)
+
+    @property
+    def max_workers(self) -> int:
+        """
+        Number of worker processes.
+
+        :type: :class:`int`
+        """
+        return self._max_workers
+
+    @property
+    def batch_size(self) -> int:
+        """
+        Maximum number of records per batch.
+
+        :type: :class:`int`
+        """
+        return self._batch_size
+
+    @property
+    def ordered(self) -> bool:
+        """
+        Whether batches are yielded in the order of the sources.
+
+        :type: :class:`bool`
+        """
+        return self._ordered
+
+    @property
+    def output(self) -> str:
+        """
+        Type of the yielded records.
+
+        :type: :class:`str`
+        """
+        return self._output
+
+    def iter_batches(self, sources: Iterable[str]) -> Iterator[Any]:
+        """
+        Read the sources and yield their records in batches. Batches never
+        span two sources.
+
+        :param sources: paths or URLs of gzip or plain JSONL shards.
+        :returns: lists of records, or ``pyarrow.RecordBatch`` objects if the
+                  output is 'arrow'.
+        """
+        sources = list(sources)
+        settings = (self._batch_size, self._output, self._timeout, self._chunk_size)
+        workers = min(self._max_workers, len(sources))
+        if workers == 0:
+            for source in sources:
+                yield from _read_batches(source, *settings)
+        elif self._ordered:
+            yield from self._iter_ordered(sources, workers, settings)
+        else:
+            yield from self._iter_unordered(sources, workers, settings)
+
+    def iter_records(self, sources: Iterable[str]) -> Iterator[Any]:
+        """
+        Read the sources and yield their records one by one.
+
+        :param sources: paths or URLs of gzip or plain JSONL shards.
+        :returns: records, or rows as dicts if the output is 'arrow'.
+        """
+        for batch in self.iter_batches(sources):
+            if self._output == "arrow":
+                yield from batch.to_pylist()
+            else:
+                yield from batch
+
+    @staticmethod
+    def read_shard(source: str, timeout: float = 60) -> Iterator[dict]:
+        """
+        Read the records of a single shard in the calling process.
+
+        :param str source: path or URL of a gzip or plain JSONL shard.
+        :param float timeout: (optional) an exception is raised if a source
+               URL has not sent data for timeout seconds.
+        :returns: records of the shard.
+        """
+        for line in _iter_lines(source, timeout, 1024 * 1024):
+            yield json.loads(line)
+
+    @staticmethod
+    def read_data(source: str, timeout: float = 60) -> Iterator[bytes]:
+        """
+        Read the content of a single shard in the calling process,
+        decompressed if needed.
+
+        :param str source: path or URL of a gzip or plain JSONL shard.
+        :param float timeout: (optional) an exception is raised if a source
+               URL has not sent data for timeout seconds.
+        :returns: chunks of the decompressed content.
+        """
+        return _iter_data(source, timeout, 1024 * 1024)
+
+    def _iter_ordered(
+        self, sources: List[str], workers: int, settings: tuple
+    ) -> Iterator[Any]:
+        # Shards are dealt round robin and each worker reads its own in
+        # order, so the batches of shard i are the next ones in the queue of
+        # worker i % workers.
+        queues = [self._context.Queue(self._queue_size) for _ in range(workers)]
+        processes = [
+            self._context.Process(
+                target=_worker,
+                args=(list(enumerate(sources))[w::workers], queues[w], settings),
+                daemon=True,
+            )
+            for w in range(workers)
+        ]
+        try:
+            for process in processes:
+                process.start()
+            for index in range(len(sources)):
+                results = queues[index % workers]
+                while True:
+                    kind, payload = self._receive(results, processes)[1:]
+                    if kind == "done":
+                        break
+                    yield payload
+        finally:
+            self._stop(processes, queues)
+
+    def _iter_unordered(
+        self, sources: List[str], workers: int, settings: tuple
+    ) -> Iterator[Any]:
+        tasks = self._context.Queue()
+        for task in enumerate(sources):
+            tasks.put(task)
+        for _ in range(workers):
+            tasks.put(None)
+        results = self._context.Queue(self._queue_size * workers)
+        processes = [
+            self._context.Process(
+                target=_worker, args=(tasks, results, settings), daemon=True
+            )
+            for _ in range(workers)
+        ]
+        try:
+            for process in processes:
+                process.start()
+            remaining = len(sources)
+            while remaining:
+                kind, payload = self._receive(results, processes)[1:]
+                if kind == "done":
+                    remaining -= 1
+                else:
+                    yield payload
+        finally:
+            self._stop(processes, [tasks, results])
+
+    @staticmethod
+    def _receive(results, processes: list) -> tuple:
+        while True:
+            try:
+                message = results.get(timeout=1)
+            except queue.Empty:
+                exitcodes = [p.exitcode for p in processes]
+                if None not in exitcodes or set(exitcodes) - {None, 0}:
+                    raise RuntimeError("A shard reader worker exited unexpectedly.")
+                continue
+            if message[1] == "error":
+                raise message[2]
+            return message
+
+    @staticmethod
+    def _stop(processes: list, queues: list) -> None:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            if process.pid is not None:
+                process.join()
+        for q in queues:
+            q.cancel_join_thread()
+            q.close()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError(
+            "Arrow output requires pyarrow, install it with "
+            "pip install semanticscholar[arrow]."
+        ) from error
+    return pyarrow
+
+
+def _worker(tasks, results, settings: tuple) -> None:
+    if isinstance(tasks, list):
+        tasks = iter(tasks + [None])
+        next_task = tasks.__next__
+    else:
+        next_task = tasks.get
+    while True:
+        task = next_task()
+        if task is None:
+            return
+        index, source = task
+        try:
+            for batch in _read_batches(source, *settings):
+                results.put((index, "batch", batch))
+        except Exception as error:
+            try:
+                pickle.dumps(error)
+            except Exception:
+                error = RuntimeError(f"{source}: {error!r}")
+            results.put((index, "error", error))
+            return
+        results.put((index, "done", None))
+
+
+def _read_batches(
+    source: str, batch_size: int, output: str, timeout: float, chunk_size: int
+) -> Iterator[Any]:
+    convert = _converter(output)
+    batch = []
+    for line in _iter_lines(source, timeout, chunk_size):
+        batch.append(json.loads(line))
+        if len(batch) >= batch_size:
+            yield convert(batch)
+            batch = []
+    if batch:
+        yield convert(batch)
+
+
+def _converter(output: str):
+    # Imported here because the stores import this module, and the models
+    # are only needed by the workers.
+    if output == "paper":
+        from semanticscholar.LocalCorpus import LocalCorpus
+        from semanticscholar.Paper import Paper
+
+        return lambda batch: [Paper(LocalCorpus.paper_data(r)) for r in batch]
+    if output == "author":
+        from semanticscholar.Author import Author
+        from semanticscholar.LocalCorpus import LocalCorpus
+
+        return lambda batch: [Author(LocalCorpus.author_data(r)) for r in batch]
+    if output == "arrow":
+        return _import_pyarrow().RecordBatch.from_pylist
+    return lambda batch: batch
+
+
+def _iter_chunks(source: str, timeout: float, chunk_size: int) -> Iterator[bytes]:
+    if source.startswith(("http://", "https://")):
+        with httpx.stream(
+            "GET", source, timeout=timeout, follow_redirects=True
+        ) as response:
+            response.raise_for_status()
+            yield from response.iter_bytes(chunk_size)
+    else:
+        with open(source, "rb") as file:
+            while chunk := file.read(chunk_size):
+                yield chunk
+
+
+def _iter_data(source: str, timeout: float, chunk_size: int) -> Iterator[bytes]:
+    # Decompress while streaming so memory use does not depend on the size
+    # of the shard. wbits=47 accepts both gzip and zlib headers.
+    decompressor = None
+    for chunk in _iter_chunks(source, timeout, chunk_size):
+        if decompressor is None:
+            compressed = chunk[:2] == b"\x1f\x8b"
+            decompressor = zlib.decompressobj(wbits=47) if compressed else False
+        if not decompressor:
+            yield chunk
+            continue
+        data = decompressor.decompress(chunk)
+        while decompressor.eof and decompressor.unused_data:
+            # Concatenated gzip members.
+            unused = decompressor.unused_data
+            decompressor = zlib.decompressobj(wbits=47)
+            data += decompressor.decompress(unused)
+        yield data
+    if decompressor:
+        yield decompressor.flush()
+
+
+def _iter_lines(source: str, timeout: float, chunk_size: int) -> Iterator[bytes]:
+    pending = b""
+    for data in _iter_data(source, timeout, chunk_size):
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
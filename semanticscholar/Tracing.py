@@ -0,0 +1,86 @@
+from functools import wraps
+from typing import Any, Callable, Dict
+
+
+def get_tracer(name: str = "semanticscholar") -> Any:
+    """
+    OpenTelemetry tracer of the global tracer provider, to pass as the
+    ``tracer`` of a client.
+
+    :param str name: (optional) instrumentation scope name.
+    :rtype: :class:`opentelemetry.trace.Tracer`
+    :raises: ImportError: if the OpenTelemetry API is not installed.
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError as error:
+        raise ImportError(
+            "Tracing requires OpenTelemetry, install it with "
+            "pip install semanticscholar[otel]."
+        ) from error
+    return trace.get_tracer(name)
+
+
+def start_span(
+    tracer: Any, name: str, attributes: Dict[str, Any] = None, client: bool = False
+) -> Any:
+    """
+    Context manager of a span made the current one, recording any exception
+    raised within it.
+
+    :param tracer: OpenTelemetry tracer.
+    :param str name: span name.
+    :param dict attributes: (optional) initial span attributes.
+    :param bool client: (optional) whether the span is an outgoing request.
+    """
+    kwargs = {}
+    if client:
+        from opentelemetry.trace import SpanKind
+
+        kwargs["kind"] = SpanKind.CLIENT
+    return tracer.start_as_current_span(name, attributes=attributes, **kwargs)
+
+
+def result_attributes(result: Any) -> Dict[str, Any]:
+    """
+    Span attributes describing the result of a client method.
+
+    :param result: returned object.
+    :rtype: :class:`dict`
+    """
+    if isinstance(result, tuple) and len(result) == 2:
+        items, not_found = result
+        return {
+            "semanticscholar.item_count": len(items),
+            "semanticscholar.not_found_count": len(not_found),
+        }
+    if isinstance(result, list):
+        return {"semanticscholar.item_count": len(result)}
+    if hasattr(result, "total") and hasattr(result, "items"):
+        return {
+            "semanticscholar.item_count": len(result.items),
+            "semanticscholar.total": result.total,
+        }
+    return {}
+
+
+def traced(method: Callable) -> Callable:
+    """
+    Decorator of the coroutine methods of
+    :class:`semanticscholar.AsyncSemanticScholar.AsyncSemanticScholar`
+    wrapping each call in a span named after the method, parent of the
+    page and request spans. Without tracer, the method is awaited directly.
+    """
+    name = f"semanticscholar.{method.__name__}"
+
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        tracer = self._requester.tracer
+        if tracer is None:
+            return await method(self, *args, **kwargs)
+        with start_span(tracer, name) as span:
+            result = await method(self, *args, **kwargs)
+            span.set_attributes(result_attributes(result))
+            return result
+
+    return wrapper
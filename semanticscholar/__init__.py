@@ -1,6 +1,148 @@
-from .AsyncSemanticScholar import AsyncSemanticScholar as AsyncSemanticScholar
-from .Dataset import Dataset as Dataset
-from .Release import Release as Release
-from .SemanticScholar import SemanticScholar as SemanticScholar
-from .SnippetSearchResult import Snippet as Snippet
-from .SnippetSearchResult import SnippetSearchResult as SnippetSearchResult
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .ApiEmulator import ApiEmulator as ApiEmulator
+    from .ApiKeyPool import ApiKeyPool as ApiKeyPool
+    from .AsyncSemanticScholar import AsyncSemanticScholar as AsyncSemanticScholar
+    from .Backend import Backend as Backend
+    from .CitationGraph import CitationGraph as CitationGraph
+    from .CircuitBreaker import CircuitBreaker as CircuitBreaker
+    from .ConcurrencyLimiter import ConcurrencyLimiter as ConcurrencyLimiter
+    from .CorpusIndex import CorpusIndex as CorpusIndex
+    from .Dataset import Dataset as Dataset
+    from .DatasetDownloader import DatasetDownloader as DatasetDownloader
+    from .DatasetStore import DatasetStore as DatasetStore
+    from .DatasetUpdater import DatasetUpdater as DatasetUpdater
+    from .EmbeddingStore import EmbeddingStore as EmbeddingStore
+    from .HedgePolicy import HedgePolicy as HedgePolicy
+    from .Instrumentation import Instrumentation as Instrumentation
+    from .Instrumentation import RequestEvent as RequestEvent
+    from .LocalCorpus import LocalCorpus as LocalCorpus
+    from .LocalMirror import LocalMirror as LocalMirror
+    from .LocalRecommender import LocalRecommender as LocalRecommender
+    from .Metrics import Metrics as Metrics
+    from .PaperEmbeddings import PaperEmbeddings as PaperEmbeddings
+    from .RateLimiter import FileRateBackend as FileRateBackend
+    from .RateLimiter import MemoryRateBackend as MemoryRateBackend
+    from .RateLimiter import RateBackend as RateBackend
+    from .RateLimiter import RateLimiter as RateLimiter
+    from .RateLimiter import RedisRateBackend as RedisRateBackend
+    from .Release import Release as Release
+    from .RequestLogger import RequestLogger as RequestLogger
+    from .SemanticScholar import SemanticScholar as SemanticScholar
+    from .ShardReader import ShardReader as ShardReader
+    from .SnippetSearchResult import Snippet as Snippet
+    from .SnippetSearchResult import SnippetSearchResult as SnippetSearchResult
+
+# Exported names and their modules, imported on first access so that
+# importing the package, or one of its modules, does not load httpx,
+# tenacity and every client and model module.
+_EXPORTS = {
+    "ApiEmulator": "ApiEmulator",
+    "ApiKeyPool": "ApiKeyPool",
+    "AsyncSemanticScholar": "AsyncSemanticScholar",
+    "Backend": "Backend",
+    "CitationGraph": "CitationGraph",
+    "CircuitBreaker": "CircuitBreaker",
+    "ConcurrencyLimiter": "ConcurrencyLimiter",
+    "CorpusIndex": "CorpusIndex",
+    "Dataset": "Dataset",
+    "DatasetDownloader": "DatasetDownloader",
+    "DatasetStore": "DatasetStore",
+    "DatasetUpdater": "DatasetUpdater",
+    "EmbeddingStore": "EmbeddingStore",
+    "HedgePolicy": "HedgePolicy",
+    "Instrumentation": "Instrumentation",
+    "RequestEvent": "Instrumentation",
+    "LocalCorpus": "LocalCorpus",
+    "LocalMirror": "LocalMirror",
+    "LocalRecommender": "LocalRecommender",
+    "Metrics": "Metrics",
+    "PaperEmbeddings": "PaperEmbeddings",
+    "FileRateBackend": "RateLimiter",
+    "MemoryRateBackend": "RateLimiter",
+    "RateBackend": "RateLimiter",
+    "RateLimiter": "RateLimiter",
+    "RedisRateBackend": "RateLimiter",
+    "Release": "Release",
+    "RequestLogger": "RequestLogger",
+    "SemanticScholar": "SemanticScholar",
+    "ShardReader": "ShardReader",
+    "Snippet": "SnippetSearchResult",
+    "SnippetSearchResult": "SnippetSearchResult",
+}
+
+__all__ = [
+    "ApiEmulator",
+    "ApiKeyPool",
+    "AsyncSemanticScholar",
+    "Backend",
+    "CircuitBreaker",
+    "CitationGraph",
+    "ConcurrencyLimiter",
+    "CorpusIndex",
+    "Dataset",
+    "DatasetDownloader",
+    "DatasetStore",
+    "DatasetUpdater",
+    "EmbeddingStore",
+    "FileRateBackend",
+    "HedgePolicy",
+    "Instrumentation",
+    "LocalCorpus",
+    "LocalMirror",
+    "LocalRecommender",
+    "MemoryRateBackend",
+    "Metrics",
+    "PaperEmbeddings",
+    "RateBackend",
+    "RateLimiter",
+    "RedisRateBackend",
+    "Release",
+    "RequestEvent",
+    "RequestLogger",
+    "SemanticScholar",
+    "ShardReader",
+    "Snippet",
+    "SnippetSearchResult",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+class _Package(types.ModuleType):
+    """
+    Type of this package, keeping its exports bound to the classes.
+
+    Importing a submodule, e.g. ``import semanticscholar.SemanticScholar``,
+    binds it to the package under its own name, which is also the name of
+    the class it exports. When the package imported every module eagerly,
+    its own imports rebound these names to the classes afterwards. Here the
+    binding of a module to an exported name is skipped instead, so that
+    ``semanticscholar.SemanticScholar`` is the class whatever was imported
+    before. The module itself stays in ``sys.modules``, and
+    ``from semanticscholar.SemanticScholar import SemanticScholar`` is
+    unaffected.
+    """
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _EXPORTS and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
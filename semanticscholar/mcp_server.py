@@ -1,18 +1,151 @@
+import asyncio
+import base64
 import json
 import os
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, List, Optional
 
 from mcp.server.fastmcp import FastMCP
 
-from semanticscholar.SemanticScholar import SemanticScholar
+if TYPE_CHECKING:
+    from semanticscholar.AsyncSemanticScholar import AsyncSemanticScholar
 
 mcp = FastMCP("semanticscholar")
 
-_api_key = os.environ.get("S2_API_KEY")
-_sch = SemanticScholar(api_key=_api_key)
+# Created by the first tool call, so that starting the server does not load
+# the client modules.
+_sch = None
+
+
+def _client() -> "AsyncSemanticScholar":
+    global _sch
+    if _sch is None:
+        import httpx
+
+        from semanticscholar.ApiKeyPool import ApiKeyPool
+        from semanticscholar.AsyncSemanticScholar import AsyncSemanticScholar
+        from semanticscholar.ConcurrencyLimiter import ConcurrencyLimiter
+
+        # Tools run concurrently on the server's event loop and share the
+        # pooled connections of a single HTTP client, with as many requests
+        # in flight as the API sustains.
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+        # Several comma-separated keys are pooled.
+        keys = os.environ.get("S2_API_KEY", "").split(",")
+        keys = [key.strip() for key in keys if key.strip()]
+        _sch = AsyncSemanticScholar(
+            api_key=keys[0] if len(keys) == 1 else None,
+            http_client=http_client,
+            concurrency_limiter=ConcurrencyLimiter(max_limit=20),
+            api_key_pool=ApiKeyPool(keys) if len(keys) > 1 else None,
+        )
+    return _sch
+
 
 ABSTRACT_MAX = 300
 
+# Fields emitted by _paper_to_dict and _author_to_dict, the only ones requested
+# for single lookups.
+PAPER_FIELDS = [
+    "abstract",
+    "authors",
+    "citationCount",
+    "externalIds",
+    "openAccessPdf",
+    "publicationDate",
+    "title",
+    "tldr",
+    "url",
+    "venue",
+    "year",
+]
+AUTHOR_FIELDS = [
+    "affiliations",
+    "citationCount",
+    "hIndex",
+    "name",
+    "paperCount",
+    "url",
+]
+
+CACHE_TTL = float(os.environ.get("S2_MCP_CACHE_TTL", "600"))
+CACHE_SIZE = 1024
+
+
+class _TTLCache:
+    """
+    Least recently used entries expiring ttl seconds after being stored.
+    """
+
+    def __init__(self, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key: Any) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_cache = _TTLCache(CACHE_TTL, CACHE_SIZE)
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _chunks(ids: List[str], size: int) -> List[List[str]]:
+    return [ids[start : start + size] for start in range(0, len(ids), size)]
+
+
+def _encode_cursor(tool: str, key: list, offset: int) -> str:
+    data = _dumps([tool, key, offset]).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: Optional[str], tool: str, key: list) -> int:
+    # A cursor is only valid for the tool and arguments that returned it.
+    if cursor is None:
+        return 0
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_tool, cursor_key, offset = json.loads(data)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+    if cursor_tool != tool or cursor_key != key:
+        raise ValueError("Invalid cursor.")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor.")
+    return offset
+
+
+def _page(tool: str, key: list, start: int, results, count: int, data: dict) -> str:
+    # The API reports the offset of the next page, if there is one.
+    if results.next:
+        data["nextCursor"] = _encode_cursor(tool, key, start + count)
+    return _dumps(data)
+
 
 def _truncate(text: str, max_len: int = ABSTRACT_MAX) -> str:
     if text and len(text) > max_len:
@@ -69,13 +202,14 @@ def _author_to_dict(author) -> dict:
 
 
 @mcp.tool()
-def search_papers(
+async def search_papers(
     query: str,
     year: Optional[str] = None,
     fields_of_study: Optional[str] = None,
     publication_date_or_year: Optional[str] = None,
     min_citation_count: Optional[int] = None,
     limit: int = 10,
+    cursor: Optional[str] = None,
 ) -> str:
     """Search for papers by keyword query.
 
@@ -86,47 +220,119 @@ def search_papers(
         publication_date_or_year: Date range "YYYY-MM-DD:YYYY-MM-DD"
         min_citation_count: Minimum citations filter
         limit: Max results (1-100, default 10)
+        cursor: nextCursor of the previous call, to get the next results
     """
+    key = [query, year, fields_of_study, publication_date_or_year, min_citation_count]
+    start = _decode_cursor(cursor, "search_papers", key)
     fos = fields_of_study.split(",") if fields_of_study else None
-    results = _sch.search_paper(
+    results = await _client().search_paper(
         query,
         year=year,
         fields_of_study=fos,
         publication_date_or_year=publication_date_or_year,
         min_citation_count=min_citation_count,
         limit=min(limit, 100),
+        offset=start,
+    )
+    items = results[:limit]
+    papers = [_paper_to_dict(p) for p in items]
+    return _page(
+        "search_papers",
+        key,
+        start,
+        results,
+        len(items),
+        {"total": results.total, "papers": papers},
     )
-    papers = [_paper_to_dict(p) for p in results[:limit]]
-    return json.dumps({"total": results.total, "papers": papers}, indent=2)
 
 
 @mcp.tool()
-def get_paper(paper_id: str) -> str:
+async def get_paper(paper_id: str) -> str:
     """Get detailed information about a specific paper.
 
     Args:
         paper_id: S2PaperId, DOI, ArXivId, CorpusId, ACL, PMID, PMCID, or URL
     """
-    paper = _sch.get_paper(paper_id)
-    return json.dumps(_paper_to_dict(paper), indent=2)
+    key = ("paper", paper_id)
+    data = _cache.get(key)
+    if data is None:
+        paper = await _client().get_paper(paper_id, fields=PAPER_FIELDS)
+        data = _paper_to_dict(paper)
+        _cache.set(key, data)
+    return _dumps(data)
+
+
+@mcp.tool()
+async def get_papers_batch(paper_ids: List[str]) -> str:
+    """Get information about many papers at once, in one or a few requests.
+
+    Prefer this over repeated get_paper calls. IDs not found are listed in
+    notFound.
+
+    Args:
+        paper_ids: Paper identifiers (S2PaperId, DOI, ArXivId, CorpusId, ACL,
+            PMID, PMCID, or URL), any number
+    """
+    paper_ids = list(dict.fromkeys(paper_ids))
+    papers = {}
+    missing_ids = []
+    for paper_id in paper_ids:
+        data = _cache.get(("paper", paper_id))
+        if data is None:
+            missing_ids.append(paper_id)
+        else:
+            papers[paper_id] = data
+    not_found = []
+    chunks = list(_chunks(missing_ids, 500))
+    results = await asyncio.gather(
+        *(
+            _client().get_papers(chunk, fields=PAPER_FIELDS, return_not_found=True)
+            for chunk in chunks
+        )
+    )
+    for chunk, (found, chunk_not_found) in zip(chunks, results):
+        # Papers found are in the order of their IDs, which may be DOIs or
+        # other external IDs rather than paperIds.
+        skipped = set(chunk_not_found)
+        requested = [paper_id for paper_id in chunk if paper_id not in skipped]
+        if len(requested) != len(found):
+            requested = [paper.paperId for paper in found]
+        for paper_id, paper in zip(requested, found):
+            # Cached under the requested ID, as get_paper does, and the
+            # paperId.
+            data = _paper_to_dict(paper)
+            _cache.set(("paper", paper_id), data)
+            _cache.set(("paper", paper.paperId), data)
+            papers[paper_id] = data
+        not_found += chunk_not_found
+    ordered = [papers.pop(paper_id) for paper_id in paper_ids if paper_id in papers]
+    return _dumps({"papers": ordered + list(papers.values()), "notFound": not_found})
 
 
 @mcp.tool()
-def get_paper_citations(
+async def get_paper_citations(
     paper_id: str,
     limit: int = 20,
+    cursor: Optional[str] = None,
 ) -> str:
     """Get papers that cite the given paper.
 
     Args:
         paper_id: Paper identifier
         limit: Max results (1-1000, default 20)
+        cursor: nextCursor of the previous call, to get the next results
     """
-    results = _sch.get_paper_citations(
-        paper_id, fields=["title"], limit=min(limit, 1000)
+    start = _decode_cursor(cursor, "get_paper_citations", [paper_id])
+    results = await _client().get_paper_citations(
+        paper_id,
+        fields=["title"],
+        limit=min(limit, 1000),
+        max_results=limit,
+        offset=start,
     )
+    items = await results.async_take(limit)
     citations = []
-    for item in list(results)[:limit]:
+    for item in items:
         if item.paper:
             citations.append(
                 {
@@ -134,25 +340,40 @@ def get_paper_citations(
                     "title": item.paper.title,
                 }
             )
-    return json.dumps({"total": len(results), "citations": citations}, indent=2)
+    return _page(
+        "get_paper_citations",
+        [paper_id],
+        start,
+        results,
+        len(items),
+        {"count": len(items), "citations": citations},
+    )
 
 
 @mcp.tool()
-def get_paper_references(
+async def get_paper_references(
     paper_id: str,
     limit: int = 20,
+    cursor: Optional[str] = None,
 ) -> str:
     """Get papers referenced by the given paper.
 
     Args:
         paper_id: Paper identifier
         limit: Max results (1-1000, default 20)
+        cursor: nextCursor of the previous call, to get the next results
     """
-    results = _sch.get_paper_references(
-        paper_id, fields=["title"], limit=min(limit, 1000)
+    start = _decode_cursor(cursor, "get_paper_references", [paper_id])
+    results = await _client().get_paper_references(
+        paper_id,
+        fields=["title"],
+        limit=min(limit, 1000),
+        max_results=limit,
+        offset=start,
     )
+    items = await results.async_take(limit)
     references = []
-    for item in list(results)[:limit]:
+    for item in items:
         if item.paper:
             references.append(
                 {
@@ -160,11 +381,18 @@ def get_paper_references(
                     "title": item.paper.title,
                 }
             )
-    return json.dumps({"total": len(results), "references": references}, indent=2)
+    return _page(
+        "get_paper_references",
+        [paper_id],
+        start,
+        results,
+        len(items),
+        {"count": len(items), "references": references},
+    )
 
 
 @mcp.tool()
-def search_snippets(
+async def search_snippets(
     query: str,
     year: Optional[str] = None,
     fields_of_study: Optional[str] = None,
@@ -185,7 +413,7 @@ def search_snippets(
         limit: Max results (1-1000, default 10)
     """
     fos = fields_of_study.split(",") if fields_of_study else None
-    results = _sch.search_snippet(
+    results = await _client().search_snippet(
         query,
         year=year,
         fields_of_study=fos,
@@ -209,54 +437,127 @@ def search_snippets(
                 "section": r.snippet.section,
             }
         items.append(item)
-    return json.dumps({"results": items}, indent=2)
+    return _dumps({"results": items})
 
 
 @mcp.tool()
-def search_authors(
+async def search_authors(
     query: str,
     limit: int = 10,
+    cursor: Optional[str] = None,
 ) -> str:
     """Search for authors by name.
 
     Args:
         query: Author name query
         limit: Max results (1-1000, default 10)
+        cursor: nextCursor of the previous call, to get the next results
     """
-    results = _sch.search_author(query, limit=min(limit, 1000))
-    authors = [_author_to_dict(a) for a in list(results)[:limit]]
-    return json.dumps({"total": results.total, "authors": authors}, indent=2)
+    start = _decode_cursor(cursor, "search_authors", [query])
+    results = await _client().search_author(
+        query, limit=min(limit, 1000), max_results=limit, offset=start
+    )
+    items = await results.async_take(limit)
+    authors = [_author_to_dict(a) for a in items]
+    return _page(
+        "search_authors",
+        [query],
+        start,
+        results,
+        len(items),
+        {"total": results.total, "authors": authors},
+    )
 
 
 @mcp.tool()
-def get_author(author_id: str) -> str:
+async def get_author(author_id: str) -> str:
     """Get detailed information about an author.
 
     Args:
         author_id: Semantic Scholar author ID
     """
-    author = _sch.get_author(author_id)
-    return json.dumps(_author_to_dict(author), indent=2)
+    key = ("author", author_id)
+    data = _cache.get(key)
+    if data is None:
+        author = await _client().get_author(author_id, fields=AUTHOR_FIELDS)
+        data = _author_to_dict(author)
+        _cache.set(key, data)
+    return _dumps(data)
 
 
 @mcp.tool()
-def get_author_papers(
+async def get_authors_batch(author_ids: List[str]) -> str:
+    """Get information about many authors at once, in one or a few requests.
+
+    Prefer this over repeated get_author calls. IDs not found are listed in
+    notFound.
+
+    Args:
+        author_ids: Semantic Scholar author IDs, any number
+    """
+    author_ids = list(dict.fromkeys(author_ids))
+    authors = {}
+    missing_ids = []
+    for author_id in author_ids:
+        data = _cache.get(("author", author_id))
+        if data is None:
+            missing_ids.append(author_id)
+        else:
+            authors[author_id] = data
+    not_found = []
+    chunks = list(_chunks(missing_ids, 1000))
+    results = await asyncio.gather(
+        *(
+            _client().get_authors(chunk, fields=AUTHOR_FIELDS, return_not_found=True)
+            for chunk in chunks
+        )
+    )
+    for chunk, (found, chunk_not_found) in zip(chunks, results):
+        skipped = set(chunk_not_found)
+        requested = [author_id for author_id in chunk if author_id not in skipped]
+        if len(requested) != len(found):
+            requested = [author.authorId for author in found]
+        for author_id, author in zip(requested, found):
+            data = _author_to_dict(author)
+            _cache.set(("author", author_id), data)
+            _cache.set(("author", author.authorId), data)
+            authors[author_id] = data
+        not_found += chunk_not_found
+    ordered = [authors[author_id] for author_id in author_ids if author_id in authors]
+    return _dumps({"authors": ordered, "notFound": not_found})
+
+
+@mcp.tool()
+async def get_author_papers(
     author_id: str,
     limit: int = 20,
+    cursor: Optional[str] = None,
 ) -> str:
     """Get papers by a specific author.
 
     Args:
         author_id: Semantic Scholar author ID
         limit: Max results (1-1000, default 20)
+        cursor: nextCursor of the previous call, to get the next results
     """
-    results = _sch.get_author_papers(author_id, limit=min(limit, 1000))
-    papers = [_paper_to_dict(p) for p in list(results)[:limit]]
-    return json.dumps({"total": len(results), "papers": papers}, indent=2)
+    start = _decode_cursor(cursor, "get_author_papers", [author_id])
+    results = await _client().get_author_papers(
+        author_id, limit=min(limit, 1000), max_results=limit, offset=start
+    )
+    items = await results.async_take(limit)
+    papers = [_paper_to_dict(p) for p in items]
+    return _page(
+        "get_author_papers",
+        [author_id],
+        start,
+        results,
+        len(items),
+        {"count": len(items), "papers": papers},
+    )
 
 
 @mcp.tool()
-def get_recommendations(
+async def get_recommendations(
     paper_id: str,
     limit: int = 10,
 ) -> str:
@@ -266,9 +567,9 @@ def get_recommendations(
         paper_id: Paper identifier
         limit: Max results (1-500, default 10)
     """
-    results = _sch.get_recommended_papers(paper_id, limit=min(limit, 500))
+    results = await _client().get_recommended_papers(paper_id, limit=min(limit, 500))
     papers = [_paper_to_dict(p) for p in results[:limit]]
-    return json.dumps({"papers": papers}, indent=2)
+    return _dumps({"papers": papers})
 
 
 def main():
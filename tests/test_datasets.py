@@ -0,0 +1,993 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import httpx
+import numpy
+
+from semanticscholar.AsyncSemanticScholar import AsyncSemanticScholar
+from semanticscholar.Author import Author
+from semanticscholar.CitationGraph import CitationGraph
+from semanticscholar.CorpusIndex import CorpusIndex
+from semanticscholar.Dataset import Dataset
+from semanticscholar.DatasetDiff import DatasetDiff
+from semanticscholar.DatasetDownloader import DatasetDownloader
+from semanticscholar.DatasetStore import DatasetStore
+from semanticscholar.DatasetUpdater import DatasetUpdater
+from semanticscholar.EmbeddingStore import EmbeddingStore
+from semanticscholar.LocalCorpus import LocalCorpus
+from semanticscholar.LocalMirror import LocalMirror
+from semanticscholar.LocalRecommender import LocalRecommender
+from semanticscholar.Paper import Paper
+from semanticscholar.PaperEmbeddings import PaperEmbeddings
+from semanticscholar.SemanticScholarException import DownloadVerificationException
+from semanticscholar.ShardReader import ShardReader
+
+
+class _FileHandler(BaseHTTPRequestHandler):
+    """Serves ``server.files`` with ETag and single byte range support."""
+
+    def do_GET(self):
+        name = self.path.split("?")[0].lstrip("/")
+        self.server.requests.append((name, self.headers.get("Range")))
+        if name not in self.server.files:
+            self.send_error(404)
+            return
+        body = self.server.files[name]
+        etag = self.server.etags.get(name, f'"{hashlib.md5(body).hexdigest()}"')
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and (if_range is None or if_range == etag):
+            start = int(re.match(r"bytes=(\d+)-", range_header).group(1))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}"
+            )
+            body = body[start:]
+        else:
+            self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalFileServer:
+    def __init__(self, files: dict) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FileHandler)
+        self.server.files = files
+        self.server.etags = {}
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def requests(self) -> list:
+        return self.server.requests
+
+    def url(self, name: str) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/{name}?X-Amz-Signature=secret"
+
+
+class DatasetDownloaderTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = {
+            "papers_0.gz": os.urandom(300_000),
+            "papers_1.gz": os.urandom(120_000),
+        }
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _dataset(self, server: LocalFileServer) -> Dataset:
+        return Dataset(
+            {"name": "papers", "files": [server.url(name) for name in self.files]}
+        )
+
+    def _read(self, path: str) -> bytes:
+        with open(path, "rb") as file:
+            return file.read()
+
+    async def test_download_failure_cancels_other_files(self):
+        downloader = DatasetDownloader(self.tmp.name, max_concurrency=2)
+        cancelled = []
+
+        async def fetch_file(client, url, *args):
+            if "papers_0" in url:
+                await asyncio.sleep(0)
+                raise ValueError("Bad file.")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+
+        with LocalFileServer(self.files) as server:
+            with mock.patch.object(downloader, "_fetch_file", side_effect=fetch_file):
+                with self.assertRaises(ValueError):
+                    await downloader.download(self._dataset(server), "2025-08-19")
+            self.assertEqual(cancelled, [server.url("papers_1.gz")])
+
+    async def test_download(self):
+        downloader = DatasetDownloader(self.tmp.name, max_concurrency=2)
+        with LocalFileServer(self.files) as server:
+            paths = await downloader.download(self._dataset(server), "2025-08-19")
+        self.assertEqual(
+            paths,
+            [
+                os.path.join(self.tmp.name, "2025-08-19", "papers", n)
+                for n in self.files
+            ],
+        )
+        for path, name in zip(paths, self.files):
+            self.assertEqual(self._read(path), self.files[name])
+        manifest = downloader.load_manifest("2025-08-19")
+        entry = manifest["datasets"]["papers"]["papers_0.gz"]
+        self.assertTrue(entry["complete"])
+        self.assertEqual(entry["size"], len(self.files["papers_0.gz"]))
+        self.assertNotIn("secret", json.dumps(manifest))
+
+    async def test_download_skips_complete_files(self):
+        downloader = DatasetDownloader(self.tmp.name)
+        with LocalFileServer(self.files) as server:
+            await downloader.download(self._dataset(server), "2025-08-19")
+            server.requests.clear()
+            await downloader.download(self._dataset(server), "2025-08-19")
+            self.assertEqual(server.requests, [])
+
+    async def test_download_resumes_partial_file(self):
+        downloader = DatasetDownloader(self.tmp.name)
+        directory = os.path.join(self.tmp.name, "2025-08-19", "papers")
+        os.makedirs(directory)
+        with open(os.path.join(directory, "papers_0.gz.part"), "wb") as file:
+            file.write(self.files["papers_0.gz"][:1000])
+        with LocalFileServer(self.files) as server:
+            paths = await downloader.download(self._dataset(server), "2025-08-19")
+            self.assertIn(("papers_0.gz", "bytes=1000-"), server.requests)
+        self.assertEqual(self._read(paths[0]), self.files["papers_0.gz"])
+        self.assertFalse(os.path.exists(paths[0] + ".part"))
+
+    async def test_download_restarts_when_etag_changed(self):
+        downloader = DatasetDownloader(self.tmp.name)
+        with LocalFileServer(self.files) as server:
+            await downloader.download(self._dataset(server), "2025-08-19")
+        manifest = downloader.load_manifest("2025-08-19")
+        manifest["datasets"]["papers"]["papers_0.gz"]["complete"] = False
+        downloader._save_manifest("2025-08-19", manifest)
+        path = os.path.join(self.tmp.name, "2025-08-19", "papers", "papers_0.gz")
+        os.replace(path, path + ".part")
+        self.files["papers_0.gz"] = os.urandom(500_000)
+        with LocalFileServer(self.files) as server:
+            paths = await downloader.download(self._dataset(server), "2025-08-19")
+        self.assertEqual(self._read(paths[0]), self.files["papers_0.gz"])
+
+    async def test_download_checksum_mismatch(self):
+        downloader = DatasetDownloader(self.tmp.name, retries=2)
+        with LocalFileServer(self.files) as server:
+            server.server.etags["papers_1.gz"] = '"' + "0" * 32 + '"'
+            with self.assertRaises(DownloadVerificationException):
+                await downloader.download(self._dataset(server), "2025-08-19")
+            self.assertEqual(server.requests.count(("papers_1.gz", None)), 2)
+        directory = os.path.join(self.tmp.name, "2025-08-19", "papers")
+        self.assertFalse(os.path.exists(os.path.join(directory, "papers_1.gz")))
+
+    async def test_download_retries_corrupt_partial_file(self):
+        # A complete but corrupt partial file is answered with 416, fails
+        # verification and is downloaded again.
+        downloader = DatasetDownloader(self.tmp.name)
+        body = self.files["papers_1.gz"]
+        directory = os.path.join(self.tmp.name, "2025-08-19", "papers")
+        os.makedirs(directory)
+        with open(os.path.join(directory, "papers_1.gz.part"), "wb") as file:
+            file.write(bytes(len(body)))
+        manifest = downloader.load_manifest("2025-08-19")
+        manifest["datasets"]["papers"] = {
+            "papers_1.gz": {
+                "etag": f'"{hashlib.md5(body).hexdigest()}"',
+                "size": len(body),
+            }
+        }
+        downloader._save_manifest("2025-08-19", manifest)
+        with LocalFileServer(self.files) as server:
+            paths = await downloader.download(self._dataset(server), "2025-08-19")
+            self.assertIn(("papers_1.gz", f"bytes={len(body)}-"), server.requests)
+            self.assertIn(("papers_1.gz", None), server.requests)
+        self.assertEqual(self._read(paths[1]), body)
+
+    async def test_download_bandwidth_limit(self):
+        downloader = DatasetDownloader(
+            self.tmp.name, bandwidth_limit=200_000, chunk_size=16_384
+        )
+        with LocalFileServer(self.files) as server:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await downloader.download(self._dataset(server), "2025-08-19")
+            elapsed = loop.time() - start
+        # 420 KB at 200 KB/s with a one second burst allowance.
+        self.assertGreater(elapsed, 0.9)
+
+    async def test_download_without_files(self):
+        downloader = DatasetDownloader(self.tmp.name)
+        with self.assertRaises(ValueError):
+            await downloader.download(Dataset({"name": "papers"}), "2025-08-19")
+
+
+def _jsonl_gz(records: list) -> bytes:
+    return gzip.compress(b"".join(json.dumps(r).encode() + b"\n" for r in records))
+
+
+class DatasetStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "papers.db")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_load_shards(self):
+        shard = os.path.join(self.tmp.name, "papers_0.gz")
+        with open(shard, "wb") as file:
+            file.write(_jsonl_gz([{"corpusid": 1, "title": "a"}, {"corpusid": 2}]))
+        with DatasetStore(self.path, "papers") as store:
+            self.assertEqual(store.key_field, "corpusid")
+            self.assertIsNone(store.release)
+            self.assertEqual(store.load_shards([shard], "2024-10-08"), 2)
+            self.assertEqual(store.release, "2024-10-08")
+            self.assertEqual(len(store), 2)
+            self.assertEqual(store.get(1), {"corpusid": 1, "title": "a"})
+            self.assertIn(2, store)
+            self.assertNotIn(3, store)
+
+    def test_upsert_and_delete(self):
+        with DatasetStore(self.path, "authors") as store:
+            store.upsert({"authorid": str(i), "n": i} for i in range(25))
+            store.upsert([{"authorid": "3", "n": 300}])
+            store.delete(["4", {"authorid": "5"}])
+            store.commit()
+            self.assertEqual(len(store), 23)
+            self.assertEqual(store.get("3")["n"], 300)
+            self.assertEqual(
+                [r["authorid"] for r in store.get_many(["5", "6", "7"])], ["6", "7"]
+            )
+
+    def test_unknown_dataset_requires_key_field(self):
+        with self.assertRaises(ValueError):
+            DatasetStore(self.path, "unknown")
+
+    def test_dataset_mismatch(self):
+        DatasetStore(self.path, "papers").close()
+        with self.assertRaises(ValueError):
+            DatasetStore(self.path, "authors")
+
+
+class DatasetUpdaterTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = DatasetStore(os.path.join(self.tmp.name, "p.db"), "papers")
+        self.store.upsert([{"corpusid": i, "v": 0} for i in range(5)])
+        self.store.commit("2024-10-08")
+        self.files = {
+            "updates_1.gz": _jsonl_gz([{"corpusid": 1, "v": 1}, {"corpusid": 9}]),
+            "deletes_1.gz": _jsonl_gz([{"corpusid": 2}]),
+            # Two concatenated gzip members, as written by some tools.
+            "updates_2.gz": _jsonl_gz([{"corpusid": 1, "v": 2}])
+            + _jsonl_gz([{"corpusid": 10}]),
+            "deletes_2.gz": _jsonl_gz([{"corpusid": 9}]),
+        }
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmp.cleanup()
+
+    def _client(
+        self, server: LocalFileServer, diffs: list, end_release: str = None
+    ) -> mock.Mock:
+        if end_release is None:
+            end_release = diffs[-1][1] if diffs else "2024-10-08"
+        data = {
+            "dataset": "papers",
+            "start_release": "2024-10-08",
+            "end_release": end_release,
+            "diffs": [
+                {
+                    "from_release": start,
+                    "to_release": end,
+                    "update_files": [server.url(f"updates_{i}.gz")],
+                    "delete_files": [server.url(f"deletes_{i}.gz")],
+                }
+                for i, (start, end) in enumerate(diffs, start=1)
+            ],
+        }
+        client = mock.Mock()
+        client.get_dataset_diffs = mock.AsyncMock(return_value=DatasetDiff(data))
+        return client
+
+    async def test_update(self):
+        with LocalFileServer(self.files) as server:
+            client = self._client(
+                server, [("2024-10-08", "2024-10-15"), ("2024-10-15", "2024-10-22")]
+            )
+            updater = DatasetUpdater(client, self.store, batch_size=1)
+            release = await updater.update()
+        client.get_dataset_diffs.assert_awaited_once_with(
+            "papers", "2024-10-08", "latest"
+        )
+        self.assertEqual(release, "2024-10-22")
+        self.assertEqual(self.store.release, "2024-10-22")
+        self.assertEqual(self.store.get(1), {"corpusid": 1, "v": 2})
+        self.assertIsNone(self.store.get(2))
+        self.assertIsNone(self.store.get(9))
+        self.assertEqual(self.store.get(10), {"corpusid": 10})
+        self.assertEqual(len(self.store), 5)
+
+    async def test_update_rolls_back_failed_diff(self):
+        del self.files["deletes_2.gz"]
+        with LocalFileServer(self.files) as server:
+            client = self._client(
+                server, [("2024-10-08", "2024-10-15"), ("2024-10-15", "2024-10-22")]
+            )
+            with self.assertRaises(httpx.HTTPStatusError):
+                await DatasetUpdater(client, self.store).update()
+        self.assertEqual(self.store.release, "2024-10-15")
+        self.assertEqual(self.store.get(1), {"corpusid": 1, "v": 1})
+        self.assertIsNone(self.store.get(10))
+
+    async def test_update_broken_chain(self):
+        with LocalFileServer(self.files) as server:
+            client = self._client(server, [("2024-10-01", "2024-10-15")])
+            with self.assertRaises(ValueError):
+                await DatasetUpdater(client, self.store).update()
+        self.assertEqual(self.store.release, "2024-10-08")
+
+    async def test_update_truncated_chain(self):
+        with LocalFileServer(self.files) as server:
+            client = self._client(
+                server, [("2024-10-08", "2024-10-15")], end_release="2024-10-22"
+            )
+            with self.assertRaises(ValueError):
+                await DatasetUpdater(client, self.store).update()
+        self.assertEqual(self.store.release, "2024-10-08")
+
+    async def test_update_without_diffs(self):
+        client = mock.Mock()
+        client.get_dataset_diffs = mock.AsyncMock(
+            return_value=DatasetDiff(
+                {
+                    "dataset": "papers",
+                    "start_release": "2024-10-08",
+                    "end_release": "2024-10-08",
+                }
+            )
+        )
+        release = await DatasetUpdater(client, self.store).update()
+        self.assertEqual(release, "2024-10-08")
+
+    async def test_update_corpus_index(self):
+        index = CorpusIndex(os.path.join(self.tmp.name, "index"), "papers")
+        index.upsert([{"corpusid": i, "v": 0} for i in range(5)])
+        index.commit("2024-10-08")
+        with LocalFileServer(self.files) as server:
+            client = self._client(server, [("2024-10-08", "2024-10-15")])
+            await DatasetUpdater(client, index).update()
+        self.assertEqual(index.release, "2024-10-15")
+        self.assertEqual(index.get(1), {"corpusid": 1, "v": 1})
+        self.assertIsNone(index.get(2))
+        self.assertEqual(index.get(9), {"corpusid": 9})
+        index.close()
+
+    async def test_update_with_reader(self):
+        with LocalFileServer(self.files) as server:
+            client = self._client(
+                server, [("2024-10-08", "2024-10-15"), ("2024-10-15", "2024-10-22")]
+            )
+            reader = ShardReader(max_workers=2, batch_size=1)
+            release = await DatasetUpdater(client, self.store, reader=reader).update()
+        self.assertEqual(release, "2024-10-22")
+        self.assertEqual(self.store.get(1), {"corpusid": 1, "v": 2})
+        self.assertIsNone(self.store.get(9))
+        self.assertEqual(self.store.get(10), {"corpusid": 10})
+        self.assertEqual(len(self.store), 5)
+
+    async def test_update_empty_store(self):
+        store = DatasetStore(os.path.join(self.tmp.name, "e.db"), "papers")
+        with self.assertRaises(ValueError):
+            await DatasetUpdater(mock.Mock(), store).update()
+        store.close()
+
+
+class CorpusIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.shards = []
+        for i in range(3):
+            records = [{"corpusid": k, "shard": i} for k in range(i, 30, 3)]
+            path = os.path.join(self.tmp.name, f"papers_{i}.gz")
+            with open(path, "wb") as file:
+                file.write(_jsonl_gz(records))
+            self.shards.append(path)
+        plain = os.path.join(self.tmp.name, "papers_3.jsonl")
+        with open(plain, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"title": "x", "corpusid": 100}) + "\n\n")
+        self.shards.append(plain)
+        self.directory = os.path.join(self.tmp.name, "index")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_build_and_get(self):
+        with CorpusIndex(self.directory, "papers", run_size=4) as index:
+            self.assertEqual(index.build(self.shards, "2025-08-19"), 31)
+            self.assertEqual(index.release, "2025-08-19")
+            self.assertEqual(index.get(7), {"corpusid": 7, "shard": 1})
+            self.assertEqual(index.get("29"), {"corpusid": 29, "shard": 2})
+            self.assertEqual(index.get(100), {"title": "x", "corpusid": 100})
+            self.assertIsNone(index.get(31))
+            self.assertIn(0, index)
+            self.assertEqual(index.get_raw(3), b'{"corpusid": 3, "shard": 0}')
+            self.assertEqual(
+                [r["corpusid"] for r in index.get_many([1, 50, 2])], [1, 2]
+            )
+
+    def test_reopen(self):
+        with CorpusIndex(self.directory, "papers") as index:
+            index.build(self.shards, "2025-08-19")
+        with CorpusIndex(self.directory, "papers") as index:
+            self.assertEqual(len(index), 31)
+            self.assertEqual(index.get(5)["shard"], 2)
+        with self.assertRaises(ValueError):
+            CorpusIndex(self.directory, "authors")
+
+    def test_incremental_update(self):
+        with CorpusIndex(self.directory, "papers", run_size=2) as index:
+            index.build(self.shards, "2025-08-19")
+            index.upsert([{"corpusid": 4, "v": 1}, {"corpusid": 200}])
+            index.upsert([{"corpusid": 4, "v": 2}])
+            index.delete([{"corpusid": 5}, 200, 6])
+            self.assertEqual(index.get(4), {"corpusid": 4, "shard": 1})
+            index.commit("2025-08-26")
+            self.assertEqual(index.release, "2025-08-26")
+            self.assertEqual(index.get(4), {"corpusid": 4, "v": 2})
+            self.assertIsNone(index.get(5))
+            self.assertIsNone(index.get(200))
+            self.assertEqual(len(index), 29)
+            index.upsert([{"corpusid": 5, "v": 3}])
+            index.rollback()
+            self.assertIsNone(index.get(5))
+        with CorpusIndex(self.directory, "papers") as index:
+            self.assertEqual(index.get(4), {"corpusid": 4, "v": 2})
+            self.assertEqual(len(index.shards), 5)
+
+
+class LocalCorpusTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        datasets = {
+            "papers": [
+                {
+                    "corpusid": 470667,
+                    "title": "Computing Machinery and Intelligence",
+                    "url": "https://www.semanticscholar.org/paper/abc123",
+                    "externalids": {"DOI": "10.1093/mind/lix.236.433"},
+                    "authors": [{"authorId": "2262347", "name": "A. Turing"}],
+                    "citationcount": 9000,
+                    "publicationdate": "1950-10-01",
+                    "publicationvenueid": "venue1",
+                }
+            ],
+            "abstracts": [
+                {
+                    "corpusid": 470667,
+                    "abstract": "I propose to consider the question.",
+                    "openaccessinfo": {"url": "https://example.com/pdf"},
+                }
+            ],
+            "tldrs": [{"corpusid": 470667, "model": "tldr@v2", "text": "Short."}],
+            "authors": [{"authorid": "2262347", "name": "A. Turing", "hindex": 12}],
+        }
+        self.paths = {}
+        for name, records in datasets.items():
+            path = os.path.join(self.tmp.name, f"{name}.gz")
+            with open(path, "wb") as file:
+                file.write(_jsonl_gz(records))
+            self.paths[name] = path
+        self.directory = os.path.join(self.tmp.name, "corpus")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_get_paper_and_author(self):
+        with LocalCorpus(self.directory) as corpus:
+            for name, path in self.paths.items():
+                corpus.add_dataset(name, [path], "2025-08-19")
+        with LocalCorpus(self.directory) as corpus:
+            self.assertEqual(
+                corpus.datasets, ["abstracts", "authors", "papers", "tldrs"]
+            )
+            paper = corpus.get_paper(470667)
+            self.assertIsInstance(paper, Paper)
+            self.assertEqual(paper.paperId, "abc123")
+            self.assertEqual(paper.corpusId, 470667)
+            self.assertEqual(paper.citationCount, 9000)
+            self.assertEqual(paper.abstract, "I propose to consider the question.")
+            self.assertEqual(paper.openAccessPdf["url"], "https://example.com/pdf")
+            self.assertEqual(paper.tldr.text, "Short.")
+            self.assertEqual(paper.publicationVenue.id, "venue1")
+            self.assertEqual(paper.authors[0].name, "A. Turing")
+            self.assertIsNone(corpus.get_paper(1))
+            self.assertEqual(len(corpus.get_papers([470667, 1])), 1)
+            author = corpus.get_author("2262347")
+            self.assertIsInstance(author, Author)
+            self.assertEqual(author.authorId, "2262347")
+            self.assertEqual(author.hIndex, 12)
+            self.assertEqual(corpus.get_authors([1]), [])
+
+    def test_missing_datasets(self):
+        with LocalCorpus(self.directory) as corpus:
+            self.assertIsNone(corpus.get_paper(470667))
+            self.assertIsNone(corpus.get_author("2262347"))
+
+
+class ShardReaderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for shard in range(4):
+            records = [
+                {"corpusid": shard * 10 + i, "title": f"Paper {shard}-{i}"}
+                for i in range(5)
+            ]
+            path = os.path.join(self.tmp.name, f"shard_{shard}.gz")
+            data = _jsonl_gz(records)
+            if shard == 3:
+                # Plain JSONL without a trailing newline.
+                path = path[:-3]
+                data = gzip.decompress(data).rstrip(b"\n")
+            with open(path, "wb") as file:
+                file.write(data)
+            self.paths.append(path)
+        self.expected = [shard * 10 + i for shard in range(4) for i in range(5)]
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_ordered(self):
+        for workers in (0, 1, 3):
+            reader = ShardReader(max_workers=workers, batch_size=2)
+            batches = list(reader.iter_batches(self.paths))
+            self.assertEqual([len(batch) for batch in batches], [2, 2, 1] * 4)
+            ids = [record["corpusid"] for batch in batches for record in batch]
+            self.assertEqual(ids, self.expected)
+
+    def test_unordered(self):
+        reader = ShardReader(max_workers=3, batch_size=2, ordered=False)
+        ids = [record["corpusid"] for record in reader.iter_records(self.paths)]
+        self.assertEqual(sorted(ids), self.expected)
+
+    def test_models(self):
+        reader = ShardReader(max_workers=2, output="paper")
+        papers = list(reader.iter_records(self.paths[:2]))
+        self.assertIsInstance(papers[0], Paper)
+        self.assertEqual(papers[6].corpusId, 11)
+        self.assertEqual(papers[6].title, "Paper 1-1")
+
+    def test_url_source(self):
+        files = {"shard.gz": _jsonl_gz([{"corpusid": 1}]) + _jsonl_gz([{"a": 2}])}
+        with LocalFileServer(files) as server:
+            records = list(
+                ShardReader(max_workers=1).iter_records([server.url("shard.gz")])
+            )
+        self.assertEqual(records, [{"corpusid": 1}, {"a": 2}])
+
+    def test_error(self):
+        with open(self.paths[3], "ab") as file:
+            file.write(b"\n{broken")
+        for workers in (0, 2):
+            with self.assertRaises(json.JSONDecodeError):
+                list(ShardReader(max_workers=workers).iter_batches(self.paths))
+
+    def test_early_close(self):
+        reader = ShardReader(max_workers=2, batch_size=1, queue_size=1)
+        batches = reader.iter_batches(self.paths)
+        self.assertEqual(next(batches), [{"corpusid": 0, "title": "Paper 0-0"}])
+        batches.close()
+
+    def test_invalid_output(self):
+        with self.assertRaises(ValueError):
+            ShardReader(output="csv")
+
+
+def _citation(citationid, citing, cited, influential=False):
+    return {
+        "citationid": citationid,
+        "citingcorpusid": citing,
+        "citedcorpusid": cited,
+        "isinfluential": influential,
+    }
+
+
+class CitationGraphTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "citations.gz")
+        records = [_citation(10 + i, i, 1, i % 2 == 0) for i in range(2, 9)]
+        records += [_citation(30, 1, 5), _citation(31, 1, 3), _citation(32, 4, 5)]
+        records.append({"citationid": 40, "citingcorpusid": 6, "citedcorpusid": None})
+        with open(self.path, "wb") as file:
+            file.write(_jsonl_gz(records))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_build_and_page(self):
+        directory = os.path.join(self.tmp.name, "graph")
+        with CitationGraph(directory, run_size=3) as graph:
+            self.assertEqual(graph.build([self.path], "2025-08-19"), 10)
+        self.assertEqual(
+            sorted(os.listdir(directory)), ["cited.bin", "citing.bin", "graph.json"]
+        )
+        with CitationGraph(directory) as graph:
+            self.assertEqual(graph.release, "2025-08-19")
+            self.assertEqual(graph.count_citations(1), 7)
+            self.assertEqual(graph.count_references(1), 2)
+            self.assertEqual(graph.references(1), [(3, 31, False), (5, 30, False)])
+            self.assertEqual(
+                graph.citations(1, offset=2, limit=3),
+                [(4, 14, True), (5, 15, False), (6, 16, True)],
+            )
+            self.assertEqual(graph.citations(1, offset=6, limit=3), [(8, 18, True)])
+            self.assertEqual(graph.citations(5), [(1, 30, False), (4, 32, False)])
+            self.assertEqual(graph.citations(2), [])
+            self.assertEqual(graph.count_references(100), 0)
+
+
+class LocalMirrorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        papers = [
+            {
+                "corpusid": i,
+                "title": f"Paper {i}",
+                "url": f"https://www.semanticscholar.org/paper/{i:040x}",
+                "year": 2000 + i,
+            }
+            for i in range(1, 8)
+        ]
+        citations = [_citation(100 + i, i, 1) for i in range(2, 8)]
+        citations.append(_citation(200, 1, 9, True))
+        paths = {}
+        for name, records in (("papers", papers), ("citations", citations)):
+            paths[name] = os.path.join(self.tmp.name, f"{name}.gz")
+            with open(paths[name], "wb") as file:
+                file.write(_jsonl_gz(records))
+        self.corpus = LocalCorpus(os.path.join(self.tmp.name, "corpus"))
+        self.corpus.add_dataset("papers", [paths["papers"]], "2025-08-19")
+        self.graph = CitationGraph(os.path.join(self.tmp.name, "graph"))
+        self.graph.build([paths["citations"]], "2025-08-19")
+        self.paper_ids = DatasetStore(
+            os.path.join(self.tmp.name, "paper-ids.db"), "paper-ids"
+        )
+        self.paper_ids.upsert([{"sha": f"{3:040x}", "corpusid": 3, "primary": True}])
+        self.paper_ids.commit("2025-08-19")
+        self.mirror = LocalMirror(self.corpus, self.graph, self.paper_ids)
+        self.client = AsyncSemanticScholar(backend=self.mirror)
+
+    def tearDown(self) -> None:
+        self.corpus.close()
+        self.graph.close()
+        self.paper_ids.close()
+        self.tmp.cleanup()
+
+    def _request(self, response=None):
+        return mock.patch(
+            "httpx.AsyncClient.request",
+            new_callable=mock.AsyncMock,
+            return_value=response,
+        )
+
+    def test_get_paper_from_mirror(self):
+        with self._request() as request:
+            paper = asyncio.run(
+                self.client.get_paper("CorpusId:2", fields=["title", "year"])
+            )
+            by_sha = asyncio.run(self.client.get_paper(f"{3:040x}"))
+        request.assert_not_called()
+        self.assertEqual(paper.title, "Paper 2")
+        self.assertEqual(paper.paperId, f"{2:040x}")
+        self.assertEqual(
+            paper.raw_data, {"paperId": f"{2:040x}", "title": "Paper 2", "year": 2002}
+        )
+        self.assertEqual(by_sha.corpusId, 3)
+
+    def test_get_paper_nested_references(self):
+        paper = asyncio.run(
+            self.client.get_paper("corpusid:1", fields=["title", "references.title"])
+        )
+        self.assertEqual(paper.references[0].raw_data, {"corpusId": 9})
+        paper = asyncio.run(
+            self.client.get_paper("CorpusId:2", fields=["citations", "references"])
+        )
+        self.assertEqual(paper.citations, [])
+        self.assertEqual(paper.references[0].title, "Paper 1")
+
+    def test_get_paper_fallback(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"paperId": "remote", "title": "Remote"}
+        with self._request(response) as request:
+            paper = asyncio.run(self.client.get_paper("CorpusId:99"))
+            doi = asyncio.run(self.client.get_paper("10.1093/mind/lix.236.433"))
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(paper.paperId, "remote")
+        self.assertEqual(doi.title, "Remote")
+
+    def test_get_papers_partial(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = [{"paperId": "remote"}, None]
+        with self._request(response) as request:
+            papers, not_found = asyncio.run(
+                self.client.get_papers(
+                    ["CorpusId:1", "DOI:10.1/a", "CorpusId:4", "CorpusId:99"],
+                    return_not_found=True,
+                )
+            )
+        request.assert_called_once()
+        self.assertEqual(
+            request.call_args.kwargs["json"], {"ids": ["DOI:10.1/a", "CorpusId:99"]}
+        )
+        self.assertEqual(
+            [paper.paperId for paper in papers], [f"{1:040x}", "remote", f"{4:040x}"]
+        )
+        self.assertEqual(not_found, ["DOI:10.1/a", "CorpusId:99"])
+
+    def test_get_paper_citations_paging(self):
+        with self._request() as request:
+            results = asyncio.run(
+                self.client.get_paper_citations(
+                    "CorpusId:1", fields=["title", "isInfluential"], limit=4
+                )
+            )
+            self.assertEqual(results.total, 6)
+            self.assertEqual(len(results), 4)
+
+            async def collect():
+                return [item async for item in results]
+
+            citations = asyncio.run(collect())
+        request.assert_not_called()
+        self.assertEqual(
+            [citation.paper.title for citation in citations],
+            [f"Paper {i}" for i in range(2, 8)],
+        )
+        self.assertFalse(citations[0].isInfluential)
+
+    def test_paging_does_not_load_every_edge(self):
+        with mock.patch.object(
+            self.graph, "citations", wraps=self.graph.citations
+        ) as citations:
+            results = asyncio.run(
+                self.client.get_paper_citations("CorpusId:1", ["title"], limit=2)
+            )
+            with mock.patch.object(self.mirror, "NESTED_LIMIT", 3):
+                paper = asyncio.run(
+                    self.client.get_paper("CorpusId:1", ["citations.title"])
+                )
+        self.assertEqual(results.total, 6)
+        self.assertEqual(len(paper.citations), 3)
+        self.assertNotIn(None, [call.args[2] for call in citations.call_args_list])
+        # Edge fields are only returned when requested.
+        self.assertEqual(list(results.raw_data[0]), ["citingPaper"])
+
+    def test_get_paper_references(self):
+        results = asyncio.run(self.client.get_paper_references("CorpusId:1"))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].paper.corpusId, 9)
+        self.assertTrue(results[0].isInfluential)
+
+    def test_get_author_fallback(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"authorId": "1", "name": "Remote"}
+        with self._request(response):
+            author = asyncio.run(self.client.get_author("1"))
+        self.assertEqual(author.name, "Remote")
+
+
+class EmbeddingStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "embeddings")
+        self.vectors = numpy.arange(12, dtype=numpy.float32).reshape(4, 3)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_append_and_get(self):
+        with EmbeddingStore(self.directory) as store:
+            self.assertEqual(store.append(["a", "b"], self.vectors[:2]), 2)
+            self.assertEqual(store.append(["c", "d"], self.vectors[2:].tolist()), 2)
+        with EmbeddingStore(self.directory) as store:
+            self.assertEqual(len(store), 4)
+            self.assertEqual(store.dimension, 3)
+            view = store.get(["b", "c"])
+            self.assertIsInstance(view, numpy.memmap)
+            numpy.testing.assert_array_equal(view, self.vectors[1:3])
+            out = numpy.empty((2, 3), numpy.float32)
+            gathered = store.get(["d", "a"], out=out)
+            self.assertIs(gathered, out)
+            numpy.testing.assert_array_equal(out, self.vectors[[3, 0]])
+            numpy.testing.assert_array_equal(store["c"], self.vectors[2])
+            self.assertEqual(store.missing(["x", "a", "y", "x"]), ["x", "y"])
+            with self.assertRaises(KeyError):
+                store.get(["x"])
+            with self.assertRaises(ValueError):
+                store.append(["e"], [[1.0, 2.0]])
+            # Appending a stored paper maps it to the new vector.
+            store.append(["a"], [[9.0, 9.0, 9.0]])
+            self.assertEqual(len(store), 4)
+            self.assertEqual(store["a"][0], 9.0)
+
+    def test_interrupted_append(self):
+        with EmbeddingStore(self.directory) as store:
+            store.append(["a", "b"], self.vectors[:2])
+        with open(os.path.join(self.directory, "vectors.f32"), "ab") as file:
+            file.write(self.vectors[2:].tobytes())
+        with open(os.path.join(self.directory, "ids.tsv"), "a") as file:
+            file.write("c\t2\nd\t3\n")
+        with EmbeddingStore(self.directory) as store:
+            self.assertEqual(store.missing(["a", "c"]), ["c"])
+            store.append(["e"], self.vectors[3:])
+            self.assertEqual(store.vectors.shape, (3, 3))
+        with EmbeddingStore(self.directory) as store:
+            self.assertEqual(store.missing(["c", "d", "e"]), ["c", "d"])
+            numpy.testing.assert_array_equal(store["e"], self.vectors[3])
+
+    def test_add_embeddings(self):
+        embeddings = PaperEmbeddings(
+            ["p1", "p2"],
+            self.vectors[:2],
+            "specter_v2",
+            aliases={"CorpusId:1": 0, "CorpusId:2": 1},
+        )
+        with EmbeddingStore(self.directory) as store:
+            self.assertEqual(store.add_embeddings(embeddings), 2)
+            self.assertEqual(store.model, "specter_v2")
+            numpy.testing.assert_array_equal(store["CorpusId:2"], self.vectors[1])
+            with self.assertRaises(ValueError):
+                store.add_embeddings(PaperEmbeddings(["p3"], self.vectors[2:3], "v1"))
+        with EmbeddingStore(self.directory) as store:
+            self.assertEqual(len(store), 4)
+            self.assertEqual(store.missing(["p1", "CorpusId:1", "p3"]), ["p3"])
+
+    def test_load_dataset(self):
+        path = os.path.join(self.tmp.name, "embeddings.gz")
+        records = [
+            {"corpusid": 10, "model": "specter_v2", "vector": "[1.0, 2.0]"},
+            {"corpusid": 11, "model": "specter_v2", "vector": [3.0, 4.0]},
+        ]
+        with open(path, "wb") as file:
+            file.write(_jsonl_gz(records))
+        with EmbeddingStore(self.directory) as store:
+            self.assertEqual(store.load_dataset([path], "specter_v2"), 2)
+            embeddings = store.get_embeddings(["CorpusId:11", "CorpusId:12"])
+        self.assertEqual(embeddings.paper_ids, ["CorpusId:11"])
+        self.assertEqual(embeddings.missing_ids, ["CorpusId:12"])
+        numpy.testing.assert_array_equal(embeddings["CorpusId:11"], [3.0, 4.0])
+
+    @mock.patch("httpx.AsyncClient.request")
+    def test_get_paper_embeddings_with_store(self, mock_request):
+        mock_request.return_value = httpx.Response(
+            200,
+            json=[{"paperId": "p2", "embedding": {"vector": [5.0, 6.0]}}, None],
+        )
+        with EmbeddingStore(self.directory) as store:
+            store.append(["CorpusId:1"], [[1.0, 2.0]])
+            embeddings = asyncio.run(
+                AsyncSemanticScholar().get_paper_embeddings(
+                    ["CorpusId:1", "CorpusId:2", "CorpusId:3"], store=store
+                )
+            )
+            self.assertIn("p2", store)
+        mock_request.assert_called_once()
+        self.assertEqual(
+            mock_request.call_args.kwargs["json"], {"ids": ["CorpusId:2", "CorpusId:3"]}
+        )
+        self.assertEqual(embeddings.paper_ids, ["CorpusId:1", "CorpusId:2"])
+        self.assertEqual(embeddings.missing_ids, ["CorpusId:3"])
+        numpy.testing.assert_array_equal(embeddings.vectors, [[1.0, 2.0], [5.0, 6.0]])
+
+
+class LocalRecommenderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = numpy.random.default_rng(0)
+        centers = rng.normal(size=(8, 16))
+        labels = rng.integers(0, 8, 2000)
+        self.vectors = (centers[labels] + 0.3 * rng.normal(size=(2000, 16))).astype(
+            numpy.float32
+        )
+        self.paper_ids = [f"p{i}" for i in range(2000)]
+
+    def _expected(self, positive, negative, limit):
+        unit = self.vectors / numpy.linalg.norm(self.vectors, axis=1, keepdims=True)
+        query = unit[positive].mean(axis=0)
+        if negative:
+            query = query - unit[negative].mean(axis=0)
+        scores = unit @ query
+        scores[positive + negative] = -numpy.inf
+        return [f"p{i}" for i in numpy.argsort(-scores, kind="stable")[:limit]]
+
+    def test_exact(self):
+        recommender = LocalRecommender(self.vectors, self.paper_ids, block_size=300)
+        results = recommender.recommend(["p1", "p2"], ["p3"], limit=25)
+        self.assertEqual(len(results), 25)
+        self.assertEqual([i for i, _ in results], self._expected([1, 2], [3], 25))
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(len(recommender.recommend(["p1"], limit=5000)), 1999)
+        with self.assertRaises(KeyError):
+            recommender.recommend(["x"])
+        with self.assertRaises(ValueError):
+            recommender.recommend([])
+
+    def test_ivf(self):
+        recommender = LocalRecommender(self.vectors, self.paper_ids, block_size=300)
+        recommender.build_ivf(n_lists=16, n_probe=4)
+        expected = self._expected([1], [], 20)
+        results = [i for i, _ in recommender.recommend(["p1"], limit=20)]
+        self.assertGreaterEqual(len(set(results) & set(expected)) / 20, 0.9)
+        # Probing every list is exact.
+        results = recommender.recommend(["p1"], limit=20, n_probe=16)
+        self.assertEqual([i for i, _ in results], expected)
+
+    def test_from_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with EmbeddingStore(directory) as store:
+                store.append(self.paper_ids[:100], self.vectors[:100])
+                store.append(["p0"], self.vectors[100:101])
+                recommender = LocalRecommender.from_store(store)
+                self.assertEqual(len(recommender), 100)
+                results = recommender.recommend(["p1"], limit=200)
+        ids = [i for i, _ in results]
+        self.assertEqual(len(ids), 99)
+        self.assertEqual(ids.count("p0"), 1)
+        self.assertNotIn("p1", ids)
+
+    def test_from_embeddings(self):
+        embeddings = PaperEmbeddings(
+            self.paper_ids[:10], self.vectors[:10], aliases={"CorpusId:1": 1}
+        )
+        recommender = LocalRecommender.from_embeddings(embeddings)
+        results = recommender.recommend(["CorpusId:1"], limit=3)
+        unit = self.vectors[:10] / numpy.linalg.norm(
+            self.vectors[:10], axis=1, keepdims=True
+        )
+        scores = unit @ unit[1]
+        scores[1] = -numpy.inf
+        expected = [f"p{i}" for i in numpy.argsort(-scores)[:3]]
+        self.assertEqual([i for i, _ in results], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+
+import httpx
+
+from semanticscholar.ApiEmulator import ApiEmulator
+from semanticscholar.AsyncSemanticScholar import AsyncSemanticScholar
+from semanticscholar.SemanticScholarException import ObjectNotFoundException
+
+
+class ApiEmulatorTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.emulator = ApiEmulator(papers=300, seed=1)
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(self.emulator),
+            base_url="http://emulator",
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.client.aclose()
+
+    def test_corpus_is_deterministic(self):
+        other = ApiEmulator(papers=300, seed=1)
+        self.assertEqual(other.paper_ids, self.emulator.paper_ids)
+        self.assertNotEqual(ApiEmulator(papers=300).paper_ids, other.paper_ids)
+
+    async def test_get_paper(self):
+        paper_id = self.emulator.paper_ids[-1]
+        r = await self.client.get(
+            "/graph/v1/paper/CorpusId:299",
+            params={"fields": "title,year,authors.name,references.year,embedding"},
+        )
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual(data["paperId"], paper_id)
+        self.assertEqual(
+            set(data),
+            {"paperId", "title", "year", "authors", "references", "embedding"},
+        )
+        self.assertEqual(set(data["authors"][0]), {"authorId", "name"})
+        self.assertEqual(set(data["references"][0]), {"paperId", "year"})
+        self.assertEqual(len(data["embedding"]["vector"]), 768)
+        r = await self.client.get("/graph/v1/paper/DOI:10.5555/emulator.299")
+        self.assertEqual(r.json(), {"paperId": paper_id, "title": data["title"]})
+        r = await self.client.get("/graph/v1/paper/unknown")
+        self.assertEqual(r.status_code, 404)
+        self.assertEqual(r.json(), {"error": "Paper not found"})
+
+    async def test_get_papers(self):
+        ids = self.emulator.paper_ids[:2] + ["unknown"]
+        r = await self.client.post("/graph/v1/paper/batch", json={"ids": ids})
+        data = r.json()
+        self.assertEqual([item["paperId"] for item in data[:2]], ids[:2])
+        self.assertIsNone(data[2])
+        r = await self.client.post("/graph/v1/paper/batch", json={"ids": ids * 200})
+        self.assertEqual(r.status_code, 400)
+
+    async def test_citations_paging(self):
+        paper_id = self.emulator.paper_ids[0]
+        citations, offset = [], 0
+        while offset is not None:
+            r = await self.client.get(
+                f"/graph/v1/paper/{paper_id}/citations",
+                params={"fields": "title,isInfluential", "offset": offset, "limit": 5},
+            )
+            page = r.json()
+            self.assertEqual(page["offset"], offset)
+            citations += page["data"]
+            offset = page.get("next")
+        r = await self.client.get(
+            f"/graph/v1/paper/{paper_id}", params={"fields": "citationCount"}
+        )
+        self.assertEqual(len(citations), r.json()["citationCount"])
+        self.assertGreater(len(citations), 5)
+        self.assertEqual(set(citations[0]), {"citingPaper", "isInfluential"})
+        self.assertIn("title", citations[0]["citingPaper"])
+
+    async def test_search_limits(self):
+        r = await self.client.get(
+            "/graph/v1/paper/search",
+            params={"query": "neural", "offset": 950, "limit": 100},
+        )
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(
+            r.json(),
+            {"error": "Requested data for this limit and/or offset is not available"},
+        )
+        r = await self.client.get(
+            "/graph/v1/paper/search", params={"query": "neural", "limit": 101}
+        )
+        self.assertEqual(r.status_code, 400)
+
+    async def test_bulk_search_token(self):
+        emulator = ApiEmulator(papers=2500)
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(emulator), base_url="http://emulator"
+        ) as client:
+            ids, token = [], None
+            while True:
+                params = {"query": "", "sort": "citationCount:desc"}
+                if token:
+                    params["token"] = token
+                page = (
+                    await client.get("/graph/v1/paper/search/bulk", params=params)
+                ).json()
+                self.assertEqual(page["total"], 2500)
+                ids += [item["paperId"] for item in page["data"]]
+                token = page.get("token")
+                if not token:
+                    break
+        self.assertEqual(sorted(ids), sorted(emulator.paper_ids))
+
+    async def test_publication_date_filter(self):
+        r = await self.client.get(
+            "/graph/v1/paper/search/bulk",
+            params={
+                "query": "",
+                "fields": "publicationDate",
+                "publicationDateOrYear": "2000-06:2001",
+            },
+        )
+        dates = [paper["publicationDate"] for paper in r.json()["data"]]
+        self.assertTrue(dates)
+        self.assertTrue(all("2000-06-01" <= d <= "2001-12-31" for d in dates))
+
+    async def test_rate_limit(self):
+        self.emulator.rate_limit = 0.5
+        self.emulator.burst = 2
+        statuses = []
+        for _ in range(3):
+            r = await self.client.get("/graph/v1/paper/CorpusId:1")
+            statuses.append(r.status_code)
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(r.headers["retry-after"], "2")
+        self.assertEqual(r.json()["code"], "429")
+        # Limits are tracked per API key.
+        r = await self.client.get(
+            "/graph/v1/paper/CorpusId:1", headers={"x-api-key": "key"}
+        )
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(self.emulator.stats["statuses"], {200: 3, 429: 1})
+
+    async def test_error_injection(self):
+        self.emulator.error_rate = 1.0
+        self.emulator.error_statuses = (504,)
+        r = await self.client.get("/graph/v1/paper/CorpusId:1")
+        self.assertEqual(r.status_code, 504)
+        self.assertEqual(r.json(), {"message": "Endpoint request timed out"})
+
+    async def test_latency(self):
+        self.emulator.latency = ApiEmulator.uniform_latency(0.01, 0.02)
+        with mock.patch("asyncio.sleep", new_callable=mock.AsyncMock) as sleep:
+            await self.client.get("/graph/v1/paper/CorpusId:1")
+        self.assertTrue(0.01 <= sleep.call_args.args[0] <= 0.02)
+
+    async def test_datasets(self):
+        r = await self.client.get("/datasets/v1/release/latest/dataset/citations")
+        dataset = r.json()
+        self.assertEqual(dataset["name"], "citations")
+        url = dataset["files"][0]
+        self.assertTrue(url.startswith("http://emulator/files/2024-01-09/"))
+        r = await self.client.get(url)
+        records = [json.loads(line) for line in gzip.decompress(r.content).splitlines()]
+        r = await self.client.post(
+            "/graph/v1/paper/batch",
+            params={"fields": "referenceCount"},
+            json={"ids": self.emulator.paper_ids},
+        )
+        references = sum(paper["referenceCount"] for paper in r.json())
+        self.assertEqual(len(records), references)
+        r = await self.client.get("/datasets/v1/diffs/2024-01-02/to/latest/papers")
+        diffs = r.json()["diffs"]
+        self.assertEqual(len(diffs), 1)
+        self.assertEqual(diffs[0]["to_release"], "2024-01-09")
+
+
+class ApiEmulatorClientTest(unittest.IsolatedAsyncioTestCase):
+    """
+    Runs the client against the emulator served over HTTP.
+    """
+
+    async def test_client(self):
+        emulator = ApiEmulator(papers=1500)
+        with emulator.serve() as api_url:
+            sch = AsyncSemanticScholar(api_url=api_url)
+            paper_id = emulator.paper_ids[0]
+            paper = await sch.get_paper(paper_id, fields=["title", "citations"])
+            self.assertEqual(paper.paperId, paper_id)
+
+            citations = await sch.get_paper_citations(paper_id, limit=10)
+            self.assertEqual(
+                len([item async for item in citations]), len(paper.citations)
+            )
+
+            papers, not_found = await sch.get_papers(
+                emulator.paper_ids[:3] + ["CorpusId:99999"], return_not_found=True
+            )
+            self.assertEqual([p.paperId for p in papers], emulator.paper_ids[:3])
+            self.assertEqual(not_found, ["CorpusId:99999"])
+
+            results = await sch.search_paper("", bulk=True)
+            self.assertEqual(len([item async for item in results]), 1500)
+
+            recommendations = await sch.get_recommended_papers(paper_id, limit=5)
+            self.assertEqual(len(recommendations), 5)
+
+            with self.assertRaises(ObjectNotFoundException):
+                await sch.get_author("unknown")
+
+    async def test_harvest_bulk_search(self):
+        emulator = ApiEmulator(papers=3000)
+        with emulator.serve() as api_url:
+            sch = AsyncSemanticScholar(api_url=api_url)
+            ranges = await sch.plan_bulk_search("", partitions=4, min_year=1990)
+            self.assertGreaterEqual(len(ranges), 4)
+            totals = [
+                (
+                    await sch.search_paper("", bulk=True, publication_date_or_year=r)
+                ).total
+                for r in ranges
+            ]
+            self.assertEqual(sum(totals), 3000)
+            self.assertLessEqual(max(totals), 750)
+
+            ids = [
+                paper.paperId
+                async for paper in sch.harvest_bulk_search(
+                    "", partitions=4, min_year=1990
+                )
+            ]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), set(emulator.paper_ids))
+
+    async def test_harvest_bulk_search_reuses_count_page(self):
+        emulator = ApiEmulator(papers=1500)
+        with emulator.serve() as api_url:
+            sch = AsyncSemanticScholar(api_url=api_url)
+            ids = [
+                paper.paperId
+                async for paper in sch.harvest_bulk_search(
+                    "", partitions=1, min_year=1990
+                )
+            ]
+        self.assertEqual(sorted(ids), sorted(emulator.paper_ids))
+        # The count of the only range is its first page, followed by one more.
+        self.assertEqual(emulator.stats["requests"], 2)
+
+    async def test_plan_bulk_search_keeps_years_whole(self):
+        # Year ranges match papers with a year only, date ranges do not.
+        papers = [(2000, "2000-03-01")] * 10 + [(2000, None)] * 20
+        papers += [(2001, "2001-06-01")] * 5
+
+        async def search_paper(query, publication_date_or_year, **kwargs):
+            start, end = publication_date_or_year.split(":")
+            if len(start) == len(end) == 4:
+                total = sum(int(start) <= year <= int(end) for year, _ in papers)
+            else:
+                total = sum(bool(day) and start <= day <= end for _, day in papers)
+            return mock.Mock(total=total)
+
+        sch = AsyncSemanticScholar()
+        with mock.patch.object(sch, "search_paper", side_effect=search_paper):
+            ranges = await sch.plan_bulk_search(
+                "", partitions=4, min_year=2000, max_year=2001
+            )
+        self.assertEqual(ranges, ["2000:2000", "2001:2001"])
+
+    async def test_client_retries_rate_limit(self):
+        emulator = ApiEmulator(papers=10, rate_limit=2, burst=1)
+        with emulator.serve() as api_url:
+            sch = AsyncSemanticScholar(api_url=api_url)
+            for _ in range(2):
+                await sch.get_paper("CorpusId:1")
+        self.assertEqual(emulator.stats["statuses"].get(200), 2)
+        self.assertGreaterEqual(emulator.stats["statuses"].get(429), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,24 +1,37 @@
 """Tests for MCP server tools."""
 
+import asyncio
 import json
+import subprocess
+import sys
 from datetime import datetime
 from types import SimpleNamespace
 from unittest import mock
 
+import httpx
 import pytest
 
 pytest.importorskip("mcp")
 
 from semanticscholar.mcp_server import (
     ABSTRACT_MAX,
+    AUTHOR_FIELDS,
+    PAPER_FIELDS,
+    _TTLCache,
     _author_to_dict,
+    _cache,
     _paper_to_dict,
+    _client,
+    _decode_cursor,
+    _encode_cursor,
     _truncate,
     get_author,
     get_author_papers,
+    get_authors_batch,
     get_paper,
     get_paper_citations,
     get_paper_references,
+    get_papers_batch,
     get_recommendations,
     search_authors,
     search_papers,
@@ -59,17 +72,26 @@ def _make_author(**kwargs):
     return SimpleNamespace(**defaults)
 
 
-def _make_paginated(items, total=None):
+def _make_paginated(items, total=None, next=0):
     if total is None:
         total = len(items)
     result = mock.MagicMock()
     result.total = total
+    result.next = next
     result.__iter__ = mock.Mock(return_value=iter(items))
     result.__getitem__ = lambda self, key: items[key]
     result.__len__ = mock.Mock(return_value=len(items))
+    result.async_take = mock.AsyncMock(side_effect=lambda n: items[:n])
     return result
 
 
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    _cache.clear()
+    yield
+    _cache.clear()
+
+
 # --- helper functions ---
 
 
@@ -160,11 +182,11 @@ class TestAuthorToDict:
 
 
 class TestSearchPapers:
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_basic_search(self, mock_sch):
         paper = _make_paper()
         mock_sch.search_paper.return_value = _make_paginated([paper], total=1)
-        result = json.loads(search_papers("test query"))
+        result = json.loads(asyncio.run(search_papers("test query")))
         assert result["total"] == 1
         assert len(result["papers"]) == 1
         assert result["papers"][0]["title"] == "Test Paper"
@@ -175,82 +197,308 @@ class TestSearchPapers:
             publication_date_or_year=None,
             min_citation_count=None,
             limit=10,
+            offset=0,
         )
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_fields_of_study_split(self, mock_sch):
         mock_sch.search_paper.return_value = _make_paginated([])
-        search_papers("query", fields_of_study="Computer Science,Mathematics")
+        asyncio.run(
+            search_papers("query", fields_of_study="Computer Science,Mathematics")
+        )
         call_kwargs = mock_sch.search_paper.call_args[1]
         assert call_kwargs["fields_of_study"] == ["Computer Science", "Mathematics"]
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_limit_clamped_to_100(self, mock_sch):
         mock_sch.search_paper.return_value = _make_paginated([])
-        search_papers("query", limit=200)
+        asyncio.run(search_papers("query", limit=200))
         call_kwargs = mock_sch.search_paper.call_args[1]
         assert call_kwargs["limit"] == 100
 
 
 class TestGetPaper:
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_get_paper(self, mock_sch):
         mock_sch.get_paper.return_value = _make_paper(paperId="xyz")
-        result = json.loads(get_paper("xyz"))
+        result = json.loads(asyncio.run(get_paper("xyz")))
         assert result["paperId"] == "xyz"
-        mock_sch.get_paper.assert_called_once_with("xyz")
+        mock_sch.get_paper.assert_called_once_with("xyz", fields=PAPER_FIELDS)
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_cached(self, mock_sch):
+        mock_sch.get_paper.return_value = _make_paper(paperId="xyz")
+        first = asyncio.run(get_paper("xyz"))
+        assert asyncio.run(get_paper("xyz")) == first
+        assert mock_sch.get_paper.await_count == 1
+        asyncio.run(get_paper("other"))
+        assert mock_sch.get_paper.await_count == 2
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_compact_json(self, mock_sch):
+        mock_sch.get_paper.return_value = _make_paper(paperId="xyz")
+        result = asyncio.run(get_paper("xyz"))
+        assert "\n" not in result
+        assert '"paperId":"xyz"' in result
+
+    def test_fields_cover_output(self):
+        d = _paper_to_dict(_make_paper())
+        assert set(d) - {"paperId"} == set(PAPER_FIELDS)
+        d = _author_to_dict(_make_author())
+        assert set(d) - {"authorId"} == set(AUTHOR_FIELDS)
+
+
+class TestGetPapersBatch:
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_chunks_and_not_found(self, mock_sch):
+        def fake_get_papers(ids, fields, return_not_found):
+            found = [_make_paper(paperId=i) for i in ids if i != "missing"]
+            return found, [i for i in ids if i == "missing"]
+
+        mock_sch.get_papers.side_effect = fake_get_papers
+        ids = [f"p{i}" for i in range(1200)] + ["missing", "p0"]
+        result = json.loads(asyncio.run(get_papers_batch(ids)))
+        assert len(result["papers"]) == 1200
+        assert result["notFound"] == ["missing"]
+        sizes = [len(call.args[0]) for call in mock_sch.get_papers.call_args_list]
+        assert sizes == [500, 500, 201]
+        assert mock_sch.get_papers.call_args.kwargs["fields"] == PAPER_FIELDS
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_uses_cache(self, mock_sch):
+        mock_sch.get_paper.return_value = _make_paper(paperId="cached")
+        mock_sch.get_papers.return_value = ([_make_paper(paperId="new")], [])
+        asyncio.run(get_paper("cached"))
+        result = json.loads(asyncio.run(get_papers_batch(["cached", "new"])))
+        assert [p["paperId"] for p in result["papers"]] == ["cached", "new"]
+        mock_sch.get_papers.assert_awaited_once_with(
+            ["new"], fields=PAPER_FIELDS, return_not_found=True
+        )
+        asyncio.run(get_paper("new"))
+        mock_sch.get_paper.assert_awaited_once()
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_keeps_input_order(self, mock_sch):
+        mock_sch.get_paper.return_value = _make_paper(paperId="cached")
+        mock_sch.get_papers.return_value = (
+            [_make_paper(paperId="p1"), _make_paper(paperId="p2")],
+            ["missing"],
+        )
+        asyncio.run(get_paper("cached"))
+        ids = ["DOI:10.1/a", "cached", "missing", "p2"]
+        result = json.loads(asyncio.run(get_papers_batch(ids)))
+        assert [p["paperId"] for p in result["papers"]] == ["p1", "cached", "p2"]
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_caches_requested_ids(self, mock_sch):
+        mock_sch.get_papers.return_value = ([_make_paper(paperId="p1")], [])
+        asyncio.run(get_papers_batch(["DOI:10.1/a"]))
+        result = json.loads(asyncio.run(get_papers_batch(["DOI:10.1/a"])))
+        assert [p["paperId"] for p in result["papers"]] == ["p1"]
+        asyncio.run(get_paper("DOI:10.1/a"))
+        asyncio.run(get_paper("p1"))
+        mock_sch.get_papers.assert_awaited_once()
+        mock_sch.get_paper.assert_not_awaited()
+
+
+class TestGetAuthorsBatch:
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_chunks_and_not_found(self, mock_sch):
+        def fake_get_authors(ids, fields, return_not_found):
+            found = [_make_author(authorId=i) for i in ids if i != "missing"]
+            return found, [i for i in ids if i == "missing"]
+
+        mock_sch.get_authors.side_effect = fake_get_authors
+        ids = [str(i) for i in range(1500)] + ["missing"]
+        result = json.loads(asyncio.run(get_authors_batch(ids)))
+        assert len(result["authors"]) == 1500
+        assert result["notFound"] == ["missing"]
+        sizes = [len(call.args[0]) for call in mock_sch.get_authors.call_args_list]
+        assert sizes == [1000, 501]
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_keeps_input_order(self, mock_sch):
+        mock_sch.get_author.return_value = _make_author(authorId="2")
+        mock_sch.get_authors.return_value = ([_make_author(authorId="1")], [])
+        asyncio.run(get_author("2"))
+        result = json.loads(asyncio.run(get_authors_batch(["1", "2"])))
+        assert [a["authorId"] for a in result["authors"]] == ["1", "2"]
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_uses_cache(self, mock_sch):
+        mock_sch.get_authors.return_value = ([_make_author(authorId="1")], [])
+        asyncio.run(get_authors_batch(["1"]))
+        result = json.loads(asyncio.run(get_authors_batch(["1"])))
+        assert [a["authorId"] for a in result["authors"]] == ["1"]
+        asyncio.run(get_author("1"))
+        mock_sch.get_authors.assert_awaited_once()
+        mock_sch.get_author.assert_not_awaited()
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_empty(self, mock_sch):
+        result = json.loads(asyncio.run(get_authors_batch([])))
+        assert result == {"authors": [], "notFound": []}
+        mock_sch.get_authors.assert_not_awaited()
+
+
+class TestTTLCache:
+    def test_expiry(self):
+        cache = _TTLCache(ttl=10, maxsize=10)
+        with mock.patch("time.monotonic", return_value=100.0):
+            cache.set("key", "value")
+            assert cache.get("key") == "value"
+        with mock.patch("time.monotonic", return_value=110.0):
+            assert cache.get("key") is None
+
+    def test_eviction(self):
+        cache = _TTLCache(ttl=10, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_disabled(self):
+        cache = _TTLCache(ttl=0, maxsize=10)
+        cache.set("key", "value")
+        assert cache.get("key") is None
+
+
+class TestConcurrency:
+    def test_client_not_created_on_import(self):
+        code = (
+            "import sys, semanticscholar.mcp_server as server\n"
+            "print(server._sch, 'semanticscholar.AsyncSemanticScholar' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.split() == ["None", "False"]
+
+    @mock.patch("semanticscholar.mcp_server._sch", None)
+    def test_shared_client(self):
+        sch = _client()
+        assert isinstance(sch.http_client, httpx.AsyncClient)
+        assert _client() is sch
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_tool_calls_overlap(self, mock_sch):
+        # The first call only returns once the second one has started.
+        async def run():
+            started = asyncio.Event()
+
+            async def fake_get_paper(paper_id, fields=None):
+                if paper_id == "slow":
+                    await asyncio.wait_for(started.wait(), 1)
+                else:
+                    started.set()
+                return _make_paper(paperId=paper_id)
+
+            mock_sch.get_paper.side_effect = fake_get_paper
+            return await asyncio.gather(get_paper("slow"), get_paper("fast"))
+
+        results = [json.loads(result) for result in asyncio.run(run())]
+        assert [result["paperId"] for result in results] == ["slow", "fast"]
+
+
+class TestCursor:
+    def test_round_trip(self):
+        cursor = _encode_cursor("search_authors", ["name"], 40)
+        assert _decode_cursor(cursor, "search_authors", ["name"]) == 40
+        assert _decode_cursor(None, "search_authors", ["name"]) == 0
+
+    def test_invalid(self):
+        cursor = _encode_cursor("search_authors", ["name"], 40)
+        for bad, tool in [
+            (cursor, "get_author_papers"),
+            ("not a cursor", "search_authors"),
+            (_encode_cursor("search_authors", ["name"], -1), "search_authors"),
+        ]:
+            with pytest.raises(ValueError):
+                _decode_cursor(bad, tool, ["name"])
 
 
 class TestGetPaperCitations:
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_returns_citations(self, mock_sch):
         citation = SimpleNamespace(
             paper=_make_paper(paperId="cite1", title="Citing Paper")
         )
         mock_sch.get_paper_citations.return_value = _make_paginated([citation])
-        result = json.loads(get_paper_citations("paper1"))
+        result = json.loads(asyncio.run(get_paper_citations("paper1")))
         assert len(result["citations"]) == 1
         assert result["citations"][0]["paperId"] == "cite1"
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_null_paper_skipped(self, mock_sch):
         items = [
             SimpleNamespace(paper=None),
             SimpleNamespace(paper=_make_paper(paperId="valid")),
         ]
         mock_sch.get_paper_citations.return_value = _make_paginated(items)
-        result = json.loads(get_paper_citations("paper1"))
+        result = json.loads(asyncio.run(get_paper_citations("paper1")))
         assert len(result["citations"]) == 1
         assert result["citations"][0]["paperId"] == "valid"
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_limit_clamped_to_1000(self, mock_sch):
         mock_sch.get_paper_citations.return_value = _make_paginated([])
-        get_paper_citations("paper1", limit=2000)
+        asyncio.run(get_paper_citations("paper1", limit=2000))
         call_kwargs = mock_sch.get_paper_citations.call_args[1]
         assert call_kwargs["limit"] == 1000
+        assert call_kwargs["max_results"] == 2000
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_stops_at_limit(self, mock_sch):
+        items = [SimpleNamespace(paper=_make_paper(paperId=str(i))) for i in range(5)]
+        mock_sch.get_paper_citations.return_value = _make_paginated(items)
+        result = json.loads(asyncio.run(get_paper_citations("paper1", limit=3)))
+        assert [c["paperId"] for c in result["citations"]] == ["0", "1", "2"]
+        assert result["count"] == 3
+        assert "total" not in result
+        results = mock_sch.get_paper_citations.return_value
+        results.async_take.assert_awaited_once_with(3)
+
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
+    def test_cursor(self, mock_sch):
+        items = [SimpleNamespace(paper=_make_paper(paperId=str(i))) for i in range(3)]
+        mock_sch.get_paper_citations.return_value = _make_paginated(items, next=3)
+        result = json.loads(asyncio.run(get_paper_citations("paper1", limit=3)))
+        assert mock_sch.get_paper_citations.call_args[1]["offset"] == 0
+        cursor = result["nextCursor"]
+
+        mock_sch.get_paper_citations.return_value = _make_paginated(items[:1])
+        result = json.loads(
+            asyncio.run(get_paper_citations("paper1", limit=3, cursor=cursor))
+        )
+        assert mock_sch.get_paper_citations.call_args[1]["offset"] == 3
+        assert "nextCursor" not in result
+        with pytest.raises(ValueError):
+            asyncio.run(get_paper_citations("paper2", cursor=cursor))
 
 
 class TestGetPaperReferences:
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_returns_references(self, mock_sch):
         ref = SimpleNamespace(paper=_make_paper(paperId="ref1", title="Ref Paper"))
         mock_sch.get_paper_references.return_value = _make_paginated([ref])
-        result = json.loads(get_paper_references("paper1"))
+        result = json.loads(asyncio.run(get_paper_references("paper1")))
         assert len(result["references"]) == 1
         assert result["references"][0]["paperId"] == "ref1"
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_null_paper_skipped(self, mock_sch):
         mock_sch.get_paper_references.return_value = _make_paginated(
             [SimpleNamespace(paper=None)]
         )
-        result = json.loads(get_paper_references("paper1"))
+        result = json.loads(asyncio.run(get_paper_references("paper1")))
         assert len(result["references"]) == 0
 
 
 class TestSearchSnippets:
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_returns_snippets(self, mock_sch):
         item = SimpleNamespace(
             paper=_make_paper(paperId="s1", title="Snippet Paper"),
@@ -260,82 +508,84 @@ class TestSearchSnippets:
             score=0.95,
         )
         mock_sch.search_snippet.return_value = [item]
-        result = json.loads(search_snippets("query"))
+        result = json.loads(asyncio.run(search_snippets("query")))
         assert len(result["results"]) == 1
         assert result["results"][0]["score"] == 0.95
         assert result["results"][0]["paper"]["paperId"] == "s1"
         assert result["results"][0]["snippet"]["text"] == "matching text"
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_null_paper_and_snippet(self, mock_sch):
         item = SimpleNamespace(paper=None, snippet=None, score=0.5)
         mock_sch.search_snippet.return_value = [item]
-        result = json.loads(search_snippets("query"))
+        result = json.loads(asyncio.run(search_snippets("query")))
         assert "paper" not in result["results"][0]
         assert "snippet" not in result["results"][0]
         assert result["results"][0]["score"] == 0.5
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_fields_of_study_split(self, mock_sch):
         mock_sch.search_snippet.return_value = []
-        search_snippets("query", fields_of_study="Physics,Biology")
+        asyncio.run(search_snippets("query", fields_of_study="Physics,Biology"))
         call_kwargs = mock_sch.search_snippet.call_args[1]
         assert call_kwargs["fields_of_study"] == ["Physics", "Biology"]
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_limit_clamped_to_1000(self, mock_sch):
         mock_sch.search_snippet.return_value = []
-        search_snippets("query", limit=2000)
+        asyncio.run(search_snippets("query", limit=2000))
         call_kwargs = mock_sch.search_snippet.call_args[1]
         assert call_kwargs["limit"] == 1000
 
 
 class TestSearchAuthors:
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_returns_authors(self, mock_sch):
         author = _make_author()
         mock_sch.search_author.return_value = _make_paginated([author], total=1)
-        result = json.loads(search_authors("Author One"))
+        result = json.loads(asyncio.run(search_authors("Author One")))
         assert result["total"] == 1
         assert result["authors"][0]["name"] == "Author One"
 
 
 class TestGetAuthor:
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_get_author(self, mock_sch):
         mock_sch.get_author.return_value = _make_author(authorId="a1")
-        result = json.loads(get_author("a1"))
+        result = json.loads(asyncio.run(get_author("a1")))
         assert result["authorId"] == "a1"
+        asyncio.run(get_author("a1"))
+        mock_sch.get_author.assert_awaited_once_with("a1", fields=AUTHOR_FIELDS)
 
 
 class TestGetAuthorPapers:
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_returns_papers(self, mock_sch):
         paper = _make_paper()
         mock_sch.get_author_papers.return_value = _make_paginated([paper])
-        result = json.loads(get_author_papers("a1"))
+        result = json.loads(asyncio.run(get_author_papers("a1")))
         assert len(result["papers"]) == 1
         assert result["papers"][0]["title"] == "Test Paper"
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_limit_clamped_to_1000(self, mock_sch):
         mock_sch.get_author_papers.return_value = _make_paginated([])
-        get_author_papers("a1", limit=2000)
+        asyncio.run(get_author_papers("a1", limit=2000))
         call_kwargs = mock_sch.get_author_papers.call_args[1]
         assert call_kwargs["limit"] == 1000
 
 
 class TestGetRecommendations:
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_returns_recommendations(self, mock_sch):
         paper = _make_paper()
         mock_sch.get_recommended_papers.return_value = [paper]
-        result = json.loads(get_recommendations("paper1"))
+        result = json.loads(asyncio.run(get_recommendations("paper1")))
         assert len(result["papers"]) == 1
 
-    @mock.patch("semanticscholar.mcp_server._sch")
+    @mock.patch("semanticscholar.mcp_server._sch", new_callable=mock.AsyncMock)
     def test_limit_clamped_to_500(self, mock_sch):
         mock_sch.get_recommended_papers.return_value = []
-        get_recommendations("paper1", limit=1000)
+        asyncio.run(get_recommendations("paper1", limit=1000))
         call_kwargs = mock_sch.get_recommended_papers.call_args[1]
         assert call_kwargs["limit"] == 500
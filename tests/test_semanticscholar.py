@@ -1,26 +1,58 @@
+import asyncio
+import importlib.util
 import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 from datetime import datetime
 from unittest import mock
+from urllib.parse import parse_qs
 
 import httpx
+import numpy
 import vcr
 from httpx import TimeoutException
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import StatusCode
 
+from semanticscholar.ApiKeyPool import ApiKeyPool
 from semanticscholar.AsyncSemanticScholar import AsyncSemanticScholar
 from semanticscholar.Author import Author
 from semanticscholar.Citation import Citation
+from semanticscholar.CircuitBreaker import CircuitBreaker, endpoint_family
+from semanticscholar.ConcurrencyLimiter import ConcurrencyLimiter
 from semanticscholar.Dataset import Dataset
 from semanticscholar.DatasetDiff import DatasetDiff
+from semanticscholar.HedgePolicy import HedgePolicy
+from semanticscholar.Instrumentation import RequestEvent, endpoint_template
 from semanticscholar.Journal import Journal
+from semanticscholar.Metrics import Metrics
+from semanticscholar.PaginatedResults import PaginatedResults
 from semanticscholar.Paper import Paper
 from semanticscholar.PublicationVenue import PublicationVenue
+from semanticscholar.RateLimiter import (
+    FileRateBackend,
+    MemoryRateBackend,
+    RateBackend,
+    RateLimiter,
+    RedisRateBackend,
+)
 from semanticscholar.Reference import Reference
 from semanticscholar.Release import Release
+from semanticscholar.RequestLogger import RequestLogger
 from semanticscholar.SemanticScholar import SemanticScholar
 from semanticscholar.SnippetSearchResult import Snippet, SnippetSearchResult
 from semanticscholar.SemanticScholarException import (
     BadQueryParametersException,
+    CircuitOpenException,
     GatewayTimeoutException,
     InternalServerErrorException,
     NoMorePagesException,
@@ -41,6 +73,44 @@ class SemanticScholarTest(unittest.TestCase):
     def setUp(self) -> None:
         self.sch = SemanticScholar()
 
+    def test_lazy_package_import(self) -> None:
+        code = (
+            "import sys, semanticscholar\n"
+            "print('httpx' in sys.modules, 'tenacity' in sys.modules)\n"
+            "from semanticscholar import SemanticScholar\n"
+            "print(SemanticScholar.__module__)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        self.assertEqual(
+            result.stdout.split(), ["False", "False", "semanticscholar.SemanticScholar"]
+        )
+        # Exports are not shadowed by the modules of the same name, even when
+        # the module is imported before the export is accessed.
+        code = (
+            "import sys, types\n"
+            "import semanticscholar.AsyncSemanticScholar\n"
+            "import semanticscholar\n"
+            "module = sys.modules['semanticscholar.AsyncSemanticScholar']\n"
+            "print(isinstance(module, types.ModuleType))\n"
+            "print(semanticscholar.AsyncSemanticScholar is module.AsyncSemanticScholar)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.split(), ["True", "True"])
+        import semanticscholar
+
+        self.assertEqual(
+            sorted(semanticscholar.__all__), sorted(semanticscholar._EXPORTS)
+        )
+
+        self.assertIs(semanticscholar.SemanticScholar, SemanticScholar)
+        self.assertIs(semanticscholar.RequestEvent, RequestEvent)
+        with self.assertRaises(AttributeError):
+            semanticscholar.Unknown
+
     def test_author(self) -> None:
         file = open("tests/data/Author.json", encoding="utf-8")
         data = json.loads(file.read())
@@ -182,6 +252,15 @@ class SemanticScholarTest(unittest.TestCase):
         self.assertEqual(item.keys(), data.keys())
         file.close()
 
+    def test_paper_embedding_vector(self) -> None:
+        with open("tests/data/Paper.json", encoding="utf-8") as file:
+            data = json.loads(file.read())
+        vector = Paper(data).embedding_vector
+        self.assertEqual(vector.dtype, numpy.float32)
+        self.assertEqual(vector.shape, (len(data["embedding"]["vector"]),))
+        self.assertAlmostEqual(vector[0], data["embedding"]["vector"][0], places=6)
+        self.assertIsNone(Paper({"paperId": "1"}).embedding_vector)
+
     def test_paper_with_null_values_for_lists(self) -> None:
         fields = ["authors", "citations", "references"]
         for field in fields:
@@ -311,6 +390,40 @@ class SemanticScholarTest(unittest.TestCase):
         self.assertEqual(len(not_found), 1)
         self.assertEqual(not_found[0], "CorpusId:211530585")
 
+    @mock.patch("httpx.AsyncClient.request")
+    def test_get_paper_embeddings(self, mock_request):
+        ids = [f"CorpusId:{i}" for i in range(502)]
+
+        def paper(i):
+            vector = [float(i), 0.5, -1.0]
+            if i == 3:
+                return None
+            if i == 4:
+                return {"paperId": "p4", "embedding": None}
+            # The last ID refers to the same paper as the first one.
+            return {"paperId": f"p{i % 501}", "embedding": {"vector": vector}}
+
+        mock_request.side_effect = [
+            httpx.Response(200, json=[paper(i) for i in range(500)]),
+            httpx.Response(200, json=[paper(i) for i in range(500, 502)]),
+        ]
+        embeddings = self.sch.get_paper_embeddings(ids)
+        self.assertEqual(mock_request.call_count, 2)
+        first, second = mock_request.call_args_list
+        self.assertEqual(first.kwargs["params"], "fields=paperId,embedding.specter_v2")
+        self.assertEqual(first.kwargs["json"], {"ids": ids[:500]})
+        self.assertEqual(second.kwargs["json"], {"ids": ids[500:]})
+        self.assertEqual(embeddings.vectors.dtype, numpy.float32)
+        self.assertEqual(embeddings.vectors.shape, (499, 3))
+        self.assertEqual(len(embeddings), 499)
+        self.assertEqual(embeddings.model, "specter_v2")
+        self.assertEqual(embeddings.missing_ids, ["CorpusId:3", "CorpusId:4"])
+        self.assertEqual(embeddings.paper_ids[:4], ["p0", "p1", "p2", "p5"])
+        self.assertEqual(embeddings.row("CorpusId:501"), 0)
+        self.assertEqual(embeddings["p5"][0], 5.0)
+        self.assertEqual(embeddings["CorpusId:500"][0], 500.0)
+        self.assertNotIn("CorpusId:3", embeddings)
+
     @test_vcr.use_cassette
     def test_get_paper_authors(self):
         data = self.sch.get_paper_authors("10.2139/ssrn.2250500")
@@ -737,6 +850,41 @@ class SemanticScholarTest(unittest.TestCase):
         actual_output = "\n".join(log.output)
         self.assertEqual(actual_output, expected_output)
 
+    @mock.patch.object(RequestLogger, "_curl_cmd")
+    @mock.patch("httpx.AsyncClient.request")
+    def test_request_log_disabled(self, mock_request, mock_curl_cmd):
+        mock_request.return_value = httpx.Response(
+            status_code=200, json={"paperId": "abc"}
+        )
+        self.sch.get_paper("abc")
+        mock_curl_cmd.assert_not_called()
+        self.sch.request_logger.sample_rate = 0
+        with self.assertLogs("semanticscholar", level="DEBUG") as log:
+            self.sch.get_paper("abc")
+            logging.getLogger("semanticscholar").debug("end")
+        self.assertEqual(log.output, ["DEBUG:semanticscholar:end"])
+        mock_curl_cmd.assert_not_called()
+        with self.assertRaises(ValueError):
+            self.sch.request_logger.sample_rate = 2
+
+    @mock.patch("httpx.AsyncClient.request")
+    def test_slow_request_log(self, mock_request):
+        mock_request.return_value = httpx.Response(
+            status_code=200, json={"paperId": "abc"}
+        )
+        self.sch.request_logger.slow_threshold = 0
+        with self.assertLogs("semanticscholar", level="WARNING") as log:
+            self.sch.get_paper("abc")
+        self.assertEqual(len(log.records), 1)
+        record = log.records[0]
+        self.assertTrue(record.getMessage().startswith("Slow request: GET "))
+        self.assertEqual(record.endpoint, "/graph/v1/paper/{id}")
+        self.assertEqual(record.status, 200)
+
+        self.sch.request_logger.slow_threshold = 60
+        with self.assertNoLogs("semanticscholar", level="WARNING"):
+            self.sch.get_paper("abc")
+
     @mock.patch("httpx.AsyncClient.request")
     def test_exception_internal_server_error(self, mock_request):
         mock_response = httpx.Response(status_code=500, json={"message": "message"})
@@ -1377,6 +1525,762 @@ class AsyncSemanticScholarTest(unittest.IsolatedAsyncioTestCase):
             with self.assertRaises(ServerErrorException):
                 await self.sch.get_paper("10.1093/mind/lix.236.433")
 
+    def test_endpoint_template(self):
+        test_cases = [
+            (
+                "https://api.semanticscholar.org/graph/v1/paper/CorpusId:1234",
+                "/graph/v1/paper/{id}",
+            ),
+            (
+                "https://api.semanticscholar.org/graph/v1/paper/abc/citations",
+                "/graph/v1/paper/{id}/citations",
+            ),
+            (
+                "https://api.semanticscholar.org/graph/v1/paper/search/bulk",
+                "/graph/v1/paper/search/bulk",
+            ),
+            (
+                "https://api.semanticscholar.org/recommendations/v1/papers/forpaper/abc",
+                "/recommendations/v1/papers/forpaper/{id}",
+            ),
+            (
+                "https://api.semanticscholar.org/graph/v1/paper/DOI:10.18653/v1/N18-3011",
+                "/graph/v1/paper/{id}",
+            ),
+            (
+                "https://api.semanticscholar.org/graph/v1/paper/10.1145/x/citations",
+                "/graph/v1/paper/{id}/citations",
+            ),
+            (
+                "https://api.semanticscholar.org/graph/v1/paper/"
+                "URL:https://arxiv.org/abs/2106.15928/references",
+                "/graph/v1/paper/{id}/references",
+            ),
+            (
+                "https://api.semanticscholar.org/graph/v1/paper/"
+                "URL:https://www.semanticscholar.org/paper/abc",
+                "/graph/v1/paper/{id}",
+            ),
+            (
+                "https://api.semanticscholar.org/graph/v1/author/1234/papers",
+                "/graph/v1/author/{id}/papers",
+            ),
+            (
+                "https://api.semanticscholar.org/datasets/v1/release/latest/dataset/abstracts",
+                "/datasets/v1/release/{id}/dataset/{id}",
+            ),
+            (
+                "https://api.semanticscholar.org/graph/v1/paper/autocomplete",
+                "/graph/v1/paper/autocomplete",
+            ),
+        ]
+        for url, expected in test_cases:
+            with self.subTest(url=url):
+                self.assertEqual(endpoint_template(url), expected)
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_instrumentation_events(self, mock_request):
+        mock_request.return_value = httpx.Response(
+            status_code=200, json={"paperId": "abc", "title": "Title"}
+        )
+        events = []
+        self.sch.instrumentation.add_hook(events.append)
+        await self.sch.get_paper("abc")
+        self.assertEqual(
+            [event.kind for event in events], ["request_start", "request_end"]
+        )
+        end = events[1]
+        self.assertEqual(end.endpoint, "/graph/v1/paper/{id}")
+        self.assertEqual(end.method, "GET")
+        self.assertEqual(end.status, 200)
+        self.assertEqual(end.attempt, 1)
+        self.assertEqual(end.bytes, len(mock_request.return_value.content))
+        self.assertGreaterEqual(end.latency, 0)
+        self.assertGreaterEqual(end.queued, 0)
+
+        self.sch.instrumentation.remove_hook(events.append)
+        await self.sch.get_paper("abc")
+        self.assertEqual(len(events), 2)
+        with self.assertRaises(ValueError):
+            self.sch.instrumentation.add_hook(events.append, ["unknown"])
+
+    @mock.patch("asyncio.sleep", new_callable=mock.AsyncMock)
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_instrumentation_retry_metrics(self, mock_request, mock_sleep):
+        mock_request.side_effect = [
+            httpx.Response(status_code=429, json={"message": "Too Many Requests"}),
+            httpx.Response(status_code=200, json={"paperId": "abc"}),
+        ]
+        metrics = self.sch.instrumentation.add_hook(Metrics())
+        await self.sch.get_paper("abc")
+        endpoint = metrics.snapshot()["/graph/v1/paper/{id}"]
+        self.assertEqual(endpoint["requests"], 2)
+        self.assertEqual(endpoint["errors"], 1)
+        self.assertEqual(endpoint["statuses"], {429: 1, 200: 1})
+        self.assertEqual(endpoint["retries"], 1)
+        self.assertEqual(endpoint["rate_limit_waits"], 1)
+        self.assertEqual(
+            endpoint["rate_limit_wait_seconds"], mock_sleep.await_args.args[0]
+        )
+        self.assertEqual(endpoint["latency"]["count"], 2)
+        self.assertIsNotNone(metrics.percentile("/graph/v1/paper/{id}", 99))
+
+        text = metrics.to_prometheus()
+        self.assertIn(
+            'semanticscholar_requests_total{endpoint="/graph/v1/paper/{id}",'
+            'status="429"} 1',
+            text,
+        )
+        self.assertIn(
+            "semanticscholar_request_duration_seconds_count"
+            '{endpoint="/graph/v1/paper/{id}"} 2',
+            text,
+        )
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {})
+
+    def test_metrics_percentiles(self):
+        metrics = Metrics()
+        for latency in range(1, 101):
+            metrics(
+                RequestEvent("request_end", "/e", status=200, latency=latency / 100)
+            )
+        for percent, expected in ((50, 0.5), (95, 0.95), (99, 0.99)):
+            with self.subTest(percent=percent):
+                self.assertAlmostEqual(
+                    metrics.percentile("/e", percent), expected, delta=expected * 0.05
+                )
+        buckets = dict(metrics._endpoints["/e"].latency.cumulative_buckets())
+        self.assertEqual(buckets["0.1"], 10)
+        self.assertEqual(buckets["+Inf"], 100)
+        self.assertIsNone(metrics.percentile("/other", 50))
+
+    def test_metrics_http_server(self):
+        metrics = Metrics()
+        metrics(RequestEvent("request_end", "/e", status=200, latency=0.2))
+        server = metrics.start_http_server(0)
+        try:
+            response = httpx.get(f"http://127.0.0.1:{server.server_port}/metrics")
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('status="200"} 1', response.text)
+
+    async def test_concurrency_limiter(self):
+        limiter = ConcurrencyLimiter(initial=2, max_limit=4)
+        for _ in range(2):
+            await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        self.assertEqual((limiter.in_flight, limiter.waiting), (2, 1))
+        limiter.release("/e", 0.1, 200)
+        await waiter
+        self.assertEqual((limiter.in_flight, limiter.waiting), (2, 0))
+
+        # Additive increase, by one per limit's worth of healthy responses.
+        for _ in range(2):
+            limiter.release("/e", 0.1, 200)
+        self.assertEqual(limiter.limit, 3)
+        for _ in range(20):
+            await limiter.acquire()
+            limiter.release("/e", 0.1, 404)
+        self.assertEqual(limiter.limit, 4)
+
+        # Multiplicative decrease, once per round trip.
+        for status in (429, 504):
+            await limiter.acquire()
+            limiter.release("/e", 1.0, status)
+        self.assertEqual(limiter.limit, 2)
+        limiter._last_decrease -= 1
+        await limiter.acquire()
+        limiter.release("/e", 1.0, error=TimeoutException("timeout"))
+        self.assertEqual(limiter.limit, 1)
+
+        # Latency well above the baseline of its endpoint.
+        limiter = ConcurrencyLimiter(initial=8, max_limit=8)
+        for latency in [0.1] * 5 + [0.1, 1.0, 1.0, 1.0]:
+            await limiter.acquire()
+            limiter.release("/e", latency, 200)
+        self.assertEqual(limiter.limit, 4)
+
+        with self.assertRaises(ValueError):
+            ConcurrencyLimiter(initial=10, max_limit=5)
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_concurrency_limiter_requests(self, mock_request):
+        in_flight = peak = 0
+
+        async def respond(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={"paperId": "abc"})
+
+        mock_request.side_effect = respond
+        limiter = ConcurrencyLimiter(initial=2, max_limit=3)
+        self.sch.concurrency_limiter = limiter
+        metrics = self.sch.instrumentation.add_hook(Metrics())
+        await asyncio.gather(*(self.sch.get_paper(str(i)) for i in range(12)))
+        self.assertEqual(peak, 3)
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertEqual(metrics.concurrency_limit, 3)
+        self.assertIn("semanticscholar_concurrency_limit 3", metrics.to_prometheus())
+
+    async def test_api_key_pool(self):
+        pool = ApiKeyPool({"key-a": 1.0, "key-b": 1.0}, burst=2)
+        first = await pool.acquire()
+        second = await pool.acquire()
+        # The least loaded key is taken.
+        self.assertNotEqual(first, second)
+        pool.release(first, 200)
+        pool.release(second, 429, retry_after=60)
+        # Without tokens left, the next requests queue in the bucket.
+        with mock.patch("asyncio.sleep", new_callable=mock.AsyncMock) as sleep:
+            keys = [await pool.acquire() for _ in range(3)]
+        self.assertEqual(keys, [first] * 3)
+        waits = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(len(waits), 2)
+        self.assertAlmostEqual(waits[0], 1, delta=0.1)
+        self.assertAlmostEqual(waits[1], 2, delta=0.1)
+        for _ in range(2):
+            pool.release(first, 200)
+        pool.release(first, 403)
+        self.assertFalse(pool.available())
+
+        stats = pool.stats()
+        self.assertEqual(stats["...ey-a"]["requests"], 4)
+        self.assertEqual(stats["...ey-a"]["statuses"], {200: 3, 403: 1})
+        self.assertEqual(stats["...ey-b"]["cooldowns"], 1)
+        self.assertTrue(stats["...ey-b"]["cooling_down"])
+
+        with self.assertRaises(ValueError):
+            ApiKeyPool([])
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_api_key_pool_rotation(self, mock_request):
+        keys = []
+
+        def respond(method, url, headers, **kwargs):
+            keys.append(headers["x-api-key"])
+            if headers["x-api-key"] == "key-a":
+                return httpx.Response(429, headers={"retry-after": "30"}, json={})
+            return httpx.Response(200, json={"paperId": "abc"})
+
+        mock_request.side_effect = respond
+        pool = ApiKeyPool(["key-a", "key-b"], rate=100)
+        sch = AsyncSemanticScholar(api_key_pool=pool)
+        await sch.get_paper("abc")
+        await sch.get_paper("abc")
+        # The refused key cools down, the request is sent again at once.
+        self.assertEqual(keys, ["key-a", "key-b", "key-b"])
+        self.assertEqual(sch.auth_header, {})
+        self.assertEqual(
+            AsyncSemanticScholar(api_key="key").auth_header, {"x-api-key": "key"}
+        )
+        with self.assertRaises(ValueError):
+            AsyncSemanticScholar(api_key="key", api_key_pool=pool)
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_api_key_pool_rate_limiter(self, mock_request):
+        mock_request.return_value = httpx.Response(200, json={"paperId": "abc"})
+        backend = MemoryRateBackend()
+        # Two workers sharing a backend, each with its own pool of one key.
+        clients = [
+            AsyncSemanticScholar(
+                api_key_pool=ApiKeyPool({"key-a": 1.0}),
+                rate_limiter=RateLimiter(100, backend=backend),
+            )
+            for _ in range(2)
+        ]
+        metrics = [sch.instrumentation.add_hook(Metrics()) for sch in clients]
+        with mock.patch("asyncio.sleep", new_callable=mock.AsyncMock) as sleep:
+            for sch in clients * 2:
+                await sch.get_paper("abc")
+        # One bucket per key, at the rate of the pool, shared by the pools.
+        waits = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(len(waits), 3)
+        for wait, expected in zip(waits, (1, 2, 3)):
+            self.assertAlmostEqual(wait, expected, delta=0.2)
+        endpoint = metrics[1].snapshot()["/graph/v1/paper/{id}"]
+        self.assertEqual(endpoint["rate_limit_waits"], 2)
+
+    async def test_rate_limiter(self):
+        limiter = RateLimiter(10)
+        with mock.patch("asyncio.sleep", new_callable=mock.AsyncMock):
+            waits = [await limiter.acquire() for _ in range(3)]
+            other = await limiter.acquire("key")
+        self.assertEqual(waits[0], 0)
+        self.assertAlmostEqual(waits[1], 0.1, delta=0.01)
+        self.assertAlmostEqual(waits[2], 0.2, delta=0.01)
+        # Each key has its own bucket.
+        self.assertEqual(other, 0)
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+
+    def test_file_rate_backend_processes(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "rate")
+        script = (
+            "import asyncio, sys, time\n"
+            "from semanticscholar.RateLimiter import FileRateBackend\n"
+            "backend = FileRateBackend(sys.argv[1])\n"
+            "time.sleep(max(0, float(sys.argv[2]) - time.time()))\n"
+            "for _ in range(5):\n"
+            "    print(asyncio.run(backend.reserve('key', 50, 1)))\n"
+        )
+        start = str(time.time() + 1)
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-c", script, path, start],
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(4)
+        ]
+        waits = [
+            float(line)
+            for worker in workers
+            for line in worker.communicate()[0].split()
+        ]
+        self.assertEqual(len(waits), 20)
+        # Reservations of all processes queue in one bucket of 50 per
+        # second, instead of 5 in each process's own bucket.
+        self.assertGreater(max(waits), 0.2)
+
+    async def test_file_rate_backend_locked(self):
+        import fcntl
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        backend = FileRateBackend(os.path.join(directory.name, "rate"))
+        with open(backend.path, "w") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            reservation = asyncio.ensure_future(backend.reserve("key", 1, 1))
+            # The event loop runs while another holder has the lock.
+            await asyncio.sleep(0.1)
+            self.assertFalse(reservation.done())
+            fcntl.flock(file, fcntl.LOCK_UN)
+        self.assertEqual(await asyncio.wait_for(reservation, 5), 0)
+        with self.assertRaises(TypeError):
+            RateBackend()
+
+    @unittest.skipUnless(importlib.util.find_spec("fakeredis"), "requires fakeredis")
+    async def test_redis_rate_backend(self):
+        import fakeredis
+
+        limiter = RateLimiter(
+            10, backend=RedisRateBackend(fakeredis.aioredis.FakeRedis())
+        )
+        with mock.patch("asyncio.sleep", new_callable=mock.AsyncMock):
+            waits = [await limiter.acquire() for _ in range(3)]
+        self.assertEqual(waits[0], 0)
+        self.assertAlmostEqual(waits[2], 0.2, delta=0.01)
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_rate_limiter_requests(self, mock_request):
+        mock_request.return_value = httpx.Response(200, json={"paperId": "abc"})
+        self.sch.rate_limiter = RateLimiter(1)
+        metrics = self.sch.instrumentation.add_hook(Metrics())
+        with mock.patch("asyncio.sleep", new_callable=mock.AsyncMock) as sleep:
+            for _ in range(3):
+                await self.sch.get_paper("abc")
+        self.assertEqual(sleep.await_count, 2)
+        endpoint = metrics.snapshot()["/graph/v1/paper/{id}"]
+        self.assertEqual(endpoint["rate_limit_waits"], 2)
+        self.assertGreater(endpoint["rate_limit_wait_seconds"], 2)
+
+    def test_endpoint_family(self):
+        url = "https://api.semanticscholar.org"
+        self.assertEqual(endpoint_family(f"{url}/graph/v1/paper/abc"), "paper")
+        self.assertEqual(endpoint_family(f"{url}/graph/v1/paper/batch"), "paper")
+        self.assertEqual(endpoint_family(f"{url}/graph/v1/author/1/papers"), "author")
+        self.assertEqual(endpoint_family(f"{url}/graph/v1/paper/search"), "search")
+        self.assertEqual(
+            endpoint_family(f"{url}/graph/v1/paper/autocomplete?query=a"), "search"
+        )
+        self.assertEqual(
+            endpoint_family(f"{url}/recommendations/v1/papers/forpaper/abc"),
+            "recommendations",
+        )
+        self.assertEqual(
+            endpoint_family(f"{url}/datasets/v1/release/latest"), "datasets"
+        )
+        self.assertEqual(endpoint_family(f"{url}/graph/v1/snippet"), "other")
+
+    async def test_circuit_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        with mock.patch("time.monotonic", return_value=100.0) as monotonic:
+            self.assertFalse(breaker.allow("paper"))
+            breaker.record("paper", failed=True)
+            breaker.record("paper", failed=False)
+            breaker.record("paper", failed=True)
+            self.assertEqual(breaker.state("paper"), "closed")
+            breaker.record("paper", failed=True)
+            self.assertEqual(breaker.states(), {"paper": "open"})
+            with self.assertRaises(CircuitOpenException):
+                breaker.allow("paper")
+            self.assertFalse(breaker.allow("author"))
+
+            monotonic.return_value = 110.0
+            self.assertEqual(breaker.state("paper"), "half_open")
+            self.assertTrue(breaker.allow("paper"))
+            with self.assertRaises(CircuitOpenException):
+                breaker.allow("paper")
+            breaker.record("paper", failed=True, probe=True)
+            self.assertEqual(breaker.state("paper"), "open")
+
+            monotonic.return_value = 120.0
+            self.assertTrue(breaker.allow("paper"))
+            breaker.record("paper", failed=None, probe=True)
+            self.assertEqual(breaker.state("paper"), "half_open")
+            self.assertTrue(breaker.allow("paper"))
+            breaker.record("paper", failed=False, probe=True)
+            self.assertEqual(breaker.state("paper"), "closed")
+
+        with self.assertRaises(ValueError):
+            CircuitBreaker(failure_threshold=0)
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_circuit_breaker_requests(self, mock_request):
+        mock_request.return_value = httpx.Response(500, json={"message": "error"})
+        self.sch.circuit_breaker = CircuitBreaker(failure_threshold=2)
+        metrics = self.sch.instrumentation.add_hook(Metrics())
+        for _ in range(2):
+            with self.assertRaises(InternalServerErrorException):
+                await self.sch.get_paper("abc")
+        with self.assertRaises(CircuitOpenException):
+            await self.sch.get_paper("abc")
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(metrics.circuit_states, {"paper": "open"})
+        self.assertIn(
+            'semanticscholar_circuit_state{family="paper"} 2', metrics.to_prometheus()
+        )
+
+        # Other families are not affected.
+        mock_request.return_value = httpx.Response(200, json={"authorId": "1"})
+        await self.sch.get_author("1")
+
+        self.sch.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+        self.sch.circuit_breaker.record("paper", failed=True)
+        self.sch.circuit_breaker.record("paper", failed=True)
+        mock_request.return_value = httpx.Response(200, json={"paperId": "abc"})
+        await self.sch.get_paper("abc")
+        self.assertEqual(self.sch.circuit_breaker.state("paper"), "closed")
+        self.assertEqual(metrics.circuit_states, {"paper": "closed"})
+
+    def test_hedge_policy(self):
+        policy = HedgePolicy(percentile=50, budget=0.5, min_samples=2)
+        endpoint = "/graph/v1/paper/{id}"
+        self.assertTrue(policy.applies(endpoint))
+        self.assertFalse(policy.applies("/graph/v1/paper/search"))
+        self.assertIsNone(policy.start(endpoint))
+        policy.observe(endpoint, 0.1)
+        policy.observe(endpoint, 0.2)
+        self.assertAlmostEqual(policy.start(endpoint), 0.1, delta=0.01)
+        # One hedge per two requests.
+        self.assertTrue(policy.hedge())
+        self.assertFalse(policy.hedge())
+        policy.start(endpoint)
+        self.assertFalse(policy.hedge())
+        policy.start(endpoint)
+        self.assertTrue(policy.hedge())
+        self.assertEqual((policy.requests, policy.hedges), (4, 2))
+
+        with self.assertRaises(ValueError):
+            HedgePolicy(budget=0)
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_hedge_policy_requests(self, mock_request):
+        responses = []
+
+        async def request(*args, **kwargs):
+            # The first request stalls until cancelled.
+            index = len(responses)
+            responses.append(None)
+            if index == 0:
+                await asyncio.sleep(60)
+            return httpx.Response(200, json={"paperId": f"p{index}"})
+
+        mock_request.side_effect = request
+        policy = HedgePolicy(percentile=50, budget=1, min_samples=1)
+        policy.observe("/graph/v1/paper/{id}", 0.01)
+        self.sch.hedge_policy = policy
+        metrics = self.sch.instrumentation.add_hook(Metrics())
+        with mock.patch.object(policy, "observe", wraps=policy.observe) as observe:
+            paper = await asyncio.wait_for(self.sch.get_paper("abc"), 5)
+        self.assertEqual(paper.paperId, "p1")
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(policy.hedges, 1)
+        self.assertEqual(metrics.snapshot()["/graph/v1/paper/{id}"]["hedges"], 1)
+        # The cancelled first request is observed, up to its cancellation.
+        observe.assert_called_once()
+        self.assertGreater(observe.call_args.args[1], 0)
+
+        # DOI lookups are hedged as the same endpoint.
+        responses.clear()
+        paper = await asyncio.wait_for(
+            self.sch.get_paper("DOI:10.18653/v1/N18-3011"), 5
+        )
+        self.assertEqual(paper.paperId, "p1")
+        self.assertEqual(policy.hedges, 2)
+
+        # A fast response is not hedged.
+        responses.clear()
+        mock_request.reset_mock()
+        policy.observe("/graph/v1/paper/autocomplete", 0.01)
+        mock_request.side_effect = None
+        mock_request.return_value = httpx.Response(200, json={"matches": []})
+        self.assertEqual(await self.sch.get_autocomplete("query"), [])
+        self.assertEqual(mock_request.call_count, 1)
+
+        # Search is not hedged.
+        mock_request.return_value = httpx.Response(200, json={"total": 0, "data": []})
+        await self.sch.search_paper("query")
+        self.assertEqual(policy.hedges, 2)
+
+    def _tracer(self):
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        self.sch.tracer = provider.get_tracer("test")
+        return exporter
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_tracing_pages(self, mock_request):
+        mock_request.side_effect = [
+            httpx.Response(
+                status_code=200,
+                json={"total": 3, "offset": 0, "next": 2, "data": [{}, {}]},
+            ),
+            httpx.Response(
+                status_code=200, json={"total": 3, "offset": 2, "data": [{}]}
+            ),
+        ]
+        exporter = self._tracer()
+        results = await self.sch.search_paper("query", limit=2)
+        self.assertEqual(len([item async for item in results]), 3)
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        parent = spans["semanticscholar.search_paper"]
+        self.assertEqual(parent.attributes["semanticscholar.item_count"], 2)
+        self.assertEqual(parent.attributes["semanticscholar.total"], 3)
+        pages = [
+            span
+            for span in exporter.get_finished_spans()
+            if span.name == "semanticscholar.page"
+        ]
+        self.assertEqual(
+            [span.attributes["semanticscholar.page.offset"] for span in pages], [0, 2]
+        )
+        self.assertEqual(
+            [span.attributes["semanticscholar.page.item_count"] for span in pages],
+            [2, 1],
+        )
+        self.assertEqual(pages[0].parent.span_id, parent.context.span_id)
+        request = spans["semanticscholar.request"]
+        self.assertEqual(request.attributes["http.response.status_code"], 200)
+        self.assertEqual(
+            request.attributes["semanticscholar.endpoint"], "/graph/v1/paper/search"
+        )
+
+    @mock.patch("asyncio.sleep", new_callable=mock.AsyncMock)
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_tracing_retries(self, mock_request, mock_sleep):
+        mock_request.side_effect = [
+            httpx.Response(status_code=429, json={"message": "Too Many Requests"}),
+            httpx.Response(status_code=200, json={"paperId": "abc"}),
+        ]
+        exporter = self._tracer()
+        await self.sch.get_paper("abc")
+
+        spans = exporter.get_finished_spans()
+        parent = [span for span in spans if span.name == "semanticscholar.get_paper"]
+        attempts = [span for span in spans if span.name == "semanticscholar.request"]
+        backoffs = [span for span in spans if span.name == "semanticscholar.backoff"]
+        self.assertEqual(len(parent), 1)
+        self.assertEqual(
+            [span.attributes["http.response.status_code"] for span in attempts],
+            [429, 200],
+        )
+        self.assertEqual(attempts[0].status.status_code, StatusCode.ERROR)
+        self.assertEqual(attempts[1].attributes["http.request.resend_count"], 1)
+        self.assertEqual(len(backoffs), 1)
+        self.assertEqual(
+            backoffs[0].attributes["semanticscholar.backoff_seconds"],
+            mock_sleep.await_args.args[0],
+        )
+        for span in attempts + backoffs:
+            self.assertEqual(span.parent.span_id, parent[0].context.span_id)
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_tracing_disabled(self, mock_request):
+        mock_request.return_value = httpx.Response(
+            status_code=200, json={"paperId": "abc"}
+        )
+        exporter = self._tracer()
+        self.sch.tracer = None
+        await self.sch.get_paper("abc")
+        self.assertEqual(exporter.get_finished_spans(), ())
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_max_results(self, mock_request):
+        def page(method, url, params, **kwargs):
+            query = parse_qs(params)
+            offset, limit = int(query["offset"][0]), int(query["limit"][0])
+            data = [
+                {"citingPaper": {"paperId": str(i)}}
+                for i in range(offset, offset + limit)
+            ]
+            return httpx.Response(
+                200, json={"offset": offset, "next": offset + limit, "data": data}
+            )
+
+        mock_request.side_effect = page
+        results = await self.sch.get_paper_citations("abc", limit=10, max_results=25)
+        items = [item async for item in results]
+        self.assertEqual(len(items), 25)
+        self.assertEqual(items[-1].paper.paperId, "24")
+        limits = [
+            parse_qs(call.kwargs["params"])["limit"][0]
+            for call in mock_request.call_args_list
+        ]
+        self.assertEqual(limits, ["10", "10", "5"])
+
+        mock_request.reset_mock()
+        results = await self.sch.get_paper_citations("abc", limit=10)
+        items = await results.async_take(15)
+        self.assertEqual(len(items), 15)
+        self.assertEqual(len(await results.async_take(5)), 5)
+        await results.async_next_page()
+        limits = [
+            parse_qs(call.kwargs["params"])["limit"][0]
+            for call in mock_request.call_args_list
+        ]
+        self.assertEqual(limits, ["10", "5", "10"])
+
+        with self.assertRaises(ValueError):
+            await self.sch.search_author("name", max_results=0)
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_max_results_cut_page(self, mock_request):
+        # Pages larger than requested are cut to max_results, and the next
+        # page starts after the last item kept.
+        mock_request.return_value = httpx.Response(
+            200,
+            json={
+                "offset": 0,
+                "next": 10,
+                "data": [{"citingPaper": {"paperId": str(i)}} for i in range(10)],
+            },
+        )
+        results = await self.sch.get_paper_citations("abc", max_results=4)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results.next, 4)
+
+        requester = mock.Mock(tracer=None)
+        requester.get_data_async = mock.AsyncMock(
+            return_value={"data": [{"paperId": "a"}, {"paperId": "b"}], "token": "t"}
+        )
+        results = await PaginatedResults.create(
+            requester,
+            Paper,
+            "url",
+            "query",
+            ["title"],
+            1000,
+            token_pagination=True,
+            max_items=1,
+        )
+        self.assertEqual(len(results), 1)
+        self.assertIsNone(results.token)
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_last_position(self, mock_request):
+        def page(method, url, params, **kwargs):
+            query = parse_qs(params)
+            offset, limit = int(query["offset"][0]), int(query["limit"][0])
+            data = [{"citingPaper": {"paperId": str(i)}} for i in range(limit)]
+            return httpx.Response(
+                200, json={"offset": offset, "next": offset + limit, "data": data}
+            )
+
+        mock_request.side_effect = page
+        results = await self.sch.get_paper_citations(
+            "abc", limit=10, offset=9995, max_results=10000
+        )
+        self.assertEqual(len([item async for item in results]), 4)
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(
+            parse_qs(mock_request.call_args.kwargs["params"])["limit"], ["4"]
+        )
+
+        mock_request.reset_mock()
+        results = await self.sch.get_paper_citations(
+            "abc", limit=10, offset=9999, max_results=10000
+        )
+        self.assertEqual([item async for item in results], [])
+        mock_request.assert_not_called()
+
+    @mock.patch("httpx.AsyncClient.request")
+    async def test_start_offset(self, mock_request):
+        def page(method, url, params, **kwargs):
+            query = parse_qs(params)
+            if "token" in query:
+                return httpx.Response(
+                    200, json={"total": 3, "data": [{"paperId": "c"}]}
+                )
+            offset, limit = int(query["offset"][0]), int(query["limit"][0])
+            data = [
+                {"paper": {"paperId": str(i)}} for i in range(offset, offset + limit)
+            ]
+            return httpx.Response(
+                200, json={"offset": offset, "next": offset + limit, "data": data}
+            )
+
+        mock_request.side_effect = page
+        results = await self.sch.get_author_papers("abc", limit=10, offset=30)
+        self.assertEqual(results.offset, 30)
+        self.assertEqual(results.next, 40)
+        params = parse_qs(mock_request.call_args.kwargs["params"])
+        self.assertEqual(params["offset"], ["30"])
+
+        results = await self.sch.search_paper("query", bulk=True, token="abc")
+        self.assertEqual(
+            parse_qs(mock_request.call_args.kwargs["params"])["token"], ["abc"]
+        )
+        self.assertEqual([item.paperId for item in results], ["c"])
+        self.assertIsNone(results.token)
+
+        with self.assertRaises(ValueError):
+            await self.sch.search_paper("query", bulk=True, offset=10)
+        with self.assertRaises(ValueError):
+            await self.sch.search_paper("query", token="abc")
+        with self.assertRaises(ValueError):
+            await self.sch.get_paper_citations("abc", offset=-1)
+
+    async def test_shared_http_client(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"paperId": "abc", "title": "Title"})
+
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)
+        ) as http_client:
+            sch = AsyncSemanticScholar(http_client=http_client)
+            self.assertIs(sch.http_client, http_client)
+            await asyncio.gather(sch.get_paper("abc"), sch.get_paper("def"))
+            self.assertFalse(http_client.is_closed)
+        self.assertEqual(
+            sorted(request.url.path for request in requests),
+            ["/graph/v1/paper/abc", "/graph/v1/paper/def"],
+        )
+
     @test_vcr.use_cassette()
     async def test_get_available_releases(self):
         releases = await self.sch.get_available_releases()